@@ -0,0 +1,392 @@
+# arena.py
+import os
+import base64
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .holder_table import TEAMS
+
+# ----------------------------
+# Config
+# ----------------------------
+# Run the battle on the server and let it decide the winner (clients only render)
+SERVER_ARENA = os.getenv("SERVER_ARENA", "0") == "1"
+ARENA_WIDTH = float(os.getenv("ARENA_WIDTH", "960"))
+ARENA_HEIGHT = float(os.getenv("ARENA_HEIGHT", "540"))
+ARENA_PER_TEAM = int(os.getenv("ARENA_PER_TEAM", "1"))
+# Physics steps per streamed frame: 60 Hz physics -> 10 frames/s
+ARENA_STEPS_PER_FRAME = int(os.getenv("ARENA_STEPS_PER_FRAME", "6"))
+# Full state for late joiners, and for clients that missed a delta
+ARENA_KEYFRAME_SECONDS = float(os.getenv("ARENA_KEYFRAME_SECONDS", "2"))
+# A battle still undecided after this long goes to the team with the most HP left
+ARENA_MAX_SECONDS = float(os.getenv("ARENA_MAX_SECONDS", "600"))
+
+# ----------------------------
+# Tuning (mirrors ArenaSim in frontend/app.js)
+# ----------------------------
+DT = 1 / 60
+MAX_HP = 5
+SPEED_DELTA = 0.10      # +10% speed per HP lost
+MASS_DELTA = 0.10       # -10% mass per HP lost
+SIZE_DELTA = 0.10       # -10% radius per HP lost
+MIN_MASS_FACTOR = 0.25
+MIN_SIZE_FACTOR = 0.60
+BASE_SPEED_FACTOR = 0.4
+MIN_BASE_SPEED = 250.0
+ITEM_SPAWN_STEPS = 180  # every 3s
+PROB_BULBORB = 0.75
+BULBORB, FLOWER = 0, 1  # -1 HP, +1 HP
+ITEM_RADIUS_FACTOR = np.array([0.75, 0.60])  # relative to the base radius
+
+# Starting corner of each team, as in the browser
+CORNERS = {"blue": (0, 0), "yellow": (1, 0), "purple": (0, 1), "red": (1, 1)}
+
+# Positions are streamed as uint16 fractions of the arena size
+QUANT = 65535
+
+
+def round_seed(round_number: int) -> int:
+    """Every worker simulates a round from the same seed, so they agree on it."""
+    return int(round_number) * 7919 + 17
+
+
+def b64(arr: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(arr).tobytes()).decode()
+
+
+class UniformGrid:
+    """
+    Broad phase: points bucketed into square cells and sorted by cell, with
+    a start/end table per cell, so the neighbours of a cell are two array
+    lookups away. Cells must be at least as large as the widest interaction
+    distance.
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, cell: float, width: float, height: float):
+        # Never much finer than one point per cell: tiny cells only grow the table
+        self.cell = cell = max(cell, float(np.sqrt(width * height / max(1, len(x)))))
+        # A spare row/column on every side, so neighbour keys never leave the table
+        self.cols = int(width // cell) + 3
+        rows = int(height // cell) + 3
+        self.key = self.cell_key(x, y)
+        self.order = np.argsort(self.key, kind="stable")
+        counts = np.bincount(self.key, minlength=rows * self.cols)
+        self.end = np.cumsum(counts)
+        self.start = self.end - counts
+
+    def cell_key(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        return ((y // self.cell).astype(np.int64) + 1) * self.cols + (x // self.cell).astype(np.int64) + 1
+
+    def _gather(self, lo: np.ndarray, hi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        counts = np.maximum(hi - lo, 0)
+        total = int(counts.sum())
+        query = np.repeat(np.arange(len(lo)), counts)
+        starts = np.repeat(lo, counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        return query, self.order[starts + offsets]
+
+    def _around(self, keys: np.ndarray, offsets) -> Tuple[np.ndarray, np.ndarray]:
+        qs, ps = [], []
+        for dx, dy in offsets:
+            key = keys + dy * self.cols + dx
+            q, p = self._gather(self.start[key], self.end[key])
+            qs.append(q)
+            ps.append(p)
+        return np.concatenate(qs), np.concatenate(ps)
+
+    def query(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(query index, point index) for every point in the 3x3 cells around each query."""
+        return self._around(self.cell_key(x, y), [(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)])
+
+    def pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Each unordered pair of points in the same or adjacent cells, once."""
+        n = len(self.key)
+        rank = np.empty(n, dtype=np.int64)
+        rank[self.order] = np.arange(n)
+        # Same cell: only points after this one in sorted order
+        i0, j0 = self._gather(rank + 1, self.end[self.key])
+        # Half of the 8 neighbours; the other half sees us from their side
+        i1, j1 = self._around(self.key, ((1, 0), (-1, 1), (0, 1), (1, 1)))
+        return np.concatenate([i0, i1]), np.concatenate([j0, j1])
+
+
+class ArenaSim:
+    """
+    Server-side port of the browser battle: 60 Hz steps over NumPy arrays.
+
+    Entities move at an HP-dependent speed, bounce off walls and off each
+    other (elastic, mass-weighted), pick up items (bulborb -1 HP, flower
+    +1 HP) and are out at 0 HP; the last team standing wins. Contacts are
+    resolved all at once per step rather than pair by pair, so a battle is
+    not a frame-exact replay of the browser's, but it is exactly
+    reproducible from its seed.
+    """
+
+    def __init__(
+        self,
+        seed: int,
+        per_team: int = ARENA_PER_TEAM,
+        width: float = ARENA_WIDTH,
+        height: float = ARENA_HEIGHT,
+        round_number: int = 0,
+    ):
+        self.rng = np.random.default_rng(seed)
+        self.round = round_number
+        self.width, self.height = float(width), float(height)
+        self.tick = 0
+        self.winner: Optional[str] = None
+        self.max_ticks = int(ARENA_MAX_SECONDS / DT)
+
+        short = min(self.width, self.height)
+        # One entity per team keeps the browser's size; crowds shrink to fit
+        self.base_r = max(12.0, float(int(short * 0.065))) / np.sqrt(per_team)
+        base_speed = max(MIN_BASE_SPEED, short * BASE_SPEED_FACTOR)
+
+        n = per_team * len(CORNERS)
+        names = list(CORNERS)
+        self.team = np.repeat([TEAMS.index(t) for t in names], per_team).astype(np.uint8)
+        corner = np.array([CORNERS[t] for t in names], dtype=np.float64).repeat(per_team, axis=0)
+        pad = self.base_r + 12
+        # Single entities start exactly in their corner; crowds spread over a
+        # corner patch a fifth of the arena across
+        spread = 0.0 if per_team == 1 else short * 0.2
+        off = self.rng.random((n, 2)) * spread
+        self.x = np.where(corner[:, 0] == 0, pad + off[:, 0], self.width - pad - off[:, 0])
+        self.y = np.where(corner[:, 1] == 0, pad + off[:, 1], self.height - pad - off[:, 1])
+
+        # Heading for the centre
+        dx, dy = self.width / 2 - self.x, self.height / 2 - self.y
+        length = np.hypot(dx, dy)
+        length[length == 0] = 1
+        self.dirx, self.diry = dx / length, dy / length
+
+        self.hp = np.full(n, MAX_HP, dtype=np.int8)
+        self.alive = np.ones(n, dtype=bool)
+        self.base_speed = base_speed
+        self._scale()
+
+        # Items
+        self.items_per_spawn = per_team
+        self.ix = np.zeros(0)
+        self.iy = np.zeros(0)
+        self.ikind = np.zeros(0, dtype=np.uint8)
+        self.iid = np.zeros(0, dtype=np.int64)
+        self._next_item = 0
+
+        # What has been streamed (see delta())
+        self._sent_hp = self.hp.copy()
+        self._sent_alive = self.alive.copy()
+        self._items_added: List[list] = []
+        self._items_removed: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.hp)
+
+    # ---- HP scaling ----
+    def _scale(self) -> None:
+        lost = MAX_HP - self.hp.astype(np.float64)
+        self.speed = self.base_speed * (1 + SPEED_DELTA * lost)
+        self.mass = np.maximum(MIN_MASS_FACTOR, 1 - MASS_DELTA * lost)
+        self.r = self.base_r * np.maximum(MIN_SIZE_FACTOR, 1 - SIZE_DELTA * lost)
+        self.vx = self.dirx * self.speed
+        self.vy = self.diry * self.speed
+
+    def item_radius(self, kind: np.ndarray) -> np.ndarray:
+        return ITEM_RADIUS_FACTOR[kind] * self.base_r
+
+    # ---- one step ----
+    def _move(self, idx: np.ndarray) -> None:
+        x, y, r = self.x[idx] + self.vx[idx] * DT, self.y[idx] + self.vy[idx] * DT, self.r[idx]
+        vx, vy = self.vx[idx], self.vy[idx]
+        vx = np.where(x - r < 0, np.abs(vx), vx)
+        vx = np.where(x + r > self.width, -np.abs(vx), vx)
+        vy = np.where(y - r < 0, np.abs(vy), vy)
+        vy = np.where(y + r > self.height, -np.abs(vy), vy)
+        self.x[idx] = np.clip(x, r, self.width - r)
+        self.y[idx] = np.clip(y, r, self.height - r)
+        self.vx[idx], self.vy[idx] = vx, vy
+
+    def _collide(self, idx: np.ndarray) -> None:
+        if len(idx) < 2:
+            return
+        x, y, r = self.x[idx], self.y[idx], self.r[idx]
+        grid = UniformGrid(x, y, 2 * float(r.max()), self.width, self.height)
+        i, j = grid.pairs()
+        dx, dy = x[j] - x[i], y[j] - y[i]
+        dist = np.hypot(dx, dy)
+        dist[dist == 0] = 1
+        overlap = r[i] + r[j] - dist
+        hit = overlap > 0
+        if not hit.any():
+            return
+        i, j, dist, overlap = i[hit], j[hit], dist[hit], overlap[hit]
+        nx, ny = dx[hit] / dist, dy[hit] / dist
+        n = len(idx)
+
+        # Separate the pair
+        shift = overlap / 2 + 0.01
+        x += np.bincount(j, nx * shift, n) - np.bincount(i, nx * shift, n)
+        y += np.bincount(j, ny * shift, n) - np.bincount(i, ny * shift, n)
+
+        # 1-D elastic exchange along the normal; tangential parts are kept
+        vx, vy, m = self.vx[idx], self.vy[idx], self.mass[idx]
+        v1n = vx[i] * nx + vy[i] * ny
+        v2n = vx[j] * nx + vy[j] * ny
+        m1, m2 = m[i], m[j]
+        dv1 = (v1n * (m1 - m2) + 2 * m2 * v2n) / (m1 + m2) - v1n
+        dv2 = (v2n * (m2 - m1) + 2 * m1 * v1n) / (m1 + m2) - v2n
+        vx = vx + np.bincount(i, dv1 * nx, n) + np.bincount(j, dv2 * nx, n)
+        vy = vy + np.bincount(i, dv1 * ny, n) + np.bincount(j, dv2 * ny, n)
+
+        # Only the heading changes: speed stays what the HP says
+        s = np.hypot(vx, vy)
+        moving = s > 0
+        self.dirx[idx] = np.where(moving, vx / np.where(moving, s, 1), self.dirx[idx])
+        self.diry[idx] = np.where(moving, vy / np.where(moving, s, 1), self.diry[idx])
+        self.x[idx], self.y[idx] = x, y
+        self.vx[idx] = self.dirx[idx] * self.speed[idx]
+        self.vy[idx] = self.diry[idx] * self.speed[idx]
+
+    def _spawn_items(self) -> None:
+        k = self.items_per_spawn
+        kind = (self.rng.random(k) >= PROB_BULBORB).astype(np.uint8)
+        r = self.item_radius(kind)
+        x = r + self.rng.random(k) * (self.width - 2 * r)
+        y = r + self.rng.random(k) * (self.height - 2 * r)
+        ids = np.arange(self._next_item, self._next_item + k)
+        self._next_item += k
+        self.ix = np.concatenate([self.ix, x])
+        self.iy = np.concatenate([self.iy, y])
+        self.ikind = np.concatenate([self.ikind, kind])
+        self.iid = np.concatenate([self.iid, ids])
+        for i, kd, xx, yy in zip(ids.tolist(), kind.tolist(), x.tolist(), y.tolist()):
+            self._items_added.append([i, kd, round(xx, 1), round(yy, 1)])
+
+    def _pickups(self, idx: np.ndarray) -> None:
+        if not len(self.ix) or not len(idx):
+            return
+        x, y, r = self.x[idx], self.y[idx], self.r[idx]
+        ir = self.item_radius(self.ikind)
+        grid = UniformGrid(x, y, float(r.max() + ir.max()), self.width, self.height)
+        item, ent = grid.query(self.ix, self.iy)
+        touch = np.hypot(x[ent] - self.ix[item], y[ent] - self.iy[item]) <= r[ent] + ir[item]
+        item, ent = item[touch], ent[touch]
+        if not len(item):
+            return
+        # Like the browser, the first entity (in index order) touching an item takes it
+        order = np.lexsort((ent, item))
+        item, ent = item[order], ent[order]
+        first = np.ones(len(item), dtype=bool)
+        first[1:] = item[1:] != item[:-1]
+        item, ent = item[first], idx[ent[first]]
+
+        delta = np.where(self.ikind[item] == FLOWER, 1, -1)
+        n = len(self)
+        hp = np.clip(self.hp + np.bincount(ent, delta, n).astype(np.int64), 0, MAX_HP)
+        # Survivors keep their heading and are nudged forward past the item
+        nudge = np.bincount(ent, np.maximum(1, ir[item] * 0.15), n)
+        self.x += self.dirx * nudge
+        self.y += self.diry * nudge
+        self.hp = hp.astype(np.int8)
+        self.alive &= self.hp > 0
+        self._scale()
+
+        keep = np.ones(len(self.ix), dtype=bool)
+        keep[item] = False
+        self._items_removed.extend(self.iid[item].tolist())
+        self.ix, self.iy = self.ix[keep], self.iy[keep]
+        self.ikind, self.iid = self.ikind[keep], self.iid[keep]
+
+    def _decide(self, hp_before: np.ndarray, alive_before: np.ndarray) -> None:
+        teams = np.unique(self.team[self.alive])
+        if len(teams) == 1:
+            self.winner = TEAMS[int(teams[0])]
+        elif len(teams) == 0:
+            # Everyone left went out on the same step: most HP going into it wins
+            self.winner = self._leader(hp_before, alive_before)
+        elif self.tick >= self.max_ticks:
+            self.winner = self._leader(self.hp, self.alive)
+
+    def _leader(self, hp: np.ndarray, alive: np.ndarray) -> str:
+        total = np.bincount(self.team[alive], hp[alive].astype(np.int64), len(TEAMS))
+        count = np.bincount(self.team[alive], minlength=len(TEAMS))
+        # Most HP, then most entities, then team order
+        best = max(range(len(TEAMS)), key=lambda t: (total[t], count[t], -t))
+        return TEAMS[best]
+
+    def step(self) -> None:
+        if self.winner is not None:
+            return
+        hp_before, alive_before = self.hp.copy(), self.alive.copy()
+        idx = np.flatnonzero(self.alive)
+        self._move(idx)
+        self._collide(idx)
+        self.tick += 1
+        if self.tick % ITEM_SPAWN_STEPS == 0:
+            self._spawn_items()
+        self._pickups(idx)
+        self._decide(hp_before, alive_before)
+
+    def advance(self, steps: int) -> int:
+        """Run up to `steps` steps, stopping early once there is a winner."""
+        done = 0
+        while done < steps and self.winner is None:
+            self.step()
+            done += 1
+        return done
+
+    # ---- streaming ----
+    def _positions(self, mask: np.ndarray) -> str:
+        q = np.empty((int(mask.sum()), 2), dtype="<u2")
+        q[:, 0] = np.round(self.x[mask] / self.width * QUANT)
+        q[:, 1] = np.round(self.y[mask] / self.height * QUANT)
+        return b64(q)
+
+    def keyframe(self) -> Dict:
+        """Everything a client needs to start rendering."""
+        self._sent_hp = self.hp.copy()
+        self._sent_alive = self.alive.copy()
+        self._items_added.clear()
+        self._items_removed.clear()
+        everyone = np.ones(len(self), dtype=bool)
+        return {
+            "round": self.round,
+            "tick": self.tick,
+            "width": self.width,
+            "height": self.height,
+            "baseR": self.base_r,
+            "teams": list(TEAMS),
+            "team": b64(self.team),
+            "hp": b64(self.hp.astype(np.uint8)),
+            "pos": self._positions(everyone),
+            "items": [
+                [i, k, round(x, 1), round(y, 1)]
+                for i, k, x, y in zip(self.iid.tolist(), self.ikind.tolist(), self.ix.tolist(), self.iy.tolist())
+            ],
+            "winner": self.winner,
+        }
+
+    def delta(self) -> Dict:
+        """
+        Changes since the last keyframe/delta: positions of the entities
+        still in (uint16 x,y pairs, index order, base64), plus only the HP
+        changes, eliminations and item spawns/pickups.
+        """
+        changed = np.flatnonzero(self.hp != self._sent_hp)
+        out = np.flatnonzero(self._sent_alive & ~self.alive)
+        frame = {
+            "round": self.round,
+            "tick": self.tick,
+            "pos": self._positions(self.alive),
+            "hp": [[int(i), int(self.hp[i])] for i in changed],
+            "out": out.tolist(),
+            "itemsAdded": list(self._items_added),
+            "itemsRemoved": list(self._items_removed),
+            "winner": self.winner,
+        }
+        self._sent_hp = self.hp.copy()
+        self._sent_alive = self.alive.copy()
+        self._items_added.clear()
+        self._items_removed.clear()
+        return frame
@@ -0,0 +1,98 @@
+# events.py
+import os
+import json
+import asyncio
+from typing import Dict, NamedTuple, Optional, Set
+
+# Per-subscriber buffer. A client that falls this many events behind is
+# considered too slow and gets disconnected instead of stalling everyone.
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "64"))
+
+# Events replayed to a new subscriber so it starts from the current state
+REPLAY_EVENTS = ("phase", "holders", "arenaKey")
+
+
+class Message(NamedTuple):
+    """One event, encoded once for every transport."""
+    event: str
+    ws: str   # WebSocket text frame: {"event": ..., "data": ...}
+    sse: str  # Server-Sent Events block
+
+
+class Subscriber:
+    def __init__(self, maxsize: int):
+        self.queue: "asyncio.Queue[Optional[Message]]" = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+
+class EventBroker:
+    """
+    Fan-out of round events to WebSocket / SSE subscribers.
+
+    Each subscriber has its own bounded queue. Publishing never blocks: if a
+    subscriber's queue is full it is dropped and its consumer sees `None`.
+    Idle subscribers just wait on their queue, so they cost nothing between
+    events.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subs: Set[Subscriber] = set()
+        self._last: Dict[str, Message] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subs)
+
+    def subscribe(self) -> Subscriber:
+        sub = Subscriber(self.queue_size)
+        for name in REPLAY_EVENTS:
+            msg = self._last.get(name)
+            if msg is not None:
+                sub.queue.put_nowait(msg)
+        self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self._subs.discard(sub)
+
+    def publish(self, event: str, data: Dict) -> None:
+        """Encode `data` once and queue it for every subscriber (thread-safe)."""
+        payload = json.dumps(data, separators=(",", ":"))
+        msg = Message(
+            event=event,
+            ws=f'{{"event":"{event}","data":{payload}}}',
+            sse=f"event: {event}\ndata: {payload}\n\n",
+        )
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if self._loop is None or running is self._loop:
+            self._fan_out(msg)
+        else:
+            self._loop.call_soon_threadsafe(self._fan_out, msg)
+
+    def _fan_out(self, msg: Message) -> None:
+        self._last[msg.event] = msg
+        for sub in list(self._subs):
+            try:
+                sub.queue.put_nowait(msg)
+            except asyncio.QueueFull:
+                self._drop(sub)
+
+    def _drop(self, sub: Subscriber) -> None:
+        self._subs.discard(sub)
+        sub.dropped = True
+        # Discard the backlog and wake the consumer with the close sentinel
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(None)
+
+
+broker = EventBroker()
@@ -0,0 +1,145 @@
+# helius.py
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .rpc_client import rpc
+
+# ----------------------------
+# Config
+# ----------------------------
+# Helius caps getTokenAccounts pages at 1000 accounts
+PAGE_LIMIT = int(os.getenv("HELIUS_PAGE_LIMIT", "1000"))
+# Pages kept in flight at once
+PAGE_CONCURRENCY = int(os.getenv("HELIUS_PAGE_CONCURRENCY", "8"))
+PAGE_TIMEOUT = float(os.getenv("HELIUS_PAGE_TIMEOUT", "10"))
+PAGE_RETRIES = 2
+
+
+class SnapshotProgress:
+    """Counters updated as pages arrive; read by callbacks / diagnostics."""
+
+    def __init__(self):
+        self.pages = 0
+        self.accounts = 0
+        self.owners = 0
+        self.started = time.monotonic()
+        self.done = False
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def as_dict(self) -> Dict:
+        return {
+            "pages": self.pages,
+            "accounts": self.accounts,
+            "owners": self.owners,
+            "elapsedSeconds": round(self.elapsed, 3),
+            "done": self.done,
+        }
+
+
+# Progress of the most recent (or in-flight) paged snapshot
+last_progress = SnapshotProgress()
+
+
+def fetch_page(url: str, mint: str, page: int, limit: int = PAGE_LIMIT) -> List[Dict]:
+    """One getTokenAccounts page; transport errors / 429 / 5xx are retried."""
+    params = {
+        "mint": mint,
+        "page": page,
+        "limit": limit,
+        "options": {"showZeroBalance": False},
+    }
+    try:
+        result = rpc.call("getTokenAccounts", params, url=url, timeout=PAGE_TIMEOUT, retries=PAGE_RETRIES)
+    except Exception as e:
+        raise RuntimeError(f"getTokenAccounts page {page} failed: {e}")
+    return (result or {}).get("token_accounts") or []
+
+
+def fetch_token_account_owners(
+    url: str,
+    mint: str,
+    concurrency: int = PAGE_CONCURRENCY,
+    limit: int = PAGE_LIMIT,
+    deadline: Optional[float] = None,
+    on_progress: Optional[Callable[[SnapshotProgress], None]] = None,
+    amounts: Optional[List[int]] = None,
+) -> List[str]:
+    """
+    Unique owners with a balance for `mint`, via Helius getTokenAccounts.
+
+    Keeps up to `concurrency` pages in flight: each full page schedules the
+    next unseen page number, and the first short page marks the end. Owners
+    are counted into the dedupe set as pages land; the returned list is in
+    page order so team assignment stays deterministic. If `amounts` is
+    given, each owner's total raw balance is appended to it in the same order.
+
+    Raises on a failed page or when `deadline` seconds have elapsed.
+    """
+    global last_progress
+    progress = last_progress = SnapshotProgress()
+    pages: Dict[int, List[Tuple[str, int]]] = {}
+    seen = set()
+    last_page: Optional[int] = None
+    next_page = 1
+    inflight: Dict[Future, int] = {}
+
+    # Not a `with` block: on timeout we must not wait for stragglers.
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="helius-page")
+
+    def submit():
+        nonlocal next_page
+        fut = pool.submit(fetch_page, url, mint, next_page, limit)
+        inflight[fut] = next_page
+        next_page += 1
+
+    for _ in range(concurrency):
+        submit()
+
+    try:
+        while inflight:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - progress.elapsed
+                if remaining <= 0:
+                    raise TimeoutError(f"snapshot exceeded {deadline}s after {progress.pages} pages")
+            done, _ = wait(list(inflight), timeout=remaining, return_when=FIRST_COMPLETED)
+            for fut in done:
+                page = inflight.pop(fut)
+                accounts = fut.result()
+                holdings = [(a["owner"], int(a.get("amount") or 0)) for a in accounts if a.get("owner")]
+                pages[page] = [(o, amt) for o, amt in holdings if amt > 0]
+                seen.update(o for o, _ in pages[page])
+
+                progress.pages += 1
+                progress.accounts += len(accounts)
+                progress.owners = len(seen)
+                if on_progress:
+                    on_progress(progress)
+
+                if len(accounts) < limit:
+                    last_page = page if last_page is None else min(last_page, page)
+                elif last_page is None:
+                    submit()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    # owner -> total balance; dicts keep first-seen (page) order
+    totals: Dict[str, int] = {}
+    for page in sorted(pages):
+        if last_page is not None and page > last_page:
+            break
+        for owner, amt in pages[page]:
+            totals[owner] = totals.get(owner, 0) + amt
+    out = list(totals)
+    if amounts is not None:
+        amounts.extend(totals.values())
+
+    progress.done = True
+    if on_progress:
+        on_progress(progress)
+    return out
@@ -0,0 +1,265 @@
+# holder_index.py
+import os
+import json
+import time
+import base64
+import asyncio
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from solders.pubkey import Pubkey
+
+from .state_store import (
+    DEFAULT_RPC,
+    HELIUS_API_KEY,
+    OWNER_OFFSET,
+    AMOUNT_OFFSET,
+    TOKEN_ACCOUNT_SIZE,
+    TOKEN_MINT,
+    TOKEN_PROGRAM_ID,
+    fetch_token_accounts,
+)
+
+# ----------------------------
+# Config
+# ----------------------------
+# "subscribe": seed once, then follow programSubscribe deltas
+# "poll":      re-snapshot every HOLDER_INDEX_DIFF_INTERVAL and apply the diff
+# "off":       no index; the round loop snapshots over RPC as before
+HOLDER_INDEX_MODE = os.getenv("HOLDER_INDEX_MODE", "subscribe" if HELIUS_API_KEY else "off").strip()
+HOLDER_INDEX_DIFF_INTERVAL = float(os.getenv("HOLDER_INDEX_DIFF_INTERVAL", "60"))
+# An index that has not heard anything for this long is not trusted
+HOLDER_INDEX_MAX_AGE = float(os.getenv("HOLDER_INDEX_MAX_AGE", "120"))
+SOLANA_WS_URL = os.getenv("SOLANA_WS_URL", "").strip()
+
+
+def ws_url_for(http_url: str) -> str:
+    if http_url.startswith("https://"):
+        return "wss://" + http_url[len("https://"):]
+    if http_url.startswith("http://"):
+        return "ws://" + http_url[len("http://"):]
+    return http_url
+
+
+class HolderIndex:
+    """
+    Live owner -> balance map for one mint, maintained from token-account
+    deltas. Seeded from a full snapshot; `apply` folds in single account
+    updates and owners whose balance drops to zero are removed.
+    """
+
+    def __init__(self, token_mint: str):
+        self.token_mint = token_mint
+        self._lock = threading.Lock()
+        self._accounts: Dict[str, Tuple[str, int]] = {}  # token account -> (owner, amount)
+        self._balances: Dict[str, int] = {}              # owner -> total amount (> 0 only)
+        self.slot = 0
+        self.seeded = False
+        self.updated_at = 0.0
+        self.deltas_applied = 0
+
+    def _set(self, account: str, owner: str, amount: int) -> None:
+        prev = self._accounts.get(account)
+        if prev is not None:
+            p_owner, p_amount = prev
+            left = self._balances.get(p_owner, 0) - p_amount
+            if left > 0:
+                self._balances[p_owner] = left
+            else:
+                self._balances.pop(p_owner, None)
+        if amount > 0:
+            self._accounts[account] = (owner, amount)
+            self._balances[owner] = self._balances.get(owner, 0) + amount
+        else:
+            self._accounts.pop(account, None)
+
+    def seed(self, accounts: Iterable[Tuple[str, str, int]], slot: int = 0) -> None:
+        """Reset from a full snapshot of (account, owner, amount)."""
+        accs: Dict[str, Tuple[str, int]] = {}
+        balances: Dict[str, int] = {}
+        for account, owner, amount in accounts:
+            if amount > 0:
+                accs[account] = (owner, amount)
+                balances[owner] = balances.get(owner, 0) + amount
+        with self._lock:
+            self._accounts, self._balances = accs, balances
+            self.slot = slot
+            self.seeded = True
+            self.updated_at = time.monotonic()
+
+    def diff(self, accounts: Iterable[Tuple[str, str, int]], slot: int = 0) -> int:
+        """Apply a fresh full snapshot as deltas; returns accounts changed."""
+        fresh = {a: (o, amt) for a, o, amt in accounts if amt > 0}
+        changed = 0
+        with self._lock:
+            for account in [a for a in self._accounts if a not in fresh]:
+                self._set(account, "", 0)
+                changed += 1
+            for account, (owner, amount) in fresh.items():
+                if self._accounts.get(account) != (owner, amount):
+                    self._set(account, owner, amount)
+                    changed += 1
+            self.slot = max(self.slot, slot)
+            self.seeded = True
+            self.updated_at = time.monotonic()
+        return changed
+
+    def apply(self, account: str, owner: str, amount: int, slot: int = 0) -> None:
+        with self._lock:
+            if slot and slot < self.slot:
+                return  # older than what we already have
+            self._set(account, owner, amount)
+            self.slot = max(self.slot, slot)
+            self.updated_at = time.monotonic()
+            self.deltas_applied += 1
+
+    @property
+    def ready(self) -> bool:
+        return self.seeded and (time.monotonic() - self.updated_at) < HOLDER_INDEX_MAX_AGE
+
+    def owners(self) -> List[str]:
+        """Point-in-time copy of owners with a balance."""
+        with self._lock:
+            return list(self._balances)
+
+    def balances(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._balances)
+
+    def __len__(self) -> int:
+        return len(self._balances)
+
+
+def decode_account_notification(msg: Dict) -> Optional[Tuple[str, str, int, int]]:
+    """(account, owner, amount, slot) from a programNotification, else None."""
+    if msg.get("method") != "programNotification":
+        return None
+    result = msg.get("params", {}).get("result", {})
+    slot = int(result.get("context", {}).get("slot", 0))
+    value = result.get("value", {})
+    account = value.get("pubkey")
+    if not account:
+        return None
+    raw = b""
+    data = value.get("account", {}).get("data")
+    if isinstance(data, list) and data:
+        try:
+            raw = base64.b64decode(data[0])
+        except Exception:
+            raw = b""
+    if len(raw) < AMOUNT_OFFSET + 8:
+        return account, "", 0, slot  # closed / reallocated account
+    owner = str(Pubkey.from_bytes(raw[OWNER_OFFSET:OWNER_OFFSET + 32]))
+    amount = int.from_bytes(raw[AMOUNT_OFFSET:AMOUNT_OFFSET + 8], "little")
+    return account, owner, amount, slot
+
+
+class HolderIndexSync:
+    """Background task keeping a HolderIndex current (see HOLDER_INDEX_MODE)."""
+
+    def __init__(
+        self,
+        index: HolderIndex,
+        mode: str = HOLDER_INDEX_MODE,
+        rpc_url: Optional[str] = None,
+        ws_url: Optional[str] = None,
+    ):
+        self.index = index
+        self.mode = mode
+        self.rpc_url = rpc_url or DEFAULT_RPC
+        self.ws_url = ws_url or SOLANA_WS_URL or ws_url_for(self.rpc_url)
+        self.connected = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("subscribe", "poll")
+
+    async def _full_snapshot(self) -> Tuple[int, List[Tuple[str, str, int]]]:
+        return await asyncio.to_thread(fetch_token_accounts, self.index.token_mint, self.rpc_url)
+
+    async def _resync(self) -> None:
+        slot, accounts = await self._full_snapshot()
+        if self.index.seeded:
+            changed = self.index.diff(accounts, slot)
+            print(f"Holder index resynced at slot {slot}: {changed} accounts changed")
+        else:
+            self.index.seed(accounts, slot)
+            print(f"Holder index seeded at slot {slot}: {len(self.index)} owners")
+
+    def _subscribe_request(self) -> str:
+        return json.dumps({
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "programSubscribe",
+            "params": [
+                TOKEN_PROGRAM_ID,
+                {
+                    "encoding": "base64",
+                    "commitment": "confirmed",
+                    "filters": [
+                        {"dataSize": TOKEN_ACCOUNT_SIZE},
+                        {"memcmp": {"offset": 0, "bytes": self.index.token_mint}},
+                    ],
+                },
+            ],
+        })
+
+    async def _follow(self) -> None:
+        import websockets  # installed with uvicorn[standard]
+
+        async with websockets.connect(self.ws_url, ping_interval=20, max_size=None) as ws:
+            await ws.send(self._subscribe_request())
+            # Deltas that arrive while seeding are buffered and replayed;
+            # apply() ignores any that are older than the seed slot.
+            buffered: List[Tuple[str, str, int, int]] = []
+            resync = asyncio.ensure_future(self._resync())
+            last_resync = time.monotonic()
+            self.connected = True
+            try:
+                while True:
+                    try:
+                        raw = await asyncio.wait_for(ws.recv(), timeout=1.0)
+                    except asyncio.TimeoutError:
+                        raw = None
+                    if raw is not None:
+                        delta = decode_account_notification(json.loads(raw))
+                        if delta is not None:
+                            if resync is not None:
+                                buffered.append(delta)
+                            else:
+                                self.index.apply(*delta)
+                    if resync is not None and resync.done():
+                        resync.result()
+                        resync = None
+                        for delta in buffered:
+                            self.index.apply(*delta)
+                        buffered.clear()
+                    # Periodic full diff catches anything the stream missed
+                    if resync is None and time.monotonic() - last_resync > HOLDER_INDEX_DIFF_INTERVAL:
+                        resync = asyncio.ensure_future(self._resync())
+                        last_resync = time.monotonic()
+            finally:
+                self.connected = False
+                if resync is not None:
+                    resync.cancel()
+
+    async def run(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                if self.mode == "subscribe":
+                    await self._follow()
+                else:
+                    await self._resync()
+                    await asyncio.sleep(HOLDER_INDEX_DIFF_INTERVAL)
+                backoff = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Holder index sync error: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+
+holder_index = HolderIndex(TOKEN_MINT)
+holder_index_sync = HolderIndexSync(holder_index)
@@ -0,0 +1,173 @@
+# holder_search.py
+import os
+import threading
+import weakref
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .holder_table import HolderTable, key_to_address
+
+# ----------------------------
+# Config
+# ----------------------------
+# Matches considered per query; deeper pages of very broad queries are cut off
+MAX_SEARCH_MATCHES = int(os.getenv("MAX_SEARCH_MATCHES", "10000"))
+
+# Stop intersecting trigram postings once this few candidates remain
+VERIFY_DIRECTLY = 256
+
+ADDR_WIDTH = 44  # longest base58 pubkey
+NGRAM = 3
+_RADIX = 38      # symbols per character (see _CHAR_MAP)
+_CODES = _RADIX ** NGRAM  # < 2**16, so codes sort with a single radix pass
+
+# Lower-cased base58 characters -> 1..36; anything else 37; padding (NUL) 0
+_CHAR_MAP = np.full(256, 37, dtype=np.uint32)
+_CHAR_MAP[0] = 0
+for _i, _c in enumerate(b"0123456789abcdefghijklmnopqrstuvwxyz"):
+    _CHAR_MAP[_c] = _i + 1
+
+
+def _trigram_codes(mapped: np.ndarray) -> np.ndarray:
+    """(…, L) mapped chars -> (…, L-2) uint16 trigram codes."""
+    codes = (mapped[..., :-2] * _RADIX + mapped[..., 1:-1]) * _RADIX + mapped[..., 2:]
+    return codes.astype(np.uint16)
+
+
+class HolderSearchIndex:
+    """
+    Case-insensitive address search over one HolderTable.
+
+      prefix     lower-cased addresses sorted once; a query is two binary
+                 searches and the hits are a contiguous slice
+      substring  trigram inverted index in CSR form (offsets + posting rows);
+                 candidates are the intersection of the query's trigram
+                 postings, then verified against the addresses
+
+    Built once per holder snapshot; queries only touch the matching rows.
+    """
+
+    def __init__(self, table: HolderTable):
+        n = len(table)
+        self.size = n
+        addrs = np.array([key_to_address(table.key(i)) for i in range(n)], dtype=f"S{ADDR_WIDTH}")
+        self.lower = np.char.lower(addrs) if n else addrs
+
+        # prefix: sorted lower-cased addresses
+        self.sorted_rows = np.argsort(self.lower, kind="stable")
+        self.sorted_lower = self.lower[self.sorted_rows]
+
+        # substring: trigram postings
+        mapped = _CHAR_MAP[self.lower.view(np.uint8).reshape(n, ADDR_WIDTH)] if n else np.zeros((0, ADDR_WIDTH), np.uint32)
+        codes = _trigram_codes(mapped)
+        valid = mapped[:, NGRAM - 1:] != 0
+        flat_codes = codes[valid]
+        flat_rows = np.broadcast_to(np.arange(n, dtype=np.uint32)[:, None], codes.shape)[valid]
+        order = np.argsort(flat_codes, kind="stable")  # radix sort; rows stay ascending per code
+        self.postings = flat_rows[order]
+        counts = np.bincount(flat_codes, minlength=_CODES)
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    def _prefix_rows(self, q: bytes) -> np.ndarray:
+        if len(q) > ADDR_WIDTH:
+            return self.sorted_rows[:0]
+        # keep the needles in the array's dtype so numpy does not widen (copy) it
+        dtype = self.sorted_lower.dtype
+        lo = np.searchsorted(self.sorted_lower, np.array(q, dtype=dtype), side="left")
+        if len(q) < ADDR_WIDTH:
+            hi = np.searchsorted(self.sorted_lower, np.array(q + b"\xff", dtype=dtype), side="left")
+        else:
+            hi = np.searchsorted(self.sorted_lower, np.array(q, dtype=dtype), side="right")
+        return self.sorted_rows[lo:min(hi, lo + MAX_SEARCH_MATCHES)]
+
+    def _substring_rows(self, q: bytes) -> np.ndarray:
+        if len(q) < NGRAM:
+            return np.zeros(0, dtype=np.uint32)
+        mapped = _CHAR_MAP[np.frombuffer(q, dtype=np.uint8)]
+        grams = np.unique(_trigram_codes(mapped))
+        lists = sorted(
+            (self.postings[self.offsets[g]:self.offsets[g + 1]] for g in grams),
+            key=len,
+        )
+        candidates = np.unique(lists[0])
+        for posting in lists[1:]:
+            # Few enough left: verifying directly is cheaper than more intersections
+            if len(candidates) <= VERIFY_DIRECTLY:
+                break
+            # postings are sorted by row, so membership is a binary search
+            pos = np.minimum(np.searchsorted(posting, candidates), len(posting) - 1)
+            candidates = candidates[posting[pos] == candidates]
+        if not len(candidates):
+            return candidates
+        # trigram hits can be scattered; keep only true substrings
+        hit = np.char.find(self.lower[candidates], q) >= 0
+        return candidates[hit][:MAX_SEARCH_MATCHES]
+
+    def search(self, query: str) -> np.ndarray:
+        """Matching rows: prefix matches (sorted) first, then other substring matches."""
+        # Control characters never occur in an address; NULs in particular
+        # would be stripped by the S dtype and leave an empty, match-all needle
+        q = "".join(c for c in query if c.isprintable()).strip().lower().encode()
+        if not q or not self.size:
+            return np.zeros(0, dtype=np.int64)
+        prefix = self._prefix_rows(q).astype(np.int64)
+        substring = self._substring_rows(q).astype(np.int64)
+        if len(substring):
+            substring = substring[~np.isin(substring, prefix)]
+        return np.concatenate((prefix, substring))[:MAX_SEARCH_MATCHES]
+
+
+_indexes: "weakref.WeakKeyDictionary[HolderTable, HolderSearchIndex]" = weakref.WeakKeyDictionary()
+# One lock per table being indexed, so a build never blocks other tables
+_builds: "weakref.WeakKeyDictionary[HolderTable, threading.Lock]" = weakref.WeakKeyDictionary()
+# The most recently built (table, index); served while a newer table's builds
+_latest: Optional[Tuple[HolderTable, HolderSearchIndex]] = None
+_lock = threading.Lock()  # guards the maps above; never held while building
+
+
+def search_index(table: HolderTable) -> HolderSearchIndex:
+    """The search index for `table`, built on first use and kept with it."""
+    global _latest
+    with _lock:
+        index = _indexes.get(table)
+        if index is not None:
+            return index
+        build = _builds.setdefault(table, threading.Lock())
+    with build:
+        with _lock:
+            index = _indexes.get(table)
+        if index is None:
+            index = HolderSearchIndex(table)
+            with _lock:
+                _indexes[table] = index
+                _latest = (table, index)
+    return index
+
+
+def ready_index(table: HolderTable) -> Tuple[HolderTable, HolderSearchIndex]:
+    """
+    `table`'s index if it is built. Otherwise, while it builds, the previous
+    table and its index, so searches keep answering from the last snapshot;
+    only the very first build is waited for.
+    """
+    with _lock:
+        index = _indexes.get(table)
+        if index is not None:
+            return table, index
+        latest, building = _latest, table in _builds
+    if latest is None:
+        return table, search_index(table)
+    if not building:
+        threading.Thread(target=search_index, args=(table,), name="holder-search-index", daemon=True).start()
+    return latest
+
+
+def search_holders(table: HolderTable, query: str, start: int = 0, limit: int = 50) -> Tuple[int, List[dict], Optional[int]]:
+    """(total matches, page of items, next cursor or None)."""
+    table, index = ready_index(table)
+    rows = index.search(query)
+    page = rows[start:start + limit]
+    items = [{"address": table.address(int(r)), "team": table.team(int(r))} for r in page]
+    end = start + len(page)
+    return len(rows), items, (end if end < len(rows) else None)
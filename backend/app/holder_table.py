@@ -0,0 +1,183 @@
+# holder_table.py
+import struct
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from solders.pubkey import Pubkey
+
+TEAMS = ["red", "purple", "blue", "yellow"]
+TEAM_CODES = {t: i for i, t in enumerate(TEAMS)}
+
+# Sidecar layout: magic | count u32 | count * 32-byte keys | count * team u8
+# [| count * amount u64, PKHOLD2 only]
+MAGIC = b"PKHOLD1\0"
+MAGIC_AMOUNTS = b"PKHOLD2\0"
+HEADER = struct.Struct("<8sI")
+AMOUNT_DTYPE = np.dtype("<u8")
+
+
+def address_to_key(address: str) -> Optional[bytes]:
+    try:
+        return bytes(Pubkey.from_string(address))
+    except Exception:
+        return None
+
+
+def key_to_address(key: bytes) -> str:
+    return str(Pubkey.from_bytes(key))
+
+
+class HolderTable:
+    """
+    Immutable, column-oriented holder set.
+
+      keys     one contiguous buffer of 32-byte owner pubkeys (row i at i*32)
+      teams    uint8 team code per row (index into TEAMS)
+      amounts  raw token balance per row (u64), when the snapshot had them
+
+    Addresses are only base58-encoded at the edges (API pages, payouts).
+    Lookups go through a compact hash index: rows sorted by the first 8
+    key bytes (pubkeys are uniformly random, so that prefix is already a
+    good hash) and found with a binary search, then checked against the
+    full key.
+    """
+
+    def __init__(self, keys: bytes, teams: np.ndarray, amounts: Optional[np.ndarray] = None):
+        if len(keys) != 32 * len(teams):
+            raise ValueError("keys / teams length mismatch")
+        if amounts is not None and len(amounts) != len(teams):
+            raise ValueError("amounts / teams length mismatch")
+        self.keys = bytes(keys)
+        self.teams = np.ascontiguousarray(teams, dtype=np.uint8)
+        self.teams.setflags(write=False)
+        self.amounts: Optional[np.ndarray] = None
+        if amounts is not None:
+            self.amounts = np.ascontiguousarray(amounts, dtype=AMOUNT_DTYPE)
+            self.amounts.setflags(write=False)
+        self._index: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._index_lock = threading.Lock()
+
+    # ---- construction ----
+    @classmethod
+    def empty(cls) -> "HolderTable":
+        return cls(b"", np.zeros(0, dtype=np.uint8))
+
+    @classmethod
+    def from_addresses(
+        cls, addresses: Sequence[str], teams: Sequence[int], amounts: Optional[Sequence[int]] = None
+    ) -> "HolderTable":
+        """Rows whose address is not a valid pubkey are skipped."""
+        keys = bytearray()
+        codes = []
+        kept = []
+        for i, (addr, team) in enumerate(zip(addresses, teams)):
+            key = address_to_key(addr)
+            if key is not None:
+                keys += key
+                codes.append(team)
+                kept.append(i)
+        if amounts is not None:
+            amounts = np.asarray(amounts, dtype=AMOUNT_DTYPE)[kept]
+        return cls(bytes(keys), np.array(codes, dtype=np.uint8), amounts)
+
+    @classmethod
+    def from_items(cls, items: Iterable[Dict]) -> "HolderTable":
+        """From the legacy list of {"address", "team"} dicts."""
+        items = list(items)
+        return cls.from_addresses(
+            [h["address"] for h in items],
+            [TEAM_CODES.get(h.get("team"), 0) for h in items],
+        )
+
+    # ---- serialization ----
+    def to_bytes(self) -> bytes:
+        if self.amounts is None:
+            return HEADER.pack(MAGIC, len(self)) + self.keys + self.teams.tobytes()
+        return HEADER.pack(MAGIC_AMOUNTS, len(self)) + self.keys + self.teams.tobytes() + self.amounts.tobytes()
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "HolderTable":
+        magic, count = HEADER.unpack_from(raw)
+        row = {MAGIC: 33, MAGIC_AMOUNTS: 41}.get(magic)
+        if row is None or len(raw) != HEADER.size + row * count:
+            raise ValueError("corrupt holder table")
+        start = HEADER.size
+        keys = raw[start:start + 32 * count]
+        teams = np.frombuffer(raw, dtype=np.uint8, count=count, offset=start + 32 * count)
+        amounts = None
+        if magic == MAGIC_AMOUNTS:
+            amounts = np.frombuffer(raw, dtype=AMOUNT_DTYPE, count=count, offset=start + 33 * count)
+        return cls(keys, teams, amounts)
+
+    # ---- access ----
+    def __len__(self) -> int:
+        return len(self.teams)
+
+    def key(self, row: int) -> bytes:
+        return self.keys[row * 32:(row + 1) * 32]
+
+    def address(self, row: int) -> str:
+        return key_to_address(self.key(row))
+
+    def team(self, row: int) -> str:
+        return TEAMS[self.teams[row]]
+
+    def items(self, start: int = 0, end: Optional[int] = None) -> List[Dict]:
+        """Rows [start:end) in the HoldersResponse item shape."""
+        end = len(self) if end is None else min(end, len(self))
+        return [{"address": self.address(i), "team": TEAMS[int(t)]}
+                for i, t in zip(range(start, end), self.teams[start:end])]
+
+    def rows_for_team(self, team: str) -> np.ndarray:
+        return np.flatnonzero(self.teams == TEAM_CODES[team])
+
+    def addresses_for_team(self, team: str) -> List[str]:
+        return [self.address(int(i)) for i in self.rows_for_team(team)]
+
+    def amounts_for_team(self, team: str) -> Optional[np.ndarray]:
+        """Token balances in addresses_for_team() order, or None without amounts."""
+        return None if self.amounts is None else self.amounts[self.rows_for_team(team)]
+
+    def team_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.teams, minlength=len(TEAMS))
+        return {t: int(counts[i]) for i, t in enumerate(TEAMS)}
+
+    # ---- lookup ----
+    def _prefixes(self) -> np.ndarray:
+        return np.frombuffer(self.keys, dtype=">u8").reshape(-1, 4)[:, 0] if self.keys else np.zeros(0, dtype=">u8")
+
+    def build_index(self) -> None:
+        with self._index_lock:
+            if self._index is None:
+                prefixes = self._prefixes().astype(np.uint64)
+                order = np.argsort(prefixes, kind="stable")
+                self._index = (prefixes[order], order)
+
+    def row_of(self, address: str) -> Optional[int]:
+        key = address_to_key(address)
+        if key is None or not len(self):
+            return None
+        if self._index is None:
+            self.build_index()
+        sorted_prefixes, order = self._index
+        prefix = np.uint64(int.from_bytes(key[:8], "big"))
+        i = int(np.searchsorted(sorted_prefixes, prefix, side="left"))
+        while i < len(order) and sorted_prefixes[i] == prefix:
+            row = int(order[i])
+            if self.key(row) == key:
+                return row
+            i += 1
+        return None
+
+    def lookup(self, address: str) -> Optional[str]:
+        row = self.row_of(address)
+        return None if row is None else self.team(row)
+
+    def nbytes(self) -> int:
+        n = len(self.keys) + self.teams.nbytes
+        if self.amounts is not None:
+            n += self.amounts.nbytes
+        if self._index is not None:
+            n += self._index[0].nbytes + self._index[1].nbytes
+        return n
@@ -0,0 +1,95 @@
+# leader.py
+import os
+import json
+import time
+import pathlib
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so a single worker is assumed
+    fcntl = None
+
+# ----------------------------
+# Config
+# ----------------------------
+LEADER_LOCK_PATH = pathlib.Path(os.getenv("LEADER_LOCK_PATH", "state_store.leader.lock"))
+# How often the leader rewrites its heartbeat and followers retry the lock
+LEADER_HEARTBEAT_SECONDS = float(os.getenv("LEADER_HEARTBEAT_SECONDS", "1"))
+# A heartbeat older than this is reported as stale (leader hung, not dead:
+# a dead leader's flock is released by the kernel)
+LEADER_STALE_SECONDS = float(os.getenv("LEADER_STALE_SECONDS", "10"))
+
+
+class LeaderElection:
+    """
+    One round-loop leader among the workers sharing a state directory.
+
+    The leader holds an exclusive, non-blocking flock on LEADER_LOCK_PATH
+    for its lifetime and rewrites the file with {pid, heartbeat} every
+    LEADER_HEARTBEAT_SECONDS. The kernel drops the lock when the process
+    exits, so a follower's next try_acquire() takes over.
+    """
+
+    def __init__(self, path: pathlib.Path = LEADER_LOCK_PATH):
+        self.path = path
+        self._fd: Optional[int] = None
+        self.elected_at: Optional[float] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            self._fd = -1
+        else:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            self._fd = fd
+        self.elected_at = time.time()
+        self.heartbeat()
+        return True
+
+    def heartbeat(self) -> None:
+        if self._fd is None or self._fd < 0:
+            return
+        payload = json.dumps({"pid": os.getpid(), "electedAt": self.elected_at, "heartbeat": time.time()}).encode()
+        try:
+            os.ftruncate(self._fd, 0)
+            os.pwrite(self._fd, payload, 0)
+        except OSError as e:
+            print(f"Leader heartbeat failed: {e}")
+
+    def release(self) -> None:
+        if self._fd is not None and self._fd >= 0:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            finally:
+                os.close(self._fd)
+        self._fd = None
+
+    def status(self) -> Dict:
+        """This worker's role plus the current leader's last heartbeat."""
+        info: Dict = {}
+        try:
+            info = json.loads(self.path.read_text() or "{}")
+        except Exception:
+            pass
+        beat = info.get("heartbeat")
+        return {
+            "pid": os.getpid(),
+            "leader": self.is_leader,
+            "leaderPid": info.get("pid"),
+            "heartbeatAgeSeconds": round(time.time() - beat, 3) if beat else None,
+            "stale": bool(beat) and time.time() - beat > LEADER_STALE_SECONDS,
+        }
+
+
+election = LeaderElection()
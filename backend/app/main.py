@@ -1,28 +1,70 @@
 import os
+import time
+import hmac
 import asyncio
+import threading
+import hashlib
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
-from .models import Holder, HoldersResponse, HistoryItem, RoundState, WinnerPayload
+from .holder_table import HolderTable
+from .holder_search import search_holders
+from .models import Holder, HoldersResponse, HolderSearchResponse, HistoryItem, RoundHolder, RoundState, WinnerPayload
 from .state_store import (
+    STATE_LOCK,
     load_state,
     save_state,
+    flush_state,
     set_break,
     enter_pre_snapshot,
     start_running,
     record_winner,
     set_holders,
+    holder_table,
     fetch_and_assign_teams,
+    data_version,
+    history_page,
+    set_read_only,
+    sync_from_disk,
+    enqueue_winner,
+    drain_winner_inbox,
+)
+from .events import broker
+from .leader import LEADER_HEARTBEAT_SECONDS, election
+from .holder_index import holder_index, holder_index_sync
+from .orchestrator import PAYOUT_TIMEOUT, orchestrator
+from .snapshot_cache import snapshot_cache
+from .round_archive import ROUND_ARCHIVE, round_archive
+from .scheduler import wakeup
+from .tracing import span
+from .winner_gate import winner_gate
+from .profiler import PROFILE_DEFAULT_INTERVAL, ProfilerBusy, profiler
+from .metrics import (
+    EVENT_SUBSCRIBERS, PHASE_DURATION, ROUND_NUMBER, ROUND_PHASE, TRANSITION_LAG, WINNER_REPORTS, MetricsMiddleware,
+    registry,
+)
+from .arena import ARENA_KEYFRAME_SECONDS, ARENA_STEPS_PER_FRAME, DT, SERVER_ARENA, ArenaSim, round_seed
+from . import helius
+from .rpc_client import rpc
+from .response_cache import (
+    CachedBody, check_not_modified, cached_response, response_cache,
 )
 from .services.distribute_prize import distribute_prize_from_state
 
 # ------------ Config ------------
 BREAK_SECONDS = int(os.getenv("BREAK_SECONDS", "30"))
 PRE_SNAPSHOT_LEEWAY = 5
+# A snapshot that is not back by T-0 is abandoned; the round keeps the previous holders
+SNAPSHOT_TIMEOUT = float(os.getenv("SNAPSHOT_TIMEOUT", str(PRE_SNAPSHOT_LEEWAY)))
 TOKEN_MINT = os.getenv("TOKEN_MINT", "So11111111111111111111111111111111111111112")
+# Pages built ahead of the first request whenever holders / history change
+# (the frontend's home and holders views; None = everything)
+WARM_HOLDERS_LIMITS = (20, 100, None)
+WARM_HISTORY_LIMITS = (50, None)
 
 ALLOWED_ORIGINS = os.getenv(
     "FRONTEND_ORIGINS",
@@ -31,6 +73,19 @@ ALLOWED_ORIGINS = os.getenv(
 
 TEAMS = ["red", "purple", "blue", "yellow"]
 
+# Comment line sent on idle SSE streams so proxies keep them open
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+# Bearer token for the /admin endpoints; unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "").strip()
+
+# Upper bound for `limit` on paginated endpoints
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+
+# How often follower workers check for state written by the leader (and the
+# leader checks the winner inbox)
+STATE_SYNC_INTERVAL = float(os.getenv("STATE_SYNC_INTERVAL", "0.25"))
+
 app = FastAPI(title="Pikmin Battles API")
 
 app.add_middleware(
@@ -38,7 +93,10 @@ app.add_middleware(
     allow_origins=[o.strip() for o in ALLOWED_ORIGINS],
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
+# Outermost, so CORS preflights are timed too
+app.add_middleware(MetricsMiddleware)
 
 # ------------ Utils ------------
 def now_utc():
@@ -54,6 +112,151 @@ def parse_iso(s: str) -> datetime:
         dt = dt.replace(tzinfo=timezone.utc)
     return dt.astimezone(timezone.utc)
 
+def make_etag(*parts) -> str:
+    """Strong ETag over the given version parts."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+def parse_cursor(cursor: Optional[str]) -> Optional[int]:
+    if cursor is None or cursor == "":
+        return None
+    try:
+        value = int(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    if value < 0:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    return value
+
+def require_admin(authorization: Optional[str]):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="admin token required", headers={"WWW-Authenticate": "Bearer"})
+
+def seconds_left(state: dict) -> Optional[int]:
+    if state.get("phase") in ("BREAK", "PRE_SNAPSHOT") and state.get("breakEndsAt"):
+        return max(0, int((parse_iso(state["breakEndsAt"]) - now_utc()).total_seconds()))
+    return None
+
+# ------------ Push events ------------
+PHASES = ("BREAK", "PRE_SNAPSHOT", "RUNNING", "ENDED")
+# (roundNumber, phase, monotonic start); no start for the phase we booted into
+_current_phase = (None, None, None)
+
+def observe_phase(state: dict):
+    """Phase gauges, and the duration of the phase that just ended."""
+    global _current_phase
+    key = (state.get("roundNumber"), state.get("phase"))
+    if key == _current_phase[:2]:
+        return
+    now = time.monotonic()
+    if _current_phase[2] is not None:
+        PHASE_DURATION.observe(now - _current_phase[2], phase=_current_phase[1])
+    _current_phase = (*key, now if _current_phase[1] is not None else None)
+    ROUND_NUMBER.set(int(key[0] or 0))
+    for phase in PHASES:
+        ROUND_PHASE.set(1 if phase == key[1] else 0, phase=phase)
+
+def publish_phase(state: dict):
+    observe_phase(state)
+    broker.publish("phase", {
+        "roundNumber": state.get("roundNumber"),
+        "phase": state.get("phase"),
+        "breakEndsAt": state.get("breakEndsAt"),
+        "prizePoolLamports": state.get("prizePoolLamports", 0),
+        "winner": state.get("winner"),
+        "secondsLeft": seconds_left(state),
+    })
+
+def publish_holders(holders: dict):
+    # Only the summary is pushed; clients page through /holders themselves.
+    broker.publish("holders", {
+        "total": holders.get("total", 0),
+        "tokenAddress": holders.get("tokenAddress"),
+        "lastUpdatedISO": holders.get("lastUpdatedISO"),
+    })
+    warm_responses("holders")
+
+def publish_winner(data: dict):
+    broker.publish("winner", data["history"][0])
+    warm_responses("history")
+
+def publish_changes(data: dict, changed: List[str]):
+    """Re-publish what sync_from_disk() picked up from the leader."""
+    with STATE_LOCK:
+        if "history" in changed and data["history"]:
+            publish_winner(data)
+        if "state" in changed:
+            publish_phase(data["state"])
+        if "holders" in changed:
+            publish_holders(data["holders"])
+
+# ------------ Cached responses ------------
+def holders_view() -> Tuple[str, dict, HolderTable]:
+    """(etag, summary, table) of the current holder snapshot."""
+    data = load_state()
+    # set_holders() swaps in a fresh dict + table, so the references are a stable snapshot
+    with STATE_LOCK:
+        holders = data["holders"]
+        table = holder_table()
+        round_number = data["state"].get("roundNumber", 0)
+        version = data_version("holders")
+    etag = make_etag("holders", version, holders.get("tokenAddress"), holders.get("lastUpdatedISO"), round_number)
+    return etag, holders, table
+
+def holders_entry(view: Tuple[str, dict, HolderTable], start: int, limit: Optional[int]) -> CachedBody:
+    etag, holders, table = view
+
+    def build():
+        end = len(table) if limit is None else start + limit
+        headers = {"X-Next-Cursor": str(end)} if end < len(table) else {}
+        return {**holders, "items": table.items(start, end)}, headers
+
+    return response_cache.get_or_build("holders", etag, (start, limit), build)
+
+def history_etag() -> str:
+    data = load_state()
+    with STATE_LOCK:
+        history = data["history"]
+        round_number = data["state"].get("roundNumber", 0)
+        version = data_version("history")
+        newest = history[0]["round"] if history else 0
+        size = len(history)
+    return make_etag("history", version, round_number, newest, size)
+
+def history_entry(etag: str, before: Optional[int], limit: Optional[int]) -> CachedBody:
+    def build():
+        page, more = history_page(before, limit)
+        headers = {}
+        if page and more:
+            headers["X-Next-Cursor"] = str(page[-1]["round"])
+        return page, headers
+
+    return response_cache.get_or_build("history", etag, (before, limit), build)
+
+def warm_responses(name: str):
+    """
+    Serialize and compress the pages the frontend asks for as soon as
+    `name` ("holders" / "history") changes, on a background thread, so the
+    first requests after a new snapshot or winner are cache hits.
+    """
+    def warm():
+        try:
+            if name == "holders":
+                view = holders_view()
+                entries = [holders_entry(view, 0, limit) for limit in WARM_HOLDERS_LIMITS]
+            else:
+                etag = history_etag()
+                entries = [history_entry(etag, None, limit) for limit in WARM_HISTORY_LIMITS]
+            for entry in entries:
+                entry.prebuild()
+        except Exception as e:
+            print(f"Warming the {name} response cache failed: {e}")
+
+    threading.Thread(target=warm, name=f"warm-{name}", daemon=True).start()
+
 # ------------ Endpoints ------------
 @app.get("/healthz")
 def healthz():
@@ -62,112 +265,544 @@ def healthz():
 @app.get("/state.json", response_model=RoundState)
 def get_state():
     data = load_state()
-    st = data["state"]
+    with STATE_LOCK:
+        st = dict(data["state"])
     # compute secondsLeft for BREAK/PRE_SNAPSHOT
-    secs_left = None
-    if st.get("phase") in ("BREAK", "PRE_SNAPSHOT") and st.get("breakEndsAt"):
-        from datetime import datetime, timezone
-        end = datetime.fromisoformat(st["breakEndsAt"].replace("Z", "+00:00"))
-        secs_left = max(0, int((end - datetime.now(timezone.utc)).total_seconds()))
-    st["secondsLeft"] = secs_left
+    st["secondsLeft"] = seconds_left(st)
     return st
 
 @app.get("/holders", response_model=HoldersResponse)
-def get_holders():
-    data = load_state()
-    return data["holders"]
+def get_holders(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """
+    Holder snapshot. `total` is always the full count; `items` is the page
+    starting at `cursor` (an offset). The next page's cursor is returned in
+    the `X-Next-Cursor` header. Bodies are served pre-serialized from the
+    response cache.
+    """
+    view = holders_view()
+    fresh = check_not_modified(request, view[0])
+    if fresh is not None:
+        return fresh
+    return cached_response(holders_entry(view, parse_cursor(cursor) or 0, limit), request)
+
+@app.get("/holders/search", response_model=HolderSearchResponse)
+def search_holders_endpoint(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=64),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """
+    Case-insensitive address search: prefix matches first, then substring
+    matches. Paginated like /holders (offset cursor in X-Next-Cursor).
+    """
+    with STATE_LOCK:
+        table = holder_table()
+    start = parse_cursor(cursor) or 0
+    total, items, next_cursor = search_holders(table, q, start, limit)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return {"query": q, "total": total, "items": items}
+
+@app.get("/holders/{address}", response_model=Holder)
+def get_holder(address: str):
+    """Team of a single holder in the current snapshot."""
+    with STATE_LOCK:
+        table = holder_table()
+    team = table.lookup(address)
+    if team is None:
+        raise HTTPException(status_code=404, detail="holder not found")
+    return {"address": address, "team": team}
+
+@app.get("/rounds/{round_number}/holders/{address}", response_model=RoundHolder)
+def get_round_holder(round_number: int, address: str):
+    """Team of a holder in a past (or the current) round, from the round archive."""
+    team = round_archive.lookup(round_number, address)
+    if team is None:
+        detail = "holder not found" if round_archive.has_round(round_number) else "round not archived"
+        raise HTTPException(status_code=404, detail=detail)
+    return {"round": round_number, "address": address, "team": team}
 
 @app.get("/history", response_model=List[HistoryItem])
-def get_history():
-    data = load_state()
-    return data["history"]
+def get_history(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """
+    Match history, newest first. `cursor` is a round number: only rounds
+    strictly older than it are returned.
+    """
+    etag = history_etag()
+    fresh = check_not_modified(request, etag)
+    if fresh is not None:
+        return fresh
+    return cached_response(history_entry(etag, parse_cursor(cursor), limit), request)
 
-@app.post("/winner")
-def post_winner(p: WinnerPayload):
-    data = load_state()
-    state = data["state"]
+@app.get("/snapshot/stats")
+def get_snapshot_stats():
+    """Snapshot cache hit/miss/age counters and the last paged-fetch progress."""
+    return {
+        "cache": snapshot_cache.stats(),
+        "pagedFetch": helius.last_progress.as_dict(),
+        "archive": round_archive.stats(),
+        "holderIndex": {
+            "ready": holder_index.ready,
+            "owners": len(holder_index),
+            "slot": holder_index.slot,
+            "deltasApplied": holder_index.deltas_applied,
+        },
+    }
+
+@app.get("/rpc/stats")
+def get_rpc_stats():
+    """Per-method and per-endpoint call/error/retry counts and latency of the shared RPC client."""
+    return {"methods": rpc.stats(), "endpoints": rpc.endpoint_stats()}
+
+@app.get("/leader")
+def get_leader():
+    """Whether this worker drives the round loop, its heartbeat, next timer and winner votes."""
+    return {**election.status(), "scheduler": wakeup.status(), "winnerGate": winner_gate.status()}
+
+registry.on_collect(lambda: EVENT_SUBSCRIBERS.set(broker.subscriber_count))
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus scrape endpoint (text format 0.0.4) for this worker."""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
+@app.get("/admin/profile", response_class=PlainTextResponse)
+async def admin_profile(
+    seconds: float = Query(10, gt=0),
+    interval: float = Query(PROFILE_DEFAULT_INTERVAL, gt=0),
+    authorization: Optional[str] = Header(None),
+):
+    """
+    Sample every thread of this worker for `seconds` and return collapsed
+    stacks (`flamegraph.pl out.txt > out.svg`, or drop it on speedscope).
+    """
+    require_admin(authorization)
+    try:
+        stacks = await asyncio.to_thread(profiler.profile, seconds, interval)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(stacks, headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'})
+
+def check_winner(state: dict, round_number: int, team: str) -> Optional[str]:
+    """Reason to reject a winner report, or None."""
     # Only accept during RUNNING, valid team, and matching round
     if state.get("phase") != "RUNNING":
-        return {"ok": False, "reason": "not running"}
-    if p.team not in TEAMS:
-        return {"ok": False, "reason": "bad team"}
-    if int(state.get("roundNumber", 0)) != int(p.round):
-        return {"ok": False, "reason": "round mismatch"}
-
-    # Record winner and flip to ENDED; loop will send us to BREAK next tick
-    record_winner(data, p.team)
-    save_state(data)
+        return "not running"
+    if team not in TEAMS:
+        return "bad team"
+    if int(state.get("roundNumber", 0)) != int(round_number):
+        return "round mismatch"
+    return None
+
+def decided_winner(state: dict, round_number: int) -> Optional[str]:
+    """The team that already won `round_number`, from memory, or None."""
+    team = winner_gate.decided(round_number)
+    if team is None and state.get("phase") == "ENDED" and int(state.get("roundNumber", 0)) == int(round_number):
+        team = state.get("winner")
+    return team
+
+def already_decided(team: str, winner: str) -> dict:
+    WINNER_REPORTS.inc(outcome="duplicate")
+    if team == winner:
+        return {"ok": True, "duplicate": True}
+    return {"ok": False, "reason": "already decided", "winner": winner}
+
+def commit_winner(round_number: int, team: str) -> dict:
+    """Compare-and-set (roundNumber, RUNNING) -> ENDED with `team`; only the first caller succeeds."""
+    with STATE_LOCK:
+        data = load_state()
+        state = data["state"]
+        reason = check_winner(state, round_number, team)
+        if reason:
+            winner = decided_winner(state, round_number)
+            return already_decided(team, winner) if winner else {"ok": False, "reason": reason}
+
+        # Record winner and flip to ENDED; the round loop pays out and starts the next break
+        record_winner(data, team)
+        save_state(data)
+        publish_winner(data)
+        publish_phase(state)
+        winner_gate.settle(int(round_number), team)
+    WINNER_REPORTS.inc(outcome="accepted")
+    wakeup.poke()
     return {"ok": True}
 
+def apply_winner(round_number: int, team: str, voter: str = "") -> dict:
+    """
+    A viewer's winner report, on the leader. Repeats and early votes are
+    answered from memory; only the report that completes the quorum goes
+    on to commit_winner().
+    """
+    # The shared in-memory state: no I/O, and an unlocked read is fine for
+    # the fast paths because commit_winner() re-checks under the lock.
+    state = load_state()["state"]
+    winner = decided_winner(state, round_number)
+    if winner:
+        return already_decided(team, winner)
+    reason = check_winner(state, round_number, team)
+    if reason:
+        WINNER_REPORTS.inc(outcome="rejected")
+        return {"ok": False, "reason": reason}
+    votes = winner_gate.vote(int(round_number), team, voter)
+    if not votes:
+        WINNER_REPORTS.inc(outcome="duplicate")
+        return {"ok": True, "duplicate": True}
+    if votes < winner_gate.quorum:
+        WINNER_REPORTS.inc(outcome="vote")
+        return {"ok": True, "votes": votes, "quorum": winner_gate.quorum}
+    return commit_winner(round_number, team)
+
+@app.post("/winner")
+def post_winner(p: WinnerPayload, request: Request):
+    if SERVER_ARENA:
+        # The server runs the battle itself; client reports are not trusted
+        return {"ok": False, "reason": "decided by server"}
+    voter = request.client.host if request.client else ""
+    if election.is_leader:
+        return apply_winner(p.round, p.team, voter)
+    # Followers never write state: pre-check against the synced copy and
+    # forward each new vote to the leader, which re-checks it. A team needs
+    # at most `quorum` votes from any one worker, so the rest stay here.
+    state = load_state()["state"]
+    winner = decided_winner(state, p.round)
+    if winner:
+        return already_decided(p.team, winner)
+    reason = check_winner(state, p.round, p.team)
+    if reason:
+        WINNER_REPORTS.inc(outcome="rejected")
+        return {"ok": False, "reason": reason}
+    votes = winner_gate.vote(p.round, p.team, voter)
+    if not votes or votes > winner_gate.quorum:
+        WINNER_REPORTS.inc(outcome="duplicate")
+        return {"ok": True, "duplicate": True}
+    enqueue_winner(p.round, p.team, voter)
+    WINNER_REPORTS.inc(outcome="queued")
+    return {"ok": True, "queued": True}
+
+@app.websocket("/ws")
+async def ws_events(ws: WebSocket):
+    """Push channel: phase transitions, holder snapshots and winners."""
+    await ws.accept()
+    sub = broker.subscribe()
+    try:
+        while True:
+            msg = await sub.queue.get()
+            if msg is None:
+                # too slow; dropped by the broker
+                await ws.close(code=1013)
+                break
+            await ws.send_text(msg.ws)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        broker.unsubscribe(sub)
+
+@app.get("/events")
+async def sse_events():
+    """Same stream as /ws, as Server-Sent Events."""
+    sub = broker.subscribe()
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    msg = await asyncio.wait_for(sub.queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if msg is None:
+                    break
+                yield msg.sse
+        finally:
+            broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # ------------ Round loop ------------
 @app.on_event("startup")
 async def _start_round_loop():
+    # Under `uvicorn --workers N` exactly one worker wins the leader lock and
+    # drives the round; the rest serve reads from the state it flushes.
+    if not election.try_acquire():
+        set_read_only(True)
+    data = load_state()  # recover from the last flushed file before serving
+    broker.bind(asyncio.get_running_loop())
+    wakeup.bind(asyncio.get_running_loop())
+    with STATE_LOCK:
+        publish_phase(data["state"])
+        publish_holders(data["holders"])
+    warm_responses("history")
+    sync_arena(data["state"])
+    if election.is_leader:
+        start_leader_tasks()
+    else:
+        asyncio.create_task(follow_leader())
+
+@app.on_event("shutdown")
+def _flush_on_shutdown():
+    orchestrator.shutdown()
+    flush_state()
+    election.release()
+
+def start_leader_tasks():
+    if holder_index_sync.enabled:
+        asyncio.create_task(holder_index_sync.run())
+    asyncio.create_task(leader_housekeeping())
     asyncio.create_task(round_loop())
 
-async def round_loop():
+async def follow_leader():
+    """Mirror the leader's flushed state until this worker wins the lock."""
+    data = load_state()
+    next_attempt = 0.0
+    loop = asyncio.get_running_loop()
     while True:
-        data = load_state()
-        state = data["state"]
-        phase = state.get("phase", "BREAK")
+        try:
+            changed = await asyncio.to_thread(sync_from_disk)
+            if changed:
+                publish_changes(data, changed)
+                sync_arena(data["state"])
+        except Exception as e:
+            print(f"State sync failed: {e}")
+        if loop.time() >= next_attempt:
+            next_attempt = loop.time() + LEADER_HEARTBEAT_SECONDS
+            if election.try_acquire():
+                break
+        await asyncio.sleep(STATE_SYNC_INTERVAL)
 
-        # Compute secs_left only in BREAK / PRE_SNAPSHOT
-        secs_left = None
-        if phase in ("BREAK", "PRE_SNAPSHOT"):
-            be = state.get("breakEndsAt")
-            if not be:
-                # ensure a 30s countdown exists when entering BREAK
-                set_break(state, BREAK_SECONDS)
-                save_state(data)
+    # Take over from where the previous leader's last flush left off
+    publish_changes(data, await asyncio.to_thread(sync_from_disk))
+    set_read_only(False)
+    print(f"Worker {os.getpid()} is now the round-loop leader")
+    start_leader_tasks()
+
+def apply_queued_winners():
+    """Apply the winner reports followers queued (inbox file lock, state writes)."""
+    for report in drain_winner_inbox():
+        apply_winner(report.get("round", 0), report.get("team", ""), report.get("voter", ""))
+
+async def leader_housekeeping():
+    """
+    Heartbeat the leader lock and apply winners queued by followers. Both
+    touch the disk (and a winner appends to the history store under
+    STATE_LOCK), so they run on a worker thread, not the event loop.
+    """
+    last_beat = 0.0
+    loop = asyncio.get_running_loop()
+    while True:
+        if loop.time() - last_beat >= LEADER_HEARTBEAT_SECONDS:
+            last_beat = loop.time()
+            await asyncio.to_thread(election.heartbeat)
+        try:
+            await asyncio.to_thread(apply_queued_winners)
+        except Exception as e:
+            print(f"Failed to read winner inbox: {e}")
+        await asyncio.sleep(STATE_SYNC_INTERVAL)
+
+# ------------ Server arena ------------
+_arena_task: Optional[asyncio.Task] = None
+
+def sync_arena(state: dict):
+    """With SERVER_ARENA, make sure this worker is running the current round's battle."""
+    global _arena_task
+    if not SERVER_ARENA or state.get("phase") != "RUNNING" or not state.get("runningSince"):
+        return
+    name = f"arena-{state.get('roundNumber')}"
+    if _arena_task is not None and not _arena_task.done() and _arena_task.get_name() == name:
+        return
+    _arena_task = asyncio.create_task(
+        run_arena(int(state["roundNumber"]), parse_iso(state["runningSince"])), name=name
+    )
+
+async def run_arena(round_number: int, since: datetime):
+    """
+    Step the round's battle in real time and stream it: a keyframe every
+    ARENA_KEYFRAME_SECONDS, deltas in between. Every worker runs the same
+    seeded battle from `runningSince`, so clients see the same frames
+    whichever worker they are connected to, and a worker that starts late
+    catches up faster than real time. Only the leader records the winner.
+    """
+    data = load_state()
+    sim = ArenaSim(round_seed(round_number), round_number=round_number)
+    loop = asyncio.get_running_loop()
+    next_keyframe = 0.0
+    try:
+        while True:
+            with STATE_LOCK:
+                state = data["state"]
+                if state.get("phase") != "RUNNING" or int(state.get("roundNumber", 0)) != round_number:
+                    return
+            due = int((now_utc() - since).total_seconds() / DT)
+            if due > sim.tick:
+                await asyncio.to_thread(sim.advance, due - sim.tick)
+            if sim.winner is None and loop.time() >= next_keyframe:
+                next_keyframe = loop.time() + ARENA_KEYFRAME_SECONDS
+                broker.publish("arenaKey", sim.keyframe())
             else:
-                secs_left = int((parse_iso(be) - now_utc()).total_seconds())
-                secs_left = max(0, secs_left)
+                broker.publish("arena", sim.delta())
+            if sim.winner is not None:
+                break
+            next_frame = since + timedelta(seconds=(sim.tick + ARENA_STEPS_PER_FRAME) * DT)
+            await asyncio.sleep(max(0.0, (next_frame - now_utc()).total_seconds()))
+    except Exception as e:
+        print(f"Arena for round {round_number} failed: {e}")
+        return
+    print(f"Arena round {round_number}: {sim.winner} won after {sim.tick * DT:.1f}s")
+    if election.is_leader:
+        await asyncio.to_thread(commit_winner, round_number, sim.winner)
 
-        # ---- BREAK ----
-        if phase == "BREAK":
-            # Move to PRE_SNAPSHOT once per break at T-5s
-            if secs_left is not None and secs_left <= PRE_SNAPSHOT_LEEWAY:
-                enter_pre_snapshot(state)
-
-                # Real snapshot + team assignment
-                next_round = int(state.get("roundNumber", 0)) + 1
-                assigned: List[Holder] = fetch_and_assign_teams(
-                    token_mint=TOKEN_MINT,   # uses HELIUS_API_KEY inside state_store
-                    seed=next_round * 1337
+async def archive_round(round_number: int, table: HolderTable):
+    try:
+        with span("round.archive", round=round_number):
+            await orchestrator.run("archive", round_archive.append, round_number, table, timeout=PAYOUT_TIMEOUT)
+    except Exception as e:
+        print(f"Failed to archive holders of round {round_number}: {e}")
+
+async def take_snapshot(data: dict, next_round: int):
+    """Real snapshot + team assignment for the coming round, off the event loop."""
+    # A live holder index already has the point-in-time owner set and balances
+    balances = holder_index.balances() if holder_index.ready else None
+    with span("round.snapshot", round=next_round, **{"snapshot.indexed": balances is not None}) as sp:
+        try:
+            assigned: HolderTable = await orchestrator.run(
+                "snapshot",
+                fetch_and_assign_teams,
+                token_mint=TOKEN_MINT,   # uses HELIUS_API_KEY inside state_store
+                seed=next_round * 1337,
+                addresses=list(balances) if balances is not None else None,
+                amounts=list(balances.values()) if balances is not None else None,
+                timeout=SNAPSHOT_TIMEOUT,
+            )
+        except Exception as e:
+            sp.record_exception(e)
+            print(f"Snapshot failed, keeping previous holders: {e}")
+        else:
+            with STATE_LOCK:
+                set_holders(data, assigned, token_mint=TOKEN_MINT, round_number=next_round)
+                save_state(data)
+                publish_holders(data["holders"])
+            sp.set("snapshot.holders", len(assigned))
+
+async def pay_out(data: dict):
+    """
+    Distribute the prize to the winning team. The attempt is recorded and
+    flushed first, so a leader that takes over after a crash mid-payout
+    skips it rather than paying twice.
+    """
+    state = data["state"]
+    round_number = int(state.get("roundNumber", 0))
+    with span("round.payout", round=round_number, **{"payout.team": state.get("winner") or ""}) as sp:
+        try:
+            if state.get("payoutStartedRound") == round_number:
+                print(f"Payout for round {round_number} was already started; not retrying it")
+            elif state.get("prizePoolLamports", 0) > 0:
+                with STATE_LOCK:
+                    state["payoutStartedRound"] = round_number
+                    save_state(data)
+                await asyncio.to_thread(flush_state)
+                result = await orchestrator.run(
+                    "payout", distribute_prize_from_state, timeout=PAYOUT_TIMEOUT
                 )
-                set_holders(data, assigned, token_mint=TOKEN_MINT)
+                sp.set("payout.lamports", result.paid_lamports)
+                for sig in result.signatures:
+                    print(f"Prize distributed: https://solscan.io/tx/{sig}")
+            else:
+                print("No prize to distribute")
+        except Exception as e:
+            sp.record_exception(e)
+            print(f"Failed to distribute prize: {e}")
+            # Continue anyway to avoid blocking the round loop
+
+async def round_loop():
+    """
+    Event-driven round driver. Each pass applies whatever transition is due,
+    then sleeps on a loop timer until the next deadline (T-PRE_SNAPSHOT_LEEWAY,
+    then the end of the break) or until /winner pokes it. Nothing is loaded
+    or saved between transitions.
+    """
+    data = load_state()
+    state = data["state"]
+    snapshot: Optional[asyncio.Task] = None
+    # The deadline we last slept towards; lag is only meaningful when we did
+    # (not for a break that already expired while the server was down)
+    armed: Optional[datetime] = None
+    while True:
+        wakeup.clear()
+        deadline = None
+        with STATE_LOCK:
+            phase = state.get("phase", "BREAK")
+            if phase in ("BREAK", "PRE_SNAPSHOT") and not state.get("breakEndsAt"):
+                # ensure a 30s countdown exists when entering BREAK
+                set_break(state, BREAK_SECONDS)
                 save_state(data)
+                publish_phase(state)
+                phase = "BREAK"
+            breaks_end = parse_iso(state["breakEndsAt"]) if phase in ("BREAK", "PRE_SNAPSHOT") else None
 
-        # ---- PRE_SNAPSHOT ----
-        elif phase == "PRE_SNAPSHOT":
-            # Fall through to RUNNING when timer hits 0 (handled below)
-            pass
+        # ---- BREAK / PRE_SNAPSHOT ----
+        if breaks_end is not None:
+            now = now_utc()
+            snapshot_at = breaks_end - timedelta(seconds=PRE_SNAPSHOT_LEEWAY)
 
-        # Start RUNNING when BREAK/PRE_SNAPSHOT timer hits 0
-        if phase in ("BREAK", "PRE_SNAPSHOT") and secs_left == 0:
-            start_running(state)     # sets phase=RUNNING, ++roundNumber, clears breakEndsAt
-            save_state(data)
+            # Start RUNNING when the break timer hits 0
+            if now >= breaks_end:
+                if armed == breaks_end:
+                    TRANSITION_LAG.observe((now - breaks_end).total_seconds(), transition="RUNNING")
+                with span("round.start", round=int(state.get("roundNumber", 0)) + 1):
+                    if snapshot is not None:
+                        # Bounded by SNAPSHOT_TIMEOUT, so this is at most a few ms
+                        await snapshot
+                        snapshot = None
+                    with STATE_LOCK:
+                        start_running(state)     # sets phase=RUNNING, ++roundNumber, clears breakEndsAt
+                        save_state(data)
+                        publish_phase(state)
+                        table = holder_table()
+                    sync_arena(state)
+                if ROUND_ARCHIVE:
+                    # The holders this round is played (and paid) with
+                    asyncio.create_task(archive_round(int(state["roundNumber"]), table))
+                continue
 
-        # ---- RUNNING ----
-        elif phase == "RUNNING":
-            # FE determines the winner and POSTs /winner
-            pass
+            # Move to PRE_SNAPSHOT once per break at T-5s
+            if phase == "BREAK" and now >= snapshot_at:
+                if armed == snapshot_at:
+                    TRANSITION_LAG.observe((now - snapshot_at).total_seconds(), transition="PRE_SNAPSHOT")
+                with STATE_LOCK:
+                    enter_pre_snapshot(state)
+                    save_state(data)
+                    publish_phase(state)
+                    next_round = int(state.get("roundNumber", 0)) + 1
+                # Outside any span: the task copies the current context
+                snapshot = asyncio.create_task(take_snapshot(data, next_round))
+                continue
+
+            deadline = snapshot_at if phase == "BREAK" else breaks_end
 
         # ---- ENDED ----
         elif phase == "ENDED":
-            # Distribute prize to winning team
-            try:
-                if state.get("prizePoolLamports", 0) > 0:
-                    tx_signature = distribute_prize_from_state()
-                    print(f"Prize distributed: https://solscan.io/tx/{tx_signature}")
-                else:
-                    print("No prize to distribute")
-            except Exception as e:
-                print(f"Failed to distribute prize: {e}")
-                # Continue anyway to avoid blocking the round loop
-            
+            await pay_out(data)
             # Back to BREAK with a fresh 30s timer
-            set_break(state, BREAK_SECONDS)
-            save_state(data)
+            with STATE_LOCK:
+                set_break(state, BREAK_SECONDS)
+                save_state(data)
+                publish_phase(state)
+            continue
 
-        await asyncio.sleep(1)
\ No newline at end of file
+        # ---- RUNNING ----
+        # FE determines the winner and POSTs /winner, which pokes us
+        armed = deadline
+        await wakeup.wait(deadline)
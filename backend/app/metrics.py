@@ -0,0 +1,284 @@
+# metrics.py
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+# ----------------------------
+# Buckets
+# ----------------------------
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Round steps and payouts run for seconds to minutes
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+# Scheduler lateness: good is well under a millisecond
+LAG_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    if float(v).is_integer() and abs(v) < 1e15:
+        return str(int(v))
+    return repr(float(v))
+
+
+class Metric:
+    """A metric family: one value (or histogram) per label combination."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> LabelKey:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _labels(self, key: LabelKey, extra: str = "") -> str:
+        parts = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{self._labels(k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{self._labels(k)} {_number(v)}" for k, v in items]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # per-bucket (non-cumulative) counts, then +Inf, sum
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts = entry[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v[0]), v[1]) for k, v in self._values.items()]
+        out = []
+        for key, counts, total in items:
+            running = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                running += c
+                le = 'le="%s"' % _number(bound)
+                out.append(f"{self.name}_bucket{self._labels(key, le)} {running}")
+            out.append(f"{self.name}_sum{self._labels(key)} {_number(total)}")
+            out.append(f"{self.name}_count{self._labels(key)} {running}")
+        return out
+
+
+class Registry:
+    """
+    Process-wide metrics in the Prometheus text format (0.0.4).
+
+    Under `uvicorn --workers N` every worker has its own registry, and a
+    scrape sees whichever worker answered; label `worker` is not added, so
+    scrape each worker (or run one) when exact totals matter.
+    """
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def on_collect(self, fn: Callable[[], None]) -> None:
+        """Run `fn` before every scrape (to refresh gauges that are cheaper to read than to track)."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        for fn in self._collectors:
+            try:
+                fn()
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+        return "\n".join(m.render() for m in self._metrics) + "\n"
+
+
+registry = Registry()
+
+# ----------------------------
+# API
+# ----------------------------
+HTTP_REQUESTS = registry.counter(
+    "pikmin_http_requests_total", "HTTP requests by route template and status.", ["method", "route", "status"])
+HTTP_LATENCY = registry.histogram(
+    "pikmin_http_request_duration_seconds", "Time to the last response byte, by route template.", ["method", "route"])
+HTTP_RESPONSE_SIZE = registry.histogram(
+    "pikmin_http_response_size_bytes", "Response body bytes (after compression), by route template.", ["route"],
+    buckets=SIZE_BUCKETS)
+EVENT_SUBSCRIBERS = registry.gauge("pikmin_event_subscribers", "Open /ws and /events subscribers.")
+
+# ----------------------------
+# Round
+# ----------------------------
+ROUND_NUMBER = registry.gauge("pikmin_round_number", "Current round number.")
+ROUND_PHASE = registry.gauge("pikmin_round_phase", "1 for the current phase, 0 for the others.", ["phase"])
+PHASE_DURATION = registry.histogram(
+    "pikmin_round_phase_duration_seconds", "How long each round phase lasted.", ["phase"], buckets=SLOW_BUCKETS)
+TRANSITION_LAG = registry.histogram(
+    "pikmin_round_transition_lag_seconds", "How late a timed transition fired against its deadline.", ["transition"],
+    buckets=LAG_BUCKETS)
+WINNER_REPORTS = registry.counter(
+    "pikmin_winner_reports_total", "/winner reports: accepted, vote, queued, duplicate or rejected.", ["outcome"])
+STEP_DURATION = registry.histogram(
+    "pikmin_round_step_duration_seconds", "Blocking round steps (snapshot, payout, archive) as run by the orchestrator.",
+    ["step"], buckets=SLOW_BUCKETS)
+STEP_FAILURES = registry.counter(
+    "pikmin_round_step_failures_total", "Round steps that timed out, were still busy, or raised.", ["step", "reason"])
+
+# ----------------------------
+# Snapshots
+# ----------------------------
+SNAPSHOT_FETCH = registry.histogram(
+    "pikmin_snapshot_fetch_seconds", "Fetching the holder snapshot, by source.", ["source"], buckets=SLOW_BUCKETS)
+SNAPSHOT_PARSE = registry.histogram(
+    "pikmin_snapshot_parse_seconds", "Decoding token accounts into unique owners, by encoding.", ["mode"],
+    buckets=SLOW_BUCKETS)
+SNAPSHOT_ACCOUNTS = registry.gauge("pikmin_snapshot_accounts", "Token accounts in the last RPC snapshot.")
+SNAPSHOT_HOLDERS = registry.gauge("pikmin_snapshot_holders", "Holders (unique owners with a balance) in the last snapshot.")
+
+# ----------------------------
+# RPC
+# ----------------------------
+RPC_LATENCY = registry.histogram(
+    "pikmin_rpc_request_duration_seconds", "One HTTP attempt of a JSON-RPC call (batches as batch:<methods>).",
+    ["method", "endpoint"])
+RPC_ERRORS = registry.counter(
+    "pikmin_rpc_errors_total", "Failed RPC attempts: transport/HTTP failures and JSON-RPC error objects.",
+    ["method", "kind"])
+RPC_RETRIES = registry.counter("pikmin_rpc_retries_total", "Retries, failovers and hedged legs.", ["method"])
+
+# ----------------------------
+# Payouts
+# ----------------------------
+PAYOUT_SEND = registry.histogram(
+    "pikmin_payout_batch_send_seconds", "Building, signing and sending one payout batch.", ["outcome"],
+    buckets=SLOW_BUCKETS)
+PAYOUT_CONFIRM = registry.histogram(
+    "pikmin_payout_batch_confirm_seconds", "From send to confirmed, per payout batch.", buckets=SLOW_BUCKETS)
+PAYOUT_BATCHES = registry.counter("pikmin_payout_batches_total", "Payout batches by final status.", ["status"])
+PAYOUT_RUN = registry.histogram("pikmin_payout_run_seconds", "A whole payout, all batches and retries.", buckets=SLOW_BUCKETS)
+PAYOUT_LAMPORTS = registry.counter("pikmin_payout_lamports_total", "Lamports paid out in confirmed batches.")
+
+
+# ----------------------------
+# HTTP middleware
+# ----------------------------
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request to its last body byte.
+    Requests are labelled by route template (`/holders/{address}`, not the
+    address) so the label set stays bounded; long-lived streams in `skip`
+    are not timed.
+    """
+
+    def __init__(self, app, skip: Sequence[str] = ("/events", "/metrics")):
+        self.app = app
+        self.skip = set(skip)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip:
+            await self.app(scope, receive, send)
+            return
+        started = perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # the router fills in scope["route"] as it dispatches
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method=method, route=route, status=status)
+            HTTP_LATENCY.observe(perf_counter() - started, method=method, route=route)
+            HTTP_RESPONSE_SIZE.observe(size, route=route)
@@ -0,0 +1,60 @@
+# migrate_state.py
+"""
+Copy the persisted state between storage backends.
+
+    python -m app.migrate_state --to sqlite              # state_store.json -> state_store.db
+    python -m app.migrate_state --from sqlite --to json  # and back
+
+Run it with the server stopped. Legacy JSON files that still keep holders
+inline ("items") are converted on the way.
+"""
+import argparse
+import pathlib
+
+from .holder_table import HolderTable
+from .storage import HOLDERS_PATH, STATE_DB_PATH, STATE_PATH, JsonBackend, SqliteBackend, StateBackend
+
+
+def open_backend(name: str, args: argparse.Namespace) -> StateBackend:
+    if name == "sqlite":
+        return SqliteBackend(pathlib.Path(args.db))
+    return JsonBackend(pathlib.Path(args.json), pathlib.Path(args.holders))
+
+
+def migrate(source: StateBackend, target: StateBackend) -> dict:
+    data = source.load()
+    if data is None:
+        raise SystemExit(f"nothing to migrate: the {source.name} backend is empty")
+    data["history"] = source.all_history()
+
+    meta = data.setdefault("holders", {})
+    items = meta.pop("items", None)
+    table = HolderTable.from_items(items) if items is not None else source.load_holders()
+    if table is not None:
+        meta["total"] = len(table)
+
+    target.replace_all(data, table)
+    return {
+        "round": data["state"].get("roundNumber"),
+        "history": len(data["history"]),
+        "holders": len(table) if table is not None else 0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from", dest="source", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--to", dest="target", choices=["json", "sqlite"], default="sqlite")
+    parser.add_argument("--json", default=str(STATE_PATH), help="JSON state file")
+    parser.add_argument("--holders", default=str(HOLDERS_PATH), help="holder table sidecar of the JSON backend")
+    parser.add_argument("--db", default=str(STATE_DB_PATH), help="SQLite database")
+    args = parser.parse_args()
+    if args.source == args.target:
+        parser.error("--from and --to must differ")
+
+    summary = migrate(open_backend(args.source, args), open_backend(args.target, args))
+    print(f"Migrated {args.source} -> {args.target}: {summary}")
+
+
+if __name__ == "__main__":
+    main()
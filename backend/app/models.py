@@ -7,12 +7,20 @@ class Holder(BaseModel):
     address: str
     team: TeamName
 
+class RoundHolder(Holder):
+    round: int
+
 class HoldersResponse(BaseModel):
     total: int
     tokenAddress: str
     lastUpdatedISO: str
     items: List[Holder]
 
+class HolderSearchResponse(BaseModel):
+    query: str
+    total: int
+    items: List[Holder]
+
 class HistoryItem(BaseModel):
     round: int
     team: TeamName
@@ -34,6 +42,7 @@ class WinnerPayload(BaseModel):
 class SnapshotResult(BaseModel):
     tokenAddress: str
     holders: List[str]  # plain addresses
+    amounts: Optional[bytes] = None  # raw balance per holder, packed u64 little-endian
 
 class TeamAssignment(BaseModel):
     items: List[Holder]  # address + team
@@ -48,4 +57,5 @@ class PayoutPlan(BaseModel):
     round: int
     team: TeamName
     recipients: List[str]
-    totalLamports: int
\ No newline at end of file
+    totalLamports: int
+    amounts: Optional[List[int]] = None  # lamports per recipient; None = equal split of totalLamports
\ No newline at end of file
@@ -0,0 +1,84 @@
+# orchestrator.py
+import os
+import time
+import asyncio
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from . import tracing
+from .metrics import STEP_DURATION, STEP_FAILURES
+
+# ----------------------------
+# Config
+# ----------------------------
+ROUND_WORKERS = int(os.getenv("ROUND_WORKERS", "4"))
+# Batched payouts confirm every batch and may retry; allow a few blockhash lifetimes
+PAYOUT_TIMEOUT = float(os.getenv("PAYOUT_TIMEOUT", "300"))
+
+
+class StepTimeout(Exception):
+    """A round step did not finish before its deadline."""
+
+
+class StepBusy(Exception):
+    """The previous run of a round step is still in flight."""
+
+
+class RoundOrchestrator:
+    """
+    Runs the blocking round steps (holder snapshot, prize payout) in a bounded
+    thread pool so the event loop keeps serving requests meanwhile.
+
+    Each step gets a deadline. On timeout the awaiting coroutine is released
+    with StepTimeout; a step that already started cannot be interrupted, so it
+    keeps its worker until its own I/O timeouts fire, and a second run of the
+    same step is refused (StepBusy) until it is done. That keeps a wedged
+    payout from ever being started twice.
+    """
+
+    def __init__(self, max_workers: int = ROUND_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="round-step")
+        self._inflight: Dict[str, Future] = {}
+
+    def busy(self, name: str) -> bool:
+        fut = self._inflight.get(name)
+        return fut is not None and not fut.done()
+
+    async def run(self, name: str, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        if self.busy(name):
+            STEP_FAILURES.inc(step=name, reason="busy")
+            raise StepBusy(f"{name} is still running")
+        # Timed to completion, so a step that outlives its deadline still shows its real duration
+        started = time.perf_counter()
+        fut = tracing.submit(self._executor, self._traced, name, started, functools.partial(fn, *args, **kwargs))
+        self._inflight[name] = fut
+        fut.add_done_callback(lambda f: self._finished(name, f, time.perf_counter() - started))
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(fut)), timeout)
+        except asyncio.TimeoutError:
+            fut.cancel()  # only effective if it never got a worker
+            STEP_FAILURES.inc(step=name, reason="timeout")
+            raise StepTimeout(f"{name} exceeded {timeout}s")
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+
+    @staticmethod
+    def _traced(name: str, submitted: float, fn: Callable[[], Any]) -> Any:
+        with tracing.span(f"step.{name}", **{"step.queued_ms": round((time.perf_counter() - submitted) * 1000, 3)}):
+            return fn()
+
+    @staticmethod
+    def _finished(name: str, fut: Future, seconds: float) -> None:
+        if fut.cancelled():
+            return
+        STEP_DURATION.observe(seconds, step=name)
+        if fut.exception() is not None:
+            STEP_FAILURES.inc(step=name, reason="error")
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+orchestrator = RoundOrchestrator()
@@ -0,0 +1,190 @@
+# response_cache.py
+import os
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+
+try:
+    import brotli  # optional; gzip is always available
+except ImportError:  # pragma: no cover - depends on the deployment
+    brotli = None
+
+# ----------------------------
+# Config
+# ----------------------------
+MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_ENTRIES", "64"))
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 512
+
+# A strong ETag names one exact byte sequence, so every content-coding of a
+# body gets its own: '"abc"' (identity), '"abc-gz"', '"abc-br"'
+ETAG_SUFFIXES = {"identity": "", "gzip": "-gz", "br": "-br"}
+
+
+def encode_json(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    suffix = ETAG_SUFFIXES.get(encoding, "")
+    return etag[:-1] + suffix + '"' if suffix else etag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    inm = request.headers.get("if-none-match")
+    if not inm:
+        return False
+    tags = [t.strip() for t in inm.split(",")]
+    return "*" in tags or etag in tags
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"})
+
+
+class CachedBody:
+    """
+    Pre-serialized JSON body plus its compressed variants. Each variant is
+    built at most once: by prebuild() when the data changes, or on first
+    request for that encoding.
+    """
+
+    def __init__(self, body: bytes, etag: str, headers: Optional[Dict[str, str]] = None):
+        self.etag = etag
+        self.headers = headers or {}
+        self._variants: Dict[str, bytes] = {"identity": body}
+        self._lock = threading.Lock()
+
+    def variant(self, encoding: str) -> Tuple[bytes, str]:
+        """Return (body, applied_encoding) for the negotiated encoding."""
+        identity = self._variants["identity"]
+        if encoding == "identity" or len(identity) < MIN_COMPRESS_BYTES:
+            return identity, "identity"
+        body = self._variants.get(encoding)
+        if body is None:
+            with self._lock:
+                body = self._variants.get(encoding)
+                if body is None:
+                    if encoding == "br":
+                        body = brotli.compress(identity, quality=BROTLI_QUALITY)
+                    else:
+                        body = gzip.compress(identity, compresslevel=GZIP_LEVEL)
+                    self._variants[encoding] = body
+        return body, encoding
+
+    def prebuild(self) -> None:
+        """Build every compressed variant now instead of on first request."""
+        for encoding in ("gzip", "br") if brotli is not None else ("gzip",):
+            self.variant(encoding)
+
+
+class ResponseCache:
+    """
+    Small LRU of pre-serialized responses. Entries are grouped by `name`
+    (e.g. "holders") and tagged with an ETag built from the data version
+    counter; when the ETag for a name changes every entry of that name is
+    dropped.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Hashable], CachedBody]" = OrderedDict()
+        self._versions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(
+        self,
+        name: str,
+        etag: str,
+        key: Hashable,
+        build: Callable[[], Tuple[Any, Dict[str, str]]],
+    ) -> CachedBody:
+        with self._lock:
+            if self._versions.get(name) != etag:
+                for k in [k for k in self._entries if k[0] == name]:
+                    del self._entries[k]
+                self._versions[name] = etag
+            entry = self._entries.get((name, key))
+            if entry is not None:
+                self._entries.move_to_end((name, key))
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Serialize outside the lock; a concurrent miss just builds twice.
+        obj, headers = build()
+        entry = CachedBody(encode_json(obj), etag, headers)
+        with self._lock:
+            if self._versions.get(name) == etag:
+                self._entries[(name, key)] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    """Pick br > gzip > identity from an Accept-Encoding header."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+
+    def ok(enc: str) -> bool:
+        return accepted.get(enc, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and ok("br"):
+        return "br"
+    if ok("gzip"):
+        return "gzip"
+    return "identity"
+
+
+def request_encoding(request: Request) -> str:
+    return negotiate_encoding(request.headers.get("accept-encoding", ""))
+
+
+def check_not_modified(request: Request, etag: str) -> Optional[Response]:
+    """
+    304 when If-None-Match already names the variant this request would
+    negotiate, before anything is built. Bodies too small to compress are
+    served as identity; cached_response() catches those.
+    """
+    tag = variant_etag(etag, request_encoding(request))
+    return not_modified(tag) if etag_matches(request, tag) else None
+
+
+def cached_response(entry: CachedBody, request: Request) -> Response:
+    body, encoding = entry.variant(request_encoding(request))
+    etag = variant_etag(entry.etag, encoding)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    headers = {
+        **entry.headers,
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,169 @@
+# round_archive.py
+import os
+import mmap
+import struct
+import pathlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .holder_table import TEAMS, HolderTable, address_to_key
+
+# ----------------------------
+# Config
+# ----------------------------
+ROUND_ARCHIVE_PATH = pathlib.Path(os.getenv("ROUND_ARCHIVE_PATH", "rounds.archive"))
+ROUND_ARCHIVE = os.getenv("ROUND_ARCHIVE", "1") == "1"
+
+# Block: magic | round u32 | count u32 | count * 32-byte keys (sorted) | ceil(count/4) packed teams
+MAGIC = b"PKRND1\0\0"
+BLOCK_HEADER = struct.Struct("<8sII")
+# Index record, appended once its block is on disk: round u32 | offset u64 | count u32
+INDEX_RECORD = struct.Struct("<IQI")
+
+
+def pack_teams(teams: np.ndarray) -> bytes:
+    """Team codes (0..3) at 2 bits each, four rows per byte."""
+    padded = np.zeros((len(teams) + 3) // 4 * 4, dtype=np.uint8)
+    padded[:len(teams)] = teams
+    quads = padded.reshape(-1, 4)
+    return (quads[:, 0] | (quads[:, 1] << 2) | (quads[:, 2] << 4) | (quads[:, 3] << 6)).astype(np.uint8).tobytes()
+
+
+def encode_block(round_number: int, table: HolderTable) -> bytes:
+    """
+    One round as a columnar block: keys sorted bytewise (so a lookup is a
+    binary search straight on the mapped file) and teams bit-packed in the
+    same order. Pubkeys are uniformly random, so general-purpose compression
+    gains nothing on them; packing the team column is where the bytes go.
+    """
+    n = len(table)
+    keys = np.frombuffer(table.keys, dtype="S32") if n else np.zeros(0, dtype="S32")
+    order = np.argsort(keys, kind="stable")
+    return (
+        BLOCK_HEADER.pack(MAGIC, int(round_number), n)
+        + keys[order].tobytes()
+        + pack_teams(table.teams[order])
+    )
+
+
+class RoundArchive:
+    """
+    Append-only archive of every round's holder → team assignment.
+
+      rounds.archive      blocks back to back (see encode_block)
+      rounds.archive.idx  fixed-size (round, offset, count) records
+
+    Readers map the archive read-only and touch only the requested round's
+    pages: ~log2(n) key probes plus one team byte. The index is tiny and
+    reloaded whenever it grows, so follower workers see rounds appended by
+    the leader.
+    """
+
+    def __init__(self, path: pathlib.Path = ROUND_ARCHIVE_PATH):
+        self.path = path
+        self.index_path = path.with_name(path.name + ".idx")
+        self._lock = threading.Lock()
+        self._index: Dict[int, Tuple[int, int]] = {}
+        self._index_size = 0
+        self._mm: Optional[mmap.mmap] = None
+        self._mm_size = 0
+
+    # ---- writing ----
+    def append(self, round_number: int, table: HolderTable) -> None:
+        block = encode_block(round_number, table)
+        with self._lock:
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                f.write(block)
+                f.flush()
+                os.fsync(f.fileno())
+            # The index entry goes last: readers never see a partial block
+            with open(self.index_path, "ab") as f:
+                f.write(INDEX_RECORD.pack(int(round_number), offset, len(table)))
+                f.flush()
+                os.fsync(f.fileno())
+
+    # ---- reading ----
+    def _refresh(self) -> None:
+        try:
+            size = self.index_path.stat().st_size
+        except OSError:
+            return
+        if size != self._index_size:
+            raw = self.index_path.read_bytes()
+            usable = len(raw) - len(raw) % INDEX_RECORD.size
+            for rnd, offset, count in INDEX_RECORD.iter_unpack(raw[:usable]):
+                self._index[rnd] = (offset, count)  # a re-archived round: last one wins
+            self._index_size = usable
+
+    def _mapped(self, end: int) -> Optional[mmap.mmap]:
+        if self._mm is None or self._mm_size < end:
+            if self._mm is not None:
+                self._mm.close()
+            with open(self.path, "rb") as f:
+                self._mm_size = os.fstat(f.fileno()).st_size
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self._mm_size else None
+        return self._mm if self._mm_size >= end else None
+
+    def _block(self, round_number: int) -> Optional[Tuple[mmap.mmap, int, int]]:
+        entry = self._index.get(round_number)
+        if entry is None:
+            self._refresh()
+            entry = self._index.get(round_number)
+            if entry is None:
+                return None
+        offset, count = entry
+        end = offset + BLOCK_HEADER.size + 32 * count + (count + 3) // 4
+        mm = self._mapped(end)
+        if mm is None:
+            return None
+        magic, rnd, n = BLOCK_HEADER.unpack_from(mm, offset)
+        if magic != MAGIC or rnd != round_number or n != count:
+            raise ValueError(f"corrupt archive block for round {round_number}")
+        return mm, offset + BLOCK_HEADER.size, count
+
+    def lookup(self, round_number: int, address: str) -> Optional[str]:
+        """Team of `address` in `round_number`, or None if absent / not archived."""
+        key = address_to_key(address)
+        if key is None:
+            return None
+        with self._lock:
+            block = self._block(round_number)
+            if block is None:
+                return None
+            mm, start, count = block
+            keys = np.frombuffer(mm, dtype="S32", count=count, offset=start)
+            row = int(np.searchsorted(keys, np.array(key, dtype="S32")))
+            if row >= count or mm[start + 32 * row:start + 32 * (row + 1)] != key:
+                return None
+            packed = mm[start + 32 * count + row // 4]
+        return TEAMS[(packed >> (2 * (row % 4))) & 3]
+
+    def has_round(self, round_number: int) -> bool:
+        with self._lock:
+            if round_number not in self._index:
+                self._refresh()
+            return round_number in self._index
+
+    def rounds(self) -> List[int]:
+        with self._lock:
+            self._refresh()
+            return sorted(self._index)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._refresh()
+            try:
+                size = self.path.stat().st_size
+            except OSError:
+                size = 0
+            return {
+                "rounds": len(self._index),
+                "holders": sum(c for _, c in self._index.values()),
+                "bytes": size,
+            }
+
+
+round_archive = RoundArchive()
@@ -0,0 +1,502 @@
+# rpc_client.py
+import os
+import time
+import base64
+import random
+import threading
+import collections
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from solders.transaction import VersionedTransaction
+
+from . import tracing
+from .metrics import RPC_ERRORS, RPC_LATENCY, RPC_RETRIES
+
+# ----------------------------
+# Config
+# ----------------------------
+HELIUS_API_KEY = os.getenv("HELIUS_API_KEY", "").strip()
+MAINNET_RPC = "https://api.mainnet-beta.solana.com"
+# Keep-alive connections per host (covers HELIUS_PAGE_CONCURRENCY / PAYOUT_MAX_INFLIGHT)
+RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", "16"))
+# Provider quota in requests/second (each call in a batch counts); 0 = unlimited
+RPC_RATE_LIMIT = float(os.getenv("RPC_RATE_LIMIT", "0"))
+RPC_BURST = int(os.getenv("RPC_BURST", str(max(1, int(RPC_RATE_LIMIT or 1)))))
+RPC_MAX_RETRIES = int(os.getenv("RPC_MAX_RETRIES", "2"))
+RPC_BACKOFF_BASE = float(os.getenv("RPC_BACKOFF_BASE", "0.1"))
+RPC_BACKOFF_MAX = float(os.getenv("RPC_BACKOFF_MAX", "2.0"))
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "30"))
+# Calls per JSON-RPC batch array
+RPC_BATCH_LIMIT = int(os.getenv("RPC_BATCH_LIMIT", "100"))
+
+# Latency samples kept per method / endpoint for percentiles
+STATS_WINDOW = 512
+# EWMA weight of the newest latency sample when ranking endpoints
+RPC_EWMA_ALPHA = float(os.getenv("RPC_EWMA_ALPHA", "0.2"))
+# Hedge delay used until an endpoint has enough samples for a p95
+RPC_HEDGE_DELAY = float(os.getenv("RPC_HEDGE_DELAY", "0.5"))
+RPC_HEDGE_MIN_SAMPLES = 20
+# Endpoints raced by delay-triggered hedging (failures still fail over to all)
+RPC_HEDGE_LEGS = int(os.getenv("RPC_HEDGE_LEGS", "2"))
+# Latency charged to an endpoint for a failed request
+RPC_FAILURE_PENALTY = float(os.getenv("RPC_FAILURE_PENALTY", "2.0"))
+
+
+def default_endpoints() -> List[str]:
+    """
+    Helius (when HELIUS_API_KEY is set), then RPC_URLS (comma-separated),
+    then SOLANA_RPC_URL; mainnet-beta if none are configured.
+    """
+    urls: List[str] = []
+    if HELIUS_API_KEY:
+        urls.append(f"https://mainnet.helius-rpc.com/?api-key={HELIUS_API_KEY}")
+    urls += [u.strip() for u in os.getenv("RPC_URLS", "").split(",") if u.strip()]
+    if os.getenv("SOLANA_RPC_URL", "").strip():
+        urls.append(os.getenv("SOLANA_RPC_URL", "").strip())
+    return list(dict.fromkeys(urls)) or [MAINNET_RPC]
+
+
+def redact(url: str) -> str:
+    """URL without its query string (API keys live there)."""
+    return url.split("?", 1)[0]
+
+
+def host(url: str) -> str:
+    """Just the host, for metric labels (some providers put the key in the path)."""
+    return url.split("/", 3)[2] if "://" in url else url
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RpcError(RuntimeError):
+    """A JSON-RPC error object returned by the node."""
+
+    def __init__(self, method: str, error: Any):
+        self.method = method
+        self.error = error
+        self.code = error.get("code") if isinstance(error, dict) else None
+        super().__init__(f"RPC error: {error}")
+
+
+class _Retryable(Exception):
+    def __init__(self, cause: Exception, retry_after: Optional[float] = None):
+        super().__init__(str(cause))
+        self.cause = cause
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens/second, at most `capacity` banked."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n: int = 1) -> float:
+        """Take `n` tokens, sleeping as needed; returns seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        # A request larger than the bucket waits for a full bucket and goes into debt
+        need = min(n, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= need:
+                    self._tokens -= n
+                    return waited
+                delay = (need - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class MethodStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.ewma: Optional[float] = None
+        self.samples: Deque[float] = collections.deque(maxlen=STATS_WINDOW)
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self.calls += 1
+        self.errors += 0 if ok else 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.samples.append(seconds)
+        cost = seconds if ok else max(seconds, RPC_FAILURE_PENALTY)
+        self.ewma = cost if self.ewma is None else self.ewma + RPC_EWMA_ALPHA * (cost - self.ewma)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    def as_dict(self) -> Dict:
+        def ms(v: Optional[float]) -> float:
+            return round(v * 1000, 3) if v is not None else 0.0
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avgMs": ms(self.total_seconds / self.calls) if self.calls else 0.0,
+            "ewmaMs": ms(self.ewma),
+            "p50Ms": ms(self.percentile(0.50)),
+            "p95Ms": ms(self.percentile(0.95)),
+            "maxMs": ms(self.max_seconds),
+        }
+
+
+class Endpoint:
+    """One RPC URL with latency stats per method (used to rank and hedge)."""
+
+    def __init__(self, url: str, order: int):
+        self.url = url
+        self.order = order
+        self.overall = MethodStats()
+        self.methods: Dict[str, MethodStats] = collections.defaultdict(MethodStats)
+
+    def record(self, label: str, seconds: float, ok: bool) -> None:
+        self.overall.record(seconds, ok)
+        self.methods[label].record(seconds, ok)
+
+    def expected(self, label: str) -> float:
+        """EWMA latency for `label` (falling back to all methods) used for ranking."""
+        stats = self.methods.get(label)
+        if stats is not None and stats.ewma is not None:
+            return stats.ewma
+        return self.overall.ewma if self.overall.ewma is not None else RPC_HEDGE_DELAY
+
+    def hedge_delay(self, label: str) -> float:
+        """How long to wait for this endpoint before racing another: its p95."""
+        stats = self.methods.get(label)
+        if stats is None or len(stats.samples) < RPC_HEDGE_MIN_SAMPLES:
+            return RPC_HEDGE_DELAY
+        return stats.percentile(0.95)
+
+    def as_dict(self) -> Dict:
+        return {"url": redact(self.url), **self.overall.as_dict()}
+
+
+class RpcClient:
+    """
+    One pooled HTTP client for every Solana JSON-RPC call the backend makes.
+
+      - keep-alive session, RPC_POOL_SIZE connections per host
+      - call() for one method, batch() for many calls in JSON-RPC batch arrays
+      - token-bucket limiter shared by all callers (RPC_RATE_LIMIT)
+      - transport errors, 429 and 5xx retried with full-jitter exponential
+        backoff (Retry-After is honoured); JSON-RPC errors are raised as-is
+      - per-method call/error/retry counts and latency percentiles
+
+    Calls without an explicit `url` go to the endpoint pool, ranked by EWMA
+    latency. Retries fail over to the next endpoint. With hedge=True
+    (idempotent reads) the same request is also fired at the next endpoint
+    once the first has not answered within its p95, and whichever answers
+    first wins. send_transaction() broadcasts to every endpoint.
+    """
+
+    def __init__(
+        self,
+        urls: Optional[Sequence[str]] = None,
+        pool_size: int = RPC_POOL_SIZE,
+        rate_limit: float = RPC_RATE_LIMIT,
+        burst: int = RPC_BURST,
+        max_retries: int = RPC_MAX_RETRIES,
+    ):
+        if isinstance(urls, str):
+            urls = [urls]
+        self.endpoints = [Endpoint(u.strip(), i) for i, u in enumerate(urls or default_endpoints())]
+        self.max_retries = max_retries
+        self.limiter = TokenBucket(rate_limit, burst)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._ids = iter(range(1, 1 << 62))
+        self._lock = threading.Lock()
+        self._stats: Dict[str, MethodStats] = collections.defaultdict(MethodStats)
+        # Legs of hedged requests and broadcasts; losers finish in the background
+        self._legs = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="rpc-leg")
+
+    # ---- internals ----
+    def _next_id(self) -> int:
+        with self._lock:
+            return next(self._ids)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> None:
+        if retry_after is not None:
+            time.sleep(min(retry_after, RPC_BACKOFF_MAX))
+        else:
+            time.sleep(random.uniform(0, min(RPC_BACKOFF_MAX, RPC_BACKOFF_BASE * (2 ** attempt))))
+
+    def _post_once(self, url: str, payload: Any, timeout: float) -> Any:
+        try:
+            resp = self.session.post(url, json=payload, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise _Retryable(e)
+        if resp.status_code in RETRY_STATUS:
+            retry_after = resp.headers.get("Retry-After")
+            try:
+                retry_after = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after = None
+            raise _Retryable(requests.HTTPError(f"HTTP {resp.status_code}: {resp.text[:200]}"), retry_after)
+        resp.raise_for_status()
+        return resp.json()
+
+    def _endpoint(self, url: str) -> Optional[Endpoint]:
+        for ep in self.endpoints:
+            if ep.url == url:
+                return ep
+        return None
+
+    def ranked(self, label: str) -> List[Endpoint]:
+        """Endpoints fastest-first for `label`; ties keep the configured order."""
+        with self._lock:
+            return sorted(self.endpoints, key=lambda ep: (ep.expected(label), ep.order))
+
+    def _send(
+        self,
+        label: str,
+        url: Optional[str],
+        payload: Any,
+        cost: int,
+        timeout: float,
+        retries: Optional[int],
+    ) -> Any:
+        """POST with retries; without `url` each retry fails over to the next-ranked endpoint."""
+        retries = self.max_retries if retries is None else retries
+        targets = [url] if url else [ep.url for ep in self.ranked(label)]
+        for attempt in range(retries + 1):
+            target = targets[attempt % len(targets)]
+            try:
+                return self._send_once(label, target, payload, cost, timeout)
+            except _Retryable as e:
+                if attempt >= retries:
+                    raise e.cause
+                with self._lock:
+                    self._stats[label].retries += 1
+                RPC_RETRIES.inc(method=label)
+                # failing over to a different endpoint does not need to back off
+                if len(targets) == 1 or (attempt + 1) % len(targets) == 0:
+                    self._backoff(attempt, e.retry_after)
+
+    def _send_once(self, label: str, url: str, payload: Any, cost: int, timeout: float) -> Any:
+        self.limiter.acquire(cost)
+        with tracing.span(f"rpc {label}", **{"rpc.method": label, "server.address": host(url), "rpc.calls": cost}):
+            started = time.perf_counter()
+            try:
+                out = self._post_once(url, payload, timeout)
+            except Exception:
+                self._record(label, time.perf_counter() - started, ok=False, url=url)
+                raise
+            self._record(label, time.perf_counter() - started, ok=True, url=url)
+            return out
+
+    def _hedged(self, label: str, payload: Any, cost: int, timeout: float) -> Any:
+        """
+        Race the ranked endpoints: start with the fastest, add the next one
+        when the newest leg outlives its p95 (up to RPC_HEDGE_LEGS) or as soon
+        as a leg fails. First successful answer wins; a JSON-RPC error object
+        counts as a failed leg (another endpoint may serve the method) and is
+        only returned once every leg has failed. `timeout` bounds the whole
+        race, not each leg.
+        """
+        deadline = time.monotonic() + timeout
+        order = self.ranked(label)
+        pending: Dict[Future, Endpoint] = {}
+        launched = 0
+        err: Optional[Exception] = None
+        rejected: Any = None  # the last error object an endpoint answered with
+
+        def launch() -> None:
+            nonlocal launched
+            ep = order[launched]
+            launched += 1
+            left = max(0.001, deadline - time.monotonic())
+            pending[tracing.submit(self._legs, self._send_once, label, ep.url, payload, cost, left)] = ep
+
+        launch()
+        while pending:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                raise TimeoutError(f"{label}: no RPC endpoint answered within {timeout}s")
+            can_hedge = launched < min(len(order), max(1, RPC_HEDGE_LEGS))
+            delay = min(order[launched - 1].hedge_delay(label), left) if can_hedge else left
+            done, _ = wait(list(pending), timeout=delay, return_when=FIRST_COMPLETED)
+            if not done:
+                if not can_hedge or deadline - time.monotonic() <= 0:
+                    continue
+                with self._lock:
+                    self._stats[label].retries += 1
+                RPC_RETRIES.inc(method=label)
+                launch()
+                continue
+            for fut in done:
+                pending.pop(fut)
+                try:
+                    data = fut.result()
+                except _Retryable as e:
+                    err = e.cause
+                    continue
+                except Exception as e:
+                    err = e
+                    continue
+                # Batches answer with an array; a dict with "error" is a rejection
+                if not (isinstance(data, dict) and data.get("error")):
+                    return data
+                rejected = data
+            if launched < len(order) and len(pending) < max(1, RPC_HEDGE_LEGS) and deadline > time.monotonic():
+                launch()
+        if rejected is not None:
+            return rejected
+        raise err if err else RuntimeError(f"{label}: no RPC endpoint answered")
+
+    def _dispatch(
+        self,
+        label: str,
+        payload: Any,
+        cost: int,
+        url: Optional[str],
+        timeout: float,
+        retries: Optional[int],
+        hedge: bool,
+    ) -> Any:
+        if hedge and not url and len(self.endpoints) > 1:
+            return self._hedged(label, payload, cost, timeout)
+        return self._send(label, url, payload, cost, timeout, retries)
+
+    def _record(self, label: str, seconds: float, ok: bool, url: Optional[str] = None) -> None:
+        with self._lock:
+            self._stats[label].record(seconds, ok)
+            ep = self._endpoint(url) if url else None
+            if ep is not None:
+                ep.record(label, seconds, ok)
+        RPC_LATENCY.observe(seconds, method=label, endpoint=host(url) if url else "")
+        if not ok:
+            RPC_ERRORS.inc(method=label, kind="transport")
+
+    # ---- public ----
+    def call(
+        self,
+        method: str,
+        params: Any = None,
+        url: Optional[str] = None,
+        timeout: float = RPC_TIMEOUT,
+        retries: Optional[int] = None,
+        hedge: bool = False,
+    ) -> Any:
+        """
+        `result` of one JSON-RPC call; raises RpcError on an error object.
+        Pass hedge=True only for idempotent reads.
+        """
+        payload = {"jsonrpc": "2.0", "id": self._next_id(), "method": method}
+        if params is not None:
+            payload["params"] = params
+        data = self._dispatch(method, payload, 1, url, timeout, retries, hedge)
+        if data.get("error"):
+            with self._lock:
+                self._stats[method].errors += 1
+            RPC_ERRORS.inc(method=method, kind="rpc")
+            raise RpcError(method, data["error"])
+        return data.get("result")
+
+    def batch(
+        self,
+        calls: Sequence[Tuple[str, Any]],
+        url: Optional[str] = None,
+        timeout: float = RPC_TIMEOUT,
+        retries: Optional[int] = None,
+        hedge: bool = False,
+    ) -> List[Any]:
+        """
+        Results of many (method, params) calls, sent as JSON-RPC batch arrays
+        of up to RPC_BATCH_LIMIT. Each slot is the call's result, or an
+        RpcError instance if that call failed.
+        """
+        out: List[Any] = []
+        for i in range(0, len(calls), RPC_BATCH_LIMIT):
+            chunk = calls[i:i + RPC_BATCH_LIMIT]
+            ids = [self._next_id() for _ in chunk]
+            payload = [
+                {"jsonrpc": "2.0", "id": cid, "method": m, **({"params": p} if p is not None else {})}
+                for cid, (m, p) in zip(ids, chunk)
+            ]
+            label = "batch:" + ",".join(sorted({m for m, _ in chunk}))
+            data = self._dispatch(label, payload, len(chunk), url, timeout, retries, hedge)
+            if isinstance(data, dict):  # whole batch rejected
+                RPC_ERRORS.inc(method=label, kind="rpc")
+                raise RpcError(label, data.get("error"))
+            by_id = {d.get("id"): d for d in data}
+            for cid, (method, _) in zip(ids, chunk):
+                d = by_id.get(cid) or {"error": {"message": "missing from batch response"}}
+                out.append(RpcError(method, d["error"]) if d.get("error") else d.get("result"))
+        return out
+
+    def send_transaction(self, tx: VersionedTransaction, url: Optional[str] = None, timeout: float = 60) -> str:
+        """
+        sendTransaction (base64, confirmed preflight) broadcast to `url` and
+        every pool endpoint at once; returns the signature from the first
+        endpoint that accepts it. A signed transaction lands at most once, so
+        the extra copies only improve the odds it reaches the leader quickly.
+        """
+        params = [
+            base64.b64encode(bytes(tx)).decode(),
+            {"encoding": "base64", "preflightCommitment": "confirmed"},
+        ]
+        urls = list(dict.fromkeys(([url.strip()] if url else []) + [ep.url for ep in self.endpoints]))
+        if len(urls) == 1:
+            sig = self.call("sendTransaction", params, url=urls[0], timeout=timeout)
+            if not sig:
+                raise RuntimeError("RPC returned no signature")
+            return sig
+
+        futures = [tracing.submit(self._legs, self.call, "sendTransaction", params, u, timeout) for u in urls]
+        err: Optional[Exception] = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    sig = fut.result()
+                except Exception as e:
+                    err = e
+                    continue
+                if sig:
+                    return sig
+        raise err if err else RuntimeError("RPC returned no signature")
+
+    def post(self, url: str, timeout: float = 60, **kwargs) -> requests.Response:
+        """Plain POST over the pooled session (non-JSON-RPC APIs, e.g. PumpPortal)."""
+        started = time.perf_counter()
+        ok = False
+        try:
+            resp = self.session.post(url, timeout=timeout, **kwargs)
+            ok = resp.status_code < 400
+            return resp
+        finally:
+            self._record("http:" + host(url) if "://" in url else "http", time.perf_counter() - started, ok)
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: s.as_dict() for name, s in sorted(self._stats.items())}
+
+    def endpoint_stats(self) -> List[Dict]:
+        with self._lock:
+            return [ep.as_dict() for ep in self.endpoints]
+
+
+rpc = RpcClient()
@@ -0,0 +1,68 @@
+# scheduler.py
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+
+class Wakeup:
+    """
+    Lets the round loop sleep until its next wall-clock deadline, or until
+    something pokes it (e.g. a winner was recorded), whichever comes first.
+
+    The deadline is armed with loop.call_at, so an idle loop costs nothing
+    and a transition fires within milliseconds of its deadline.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+        self.deadline: Optional[datetime] = None
+        self.wakeups = 0
+        # How late the last deadline wakeup ran, in milliseconds
+        self.last_lag_ms: Optional[float] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._event = asyncio.Event()
+
+    def clear(self) -> None:
+        """Call before evaluating state; a poke after this makes wait() return at once."""
+        self._event.clear()
+
+    def poke(self) -> None:
+        """Wake the waiting loop now. Safe from any thread."""
+        if self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            pass  # loop closed (shutdown)
+
+    async def wait(self, deadline: Optional[datetime]) -> None:
+        """Sleep until `deadline` (None: until poked)."""
+        self.deadline = deadline
+        handle = None
+        if deadline is not None:
+            delay = (deadline - datetime.now(timezone.utc)).total_seconds()
+            handle = self._loop.call_at(self._loop.time() + max(0.0, delay), self._event.set)
+        try:
+            await self._event.wait()
+        finally:
+            if handle is not None:
+                handle.cancel()
+            self.wakeups += 1
+            if deadline is not None:
+                lag = (datetime.now(timezone.utc) - deadline).total_seconds() * 1000
+                if lag >= 0:
+                    self.last_lag_ms = round(lag, 3)
+            self.deadline = None
+
+    def status(self) -> Dict:
+        return {
+            "nextDeadline": self.deadline.isoformat() if self.deadline else None,
+            "wakeups": self.wakeups,
+            "lastLagMs": self.last_lag_ms,
+        }
+
+
+wakeup = Wakeup()
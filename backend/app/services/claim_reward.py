@@ -1,16 +1,13 @@
 # claim_rewards.py
 import os
-import json
-import requests
 from typing import Optional
 
 from solders.transaction import VersionedTransaction
 from solders.keypair import Keypair
-from solders.commitment_config import CommitmentLevel
-from solders.rpc.requests import SendVersionedTransaction
-from solders.rpc.config import RpcSendTransactionConfig
 
-PUMPPORTAL_LOCAL_URL = "https://pumpportal.fun/api/trade-local"
+from ..rpc_client import RpcError, rpc
+
+PUMPPORTAL_LOCAL_URL = os.getenv("PUMPPORTAL_URL", "https://pumpportal.fun/api/trade-local")
 
 def _env(name: str, default: str = "") -> str:
     v = os.getenv(name, default)
@@ -30,7 +27,8 @@ def collect_creator_fee_local(
     """
     wallet_address = wallet_address or _env("WALLET_ADDRESS")
     wallet_private_key = wallet_private_key or _env("WALLET_PRIVATE_KEY")
-    rpc_url = (rpc_url or _env("SOLANA_RPC_URL") or "https://api.mainnet-beta.solana.com").strip()
+    # None: the shared RPC endpoint pool (SOLANA_RPC_URL / RPC_URLS / Helius)
+    rpc_url = rpc_url.strip() if rpc_url else None
     priority_fee = float(priority_fee if priority_fee is not None else (_env("PRIORITY_FEE") or 0.000001))
 
     if not wallet_address:
@@ -40,8 +38,8 @@ def collect_creator_fee_local(
 
     # 1) Ask PumpPortal for a prebuilt local transaction (binary)
     try:
-        resp = requests.post(
-            url=PUMPPORTAL_LOCAL_URL,
+        resp = rpc.post(
+            PUMPPORTAL_LOCAL_URL,
             data={
                 "publicKey": wallet_address,
                 "action": "collectCreatorFee",
@@ -70,34 +68,14 @@ def collect_creator_fee_local(
     except Exception as e:
         raise RuntimeError(f"Failed to sign transaction with provided private key: {e}")
 
-    # 3) Send to your RPC
+    # 3) Send over the shared RPC client; RPC errors surface as RpcError
     try:
-        commitment = CommitmentLevel.Confirmed
-        cfg = RpcSendTransactionConfig(preflight_commitment=commitment)
-        send_req = SendVersionedTransaction(tx, cfg)
-        send_json = send_req.to_json()
-
-        send_resp = requests.post(
-            url=rpc_url,
-            headers={"Content-Type": "application/json"},
-            data=send_json,
-            timeout=60,
-        )
-        send_resp.raise_for_status()
-        send_data = send_resp.json()
+        return rpc.send_transaction(tx, url=rpc_url)
+    except RpcError:
+        raise
     except Exception as e:
         raise RuntimeError(f"Failed to send transaction to RPC: {e}")
 
-    # 4) Parse signature or surface RPC error
-    if "error" in send_data and send_data["error"]:
-        raise RuntimeError(f"RPC error: {json.dumps(send_data['error'])}")
-
-    sig = send_data.get("result")
-    if not sig:
-        raise RuntimeError(f"RPC returned no signature: {send_data}")
-
-    return sig
-
 
 if __name__ == "__main__":
     try:
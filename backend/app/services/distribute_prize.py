@@ -1,18 +1,15 @@
 # distribute_prize.py
 import os
-import json
-import requests
-from typing import List, Optional, Union
-from solders.transaction import VersionedTransaction
-from solders.keypair import Keypair
-from solders.commitment_config import CommitmentLevel
-from solders.rpc.requests import SendVersionedTransaction
-from solders.rpc.config import RpcSendTransactionConfig
+from typing import Optional
 
-from ..models import Holder, PayoutPlan
-from ..state_store import load_state, save_state
+from ..state_store import STATE_LOCK, load_state, save_state, holder_table, is_demo_table
+from .payout_engine import PayoutEngine, PayoutResult, build_via_pumpportal, load_keypair
+from .payout_planner import plan_payout
+from .tx_builder import blockhash_cache, build_transfer_message
 
-PUMPPORTAL_LOCAL_URL = "https://pumpportal.fun/api/trade-local"
+# "local": system transfers built here against a cached blockhash
+# "pumpportal": each batch built by PumpPortal's distributePrize action
+PAYOUT_BUILDER = os.getenv("PAYOUT_BUILDER", "local").strip().lower()
 
 def _env(name: str, default: str = "") -> str:
     v = os.getenv(name, default)
@@ -28,14 +25,15 @@ def distribute_prize_to_team(
     wallet_private_key: Optional[str] = None,
     rpc_url: Optional[str] = None,
     priority_fee: Optional[float] = None,
-) -> str:
+) -> PayoutResult:
     """
     Distribute prize to all holders of the winning team.
-    Returns the transaction signature.
+    Recipients are paid in batches (see payout_engine); returns the PayoutResult.
     """
     wallet_address = wallet_address or _env("WALLET_ADDRESS")
     wallet_private_key = wallet_private_key or _env("WALLET_PRIVATE_KEY")
-    rpc_url = (rpc_url or _env("SOLANA_RPC_URL") or "https://api.mainnet-beta.solana.com").strip()
+    # None: the shared RPC endpoint pool (SOLANA_RPC_URL / RPC_URLS / Helius)
+    rpc_url = rpc_url.strip() if rpc_url else None
     priority_fee = float(priority_fee if priority_fee is not None else (_env("PRIORITY_FEE") or 0.000001))
 
     if not wallet_address:
@@ -43,92 +41,59 @@ def distribute_prize_to_team(
     if not wallet_private_key:
         raise ValueError("WALLET_PRIVATE_KEY is required (base58 private key).")
 
-    # Get current state to find winning team holders
-    data = load_state()
-    holders = data["holders"]["items"]
-    
-    # Filter holders by winning team
-    winning_team_holders = [h for h in holders if h["team"] == winning_team]
+    # Winning team holders from the current holder table, with their token balances
+    table = holder_table()
+    if is_demo_table(table):
+        # The snapshot failed with nothing cached; these addresses have no owner
+        raise ValueError("Current holders are the demo pool; refusing to pay out")
+    winning_team_holders = table.addresses_for_team(winning_team)
     
     if not winning_team_holders:
         raise ValueError(f"No holders found for winning team: {winning_team}")
     
-    # Calculate prize per holder (equal distribution)
-    prize_per_holder = prize_lamports // len(winning_team_holders)
-    
-    if prize_per_holder == 0:
-        raise ValueError(f"Prize amount {prize_lamports} is too small to distribute among {len(winning_team_holders)} holders")
-    
-    # Create payout plan
-    payout_plan = PayoutPlan(
-        round=round_number,
-        team=winning_team,
-        recipients=[h["address"] for h in winning_team_holders],
-        totalLamports=prize_per_holder * len(winning_team_holders)
+    # Split the prize (PAYOUT_SPLIT: equal / pro_rata / capped / tiered)
+    payout_plan = plan_payout(
+        round_number,
+        winning_team,
+        winning_team_holders,
+        table.amounts_for_team(winning_team),
+        prize_lamports,
     )
     
-    # Build transaction via PumpPortal
-    try:
-        resp = requests.post(
-            url=PUMPPORTAL_LOCAL_URL,
-            data={
-                "publicKey": wallet_address,
-                "action": "distributePrize",
-                "recipients": payout_plan.recipients,
-                "amounts": [prize_per_holder] * len(winning_team_holders),
-                "priorityFee": priority_fee,
-            },
-            timeout=60,
-        )
-    except Exception as e:
-        raise RuntimeError(f"Failed to reach PumpPortal: {e}")
-
-    if resp.status_code != 200:
-        raise RuntimeError(f"PumpPortal error {resp.status_code}: {resp.text}")
-
-    # Deserialize and sign transaction
-    try:
-        unsigned_bytes = resp.content
-        tx = VersionedTransaction.deserialize(unsigned_bytes)
-    except Exception as e:
-        raise RuntimeError(f"Failed to deserialize unsigned transaction: {e}")
-
-    try:
-        signer = Keypair.from_base58_string(wallet_private_key)
-        tx.sign([signer])
-    except Exception as e:
-        raise RuntimeError(f"Failed to sign transaction with provided private key: {e}")
+    if not payout_plan.recipients:
+        raise ValueError(f"Prize amount {prize_lamports} is too small to distribute among {len(winning_team_holders)} holders")
 
-    # Send to RPC
     try:
-        commitment = CommitmentLevel.Confirmed
-        cfg = RpcSendTransactionConfig(preflight_commitment=commitment)
-        send_req = SendVersionedTransaction(tx, cfg)
-        send_json = send_req.to_json()
-
-        send_resp = requests.post(
-            url=rpc_url,
-            headers={"Content-Type": "application/json"},
-            data=send_json,
-            timeout=60,
-        )
-        send_resp.raise_for_status()
-        send_data = send_resp.json()
+        signer = load_keypair(wallet_private_key)
     except Exception as e:
-        raise RuntimeError(f"Failed to send transaction to RPC: {e}")
-
-    # Parse signature or surface RPC error
-    if "error" in send_data and send_data["error"]:
-        raise RuntimeError(f"RPC error: {json.dumps(send_data['error'])}")
-
-    sig = send_data.get("result")
-    if not sig:
-        raise RuntimeError(f"RPC returned no signature: {send_data}")
-
-    return sig
+        raise RuntimeError(f"Failed to load keypair from provided private key: {e}")
+
+    if PAYOUT_BUILDER == "pumpportal":
+        build_tx = lambda transfers: build_via_pumpportal(wallet_address, transfers, priority_fee)
+        last_valid_height = None
+    else:
+        blockhashes = blockhash_cache(rpc_url)
+        build_tx = lambda transfers: build_transfer_message(signer.pubkey(), transfers, blockhashes.get(), priority_fee)
+        last_valid_height = blockhashes.last_valid_height
+
+    engine = PayoutEngine(
+        build_tx=build_tx,
+        keypair=signer,
+        rpc_url=rpc_url,
+        last_valid_height=last_valid_height,
+    )
+    result = engine.run(payout_plan)
+    print(
+        f"Payout round {round_number}: {len(result.confirmed)}/{len(result.batches)} batches confirmed, "
+        f"{result.paid_lamports}/{payout_plan.totalLamports} lamports in {result.elapsed:.1f}s"
+    )
+    for batch in result.failed:
+        print(f"Payout batch {batch.index} {batch.status} after {batch.attempts} attempts: {batch.error} "
+              f"(signatures: {', '.join(batch.signatures) or 'none'})")
+    return result
 
 
-def distribute_prize_from_state() -> str:
+def distribute_prize_from_state() -> PayoutResult:
     """
     Distribute prize using current state data.
     This is the main function to call from the round loop.
@@ -150,22 +115,24 @@ def distribute_prize_from_state() -> str:
         raise ValueError("No prize to distribute")
     
     # Distribute the prize
-    tx_signature = distribute_prize_to_team(
+    result = distribute_prize_to_team(
         round_number=round_number,
         winning_team=winning_team,
         prize_lamports=prize_lamports
     )
     
-    # Clear the prize pool after distribution
-    state["prizePoolLamports"] = 0
-    save_state(data)
+    # Take only what was actually paid out of the pool; failed batches stay owed
+    with STATE_LOCK:
+        state["prizePoolLamports"] = max(0, state.get("prizePoolLamports", 0) - result.paid_lamports)
+        save_state(data)
     
-    return tx_signature
+    return result
 
 
 if __name__ == "__main__":
     try:
-        sig = distribute_prize_from_state()
-        print(f"Prize distribution transaction: https://solscan.io/tx/{sig}")
+        result = distribute_prize_from_state()
+        for sig in result.signatures:
+            print(f"Prize distribution transaction: https://solscan.io/tx/{sig}")
     except Exception as e:
         print(f"[distribute_prize] Error: {e}")
@@ -0,0 +1,335 @@
+# payout_engine.py
+import os
+import json
+import time
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from solders.hash import Hash
+from solders.message import MessageV0
+from solders.transaction import VersionedTransaction
+from solders.keypair import Keypair
+
+from .. import tracing
+from ..metrics import PAYOUT_BATCHES, PAYOUT_CONFIRM, PAYOUT_LAMPORTS, PAYOUT_RUN, PAYOUT_SEND
+from ..models import PayoutPlan
+from ..rpc_client import RpcError, rpc
+from .tx_builder import fetch_latest_blockhash
+
+PUMPPORTAL_LOCAL_URL = os.getenv("PUMPPORTAL_URL", "https://pumpportal.fun/api/trade-local")
+
+# ----------------------------
+# Config
+# ----------------------------
+# Transfers per transaction. A v0 transaction is capped at 1232 bytes; each
+# transfer adds a 32-byte account key plus a ~12-byte instruction, so ~20
+# leaves room for the signature, payer, blockhash and compute-budget ixs.
+PAYOUT_BATCH_SIZE = int(os.getenv("PAYOUT_BATCH_SIZE", "20"))
+# Batches being built / sent at the same time
+PAYOUT_MAX_INFLIGHT = int(os.getenv("PAYOUT_MAX_INFLIGHT", "8"))
+PAYOUT_MAX_ATTEMPTS = int(os.getenv("PAYOUT_MAX_ATTEMPTS", "3"))
+# Upper bound on waiting for confirmations. A sent batch is only rebuilt once
+# its blockhash has expired (block height past lastValidBlockHeight, ~60-90s);
+# one still undecided at this timeout is reported "unknown" and never resent.
+PAYOUT_CONFIRM_TIMEOUT = float(os.getenv("PAYOUT_CONFIRM_TIMEOUT", "120"))
+CONFIRM_POLL_SECONDS = 1.0
+# getSignatureStatuses accepts at most 256 signatures per call
+STATUS_CHUNK = 256
+
+Transfer = Tuple[str, int]  # (recipient address, lamports)
+
+
+@functools.lru_cache(maxsize=4)
+def load_keypair(private_key: str) -> Keypair:
+    """Parse a base58 private key once and reuse the Keypair."""
+    return Keypair.from_base58_string(private_key)
+
+
+# ----------------------------
+# RPC helpers
+# ----------------------------
+def build_via_pumpportal(wallet_address: str, transfers: Sequence[Transfer], priority_fee: float) -> MessageV0:
+    """Ask PumpPortal for an unsigned distributePrize transaction; returns its message."""
+    try:
+        with tracing.span("pumpportal.trade_local", **{"payout.transfers": len(transfers)}):
+            resp = rpc.post(
+                PUMPPORTAL_LOCAL_URL,
+                data={
+                    "publicKey": wallet_address,
+                    "action": "distributePrize",
+                    "recipients": [r for r, _ in transfers],
+                    "amounts": [a for _, a in transfers],
+                    "priorityFee": priority_fee,
+                },
+                timeout=60,
+            )
+    except Exception as e:
+        raise RuntimeError(f"Failed to reach PumpPortal: {e}")
+
+    if resp.status_code != 200:
+        raise RuntimeError(f"PumpPortal error {resp.status_code}: {resp.text}")
+
+    try:
+        return VersionedTransaction.deserialize(resp.content).message
+    except Exception as e:
+        raise RuntimeError(f"Failed to deserialize unsigned transaction: {e}")
+
+
+def send_transaction(rpc_url: Optional[str], tx: VersionedTransaction) -> str:
+    """Broadcast a signed transaction (see RpcClient.send_transaction); returns its signature."""
+    try:
+        return rpc.send_transaction(tx, url=rpc_url)
+    except RpcError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Failed to send transaction to RPC: {e}")
+
+
+def get_block_height(rpc_url: Optional[str]) -> int:
+    """Current block height at confirmed commitment."""
+    return int(rpc.call("getBlockHeight", [{"commitment": "confirmed"}], url=rpc_url, timeout=10, hedge=True))
+
+
+def latest_valid_height(rpc_url: Optional[str]) -> int:
+    """
+    lastValidBlockHeight of the newest blockhash. A message built earlier
+    (e.g. by PumpPortal) uses a blockhash no newer than this, so it is a
+    safe upper bound on when that message expires.
+    """
+    return fetch_latest_blockhash(rpc_url)[1]
+
+
+def get_signature_statuses(rpc_url: Optional[str], signatures: Sequence[str]) -> List[Optional[Dict]]:
+    """getSignatureStatuses for any number of signatures, one batched request."""
+    calls = [
+        ("getSignatureStatuses", [list(signatures[i:i + STATUS_CHUNK]), {"searchTransactionHistory": False}])
+        for i in range(0, len(signatures), STATUS_CHUNK)
+    ]
+    out: List[Optional[Dict]] = []
+    for result in rpc.batch(calls, url=rpc_url, hedge=True):
+        if isinstance(result, RpcError):
+            raise result
+        out.extend(result["value"])
+    return out
+
+
+# ----------------------------
+# Batches
+# ----------------------------
+class PayoutBatch:
+    def __init__(self, index: int, transfers: List[Transfer]):
+        self.index = index
+        self.transfers = transfers
+        # pending | sent | confirmed | failed | unknown. "failed" means the batch
+        # provably did not land and may be rebuilt; "unknown" never is.
+        self.status = "pending"
+        self.signature: Optional[str] = None
+        self.last_valid_block_height: Optional[int] = None
+        self.signatures: List[str] = []  # every attempt's, oldest first
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.sent_at = 0.0
+        self.confirmed_at = 0.0
+
+    @property
+    def lamports(self) -> int:
+        return sum(a for _, a in self.transfers)
+
+    def as_dict(self) -> Dict:
+        return {
+            "index": self.index,
+            "recipients": len(self.transfers),
+            "lamports": self.lamports,
+            "status": self.status,
+            "signature": self.signature,
+            "signatures": self.signatures,
+            "attempts": self.attempts,
+            "error": self.error,
+        }
+
+
+class PayoutResult:
+    def __init__(self, plan: PayoutPlan, batches: List[PayoutBatch], elapsed: float):
+        self.plan = plan
+        self.batches = batches
+        self.elapsed = elapsed
+
+    @property
+    def confirmed(self) -> List[PayoutBatch]:
+        return [b for b in self.batches if b.status == "confirmed"]
+
+    @property
+    def failed(self) -> List[PayoutBatch]:
+        return [b for b in self.batches if b.status != "confirmed"]
+
+    @property
+    def signatures(self) -> List[str]:
+        return [b.signature for b in self.confirmed if b.signature]
+
+    @property
+    def paid_lamports(self) -> int:
+        return sum(b.lamports for b in self.confirmed)
+
+
+def plan_transfers(plan: PayoutPlan) -> List[Transfer]:
+    """
+    Per-recipient lamports: plan.amounts when the planner set them (see
+    payout_planner), otherwise an equal share of plan.totalLamports.
+    """
+    if not plan.recipients:
+        return []
+    if plan.amounts is not None:
+        return [(r, a) for r, a in zip(plan.recipients, plan.amounts) if a > 0]
+    share = plan.totalLamports // len(plan.recipients)
+    return [(r, share) for r in plan.recipients]
+
+
+def split_batches(transfers: List[Transfer], batch_size: int = PAYOUT_BATCH_SIZE) -> List[PayoutBatch]:
+    return [
+        PayoutBatch(i, transfers[start:start + batch_size])
+        for i, start in enumerate(range(0, len(transfers), batch_size))
+    ]
+
+
+class PayoutEngine:
+    """
+    Pays a PayoutPlan out in size-bounded transactions.
+
+    `build_tx` turns a batch of transfers into an unsigned message (built
+    locally by tx_builder, or by PumpPortal). Batches are built, signed with
+    one cached Keypair and sent with at most `max_inflight` in flight. Their
+    signatures are then confirmed in bulk with getSignatureStatuses.
+
+    A signed transaction can land even when sending it raised (a node may
+    have accepted it before the HTTP call timed out), so every signed
+    attempt is tracked with the lastValidBlockHeight of its blockhash and
+    polled until it either confirms or the block height passes that
+    height. Only then, or after an on-chain error or a failure before
+    signing, is the batch rebuilt with a fresh transaction, up to
+    `max_attempts` times. `last_valid_height` maps a message's blockhash to
+    its lastValidBlockHeight (BlockhashCache.last_valid_height); without it
+    the newest blockhash's height is used as an upper bound.
+    """
+
+    def __init__(
+        self,
+        build_tx: Callable[[Sequence[Transfer]], MessageV0],
+        keypair: Keypair,
+        rpc_url: Optional[str],
+        batch_size: int = PAYOUT_BATCH_SIZE,
+        max_inflight: int = PAYOUT_MAX_INFLIGHT,
+        max_attempts: int = PAYOUT_MAX_ATTEMPTS,
+        confirm_timeout: float = PAYOUT_CONFIRM_TIMEOUT,
+        send_tx: Callable[[Optional[str], VersionedTransaction], str] = send_transaction,
+        get_statuses: Callable[[Optional[str], Sequence[str]], List[Optional[Dict]]] = get_signature_statuses,
+        get_height: Callable[[Optional[str]], int] = get_block_height,
+        last_valid_height: Optional[Callable[[Hash], Optional[int]]] = None,
+        latest_height: Callable[[Optional[str]], int] = latest_valid_height,
+    ):
+        self.build_tx = build_tx
+        self.keypair = keypair
+        self.rpc_url = rpc_url
+        self.batch_size = batch_size
+        self.max_inflight = max_inflight
+        self.max_attempts = max_attempts
+        self.confirm_timeout = confirm_timeout
+        self.send_tx = send_tx
+        self.get_statuses = get_statuses
+        self.get_height = get_height
+        self.last_valid_height = last_valid_height
+        self.latest_height = latest_height
+
+    def _send(self, batch: PayoutBatch) -> None:
+        batch.attempts += 1
+        started = time.monotonic()
+        with tracing.span("payout.send_batch", **{"payout.batch": batch.index, "payout.attempt": batch.attempts,
+                                                  "payout.transfers": len(batch.transfers)}) as sp:
+            try:
+                message = self.build_tx(batch.transfers)
+                height = self.last_valid_height(message.recent_blockhash) if self.last_valid_height else None
+                if height is None:
+                    height = self.latest_height(self.rpc_url)
+                tx = VersionedTransaction(message, [self.keypair])
+            except Exception as e:
+                # Nothing was signed, so nothing can land: safe to rebuild
+                batch.status = "failed"
+                batch.error = str(e)
+                sp.record_exception(e)
+                PAYOUT_SEND.observe(time.monotonic() - started, outcome="failed")
+                return
+            batch.signature = str(tx.signatures[0])
+            batch.signatures.append(batch.signature)
+            batch.last_valid_block_height = height
+            batch.status = "sent"
+            batch.error = None
+            batch.sent_at = time.monotonic()
+            outcome = "sent"
+            try:
+                self.send_tx(self.rpc_url, tx)
+            except Exception as e:
+                # It may still have reached a node: confirm it like any other
+                batch.error = f"send error: {e}"
+                outcome = "error"
+                sp.record_exception(e)
+        PAYOUT_SEND.observe(time.monotonic() - started, outcome=outcome)
+
+    def _confirm(self, batches: List[PayoutBatch]) -> None:
+        with tracing.span("payout.confirm", **{"payout.batches": len(batches)}):
+            self._confirm_batches(batches)
+
+    def _confirm_batches(self, batches: List[PayoutBatch]) -> None:
+        deadline = time.monotonic() + self.confirm_timeout
+        waiting = [b for b in batches if b.status == "sent"]
+        while waiting:
+            try:
+                # Height first: once it is past a batch's lastValidBlockHeight,
+                # statuses read afterwards show everything that could ever land
+                height = self.get_height(self.rpc_url)
+                statuses = self.get_statuses(self.rpc_url, [b.signature for b in waiting])
+            except Exception:
+                height, statuses = None, [None] * len(waiting)
+            still = []
+            for batch, st in zip(waiting, statuses):
+                if st is None:
+                    if height is not None and height > batch.last_valid_block_height:
+                        batch.status = "failed"
+                        batch.error = f"blockhash expired before confirmation ({batch.error or 'not seen'})"
+                    else:
+                        still.append(batch)
+                elif st.get("err"):
+                    batch.status = "failed"
+                    batch.error = f"on-chain error: {json.dumps(st['err'])}"
+                elif st.get("confirmationStatus") in ("confirmed", "finalized"):
+                    batch.status = "confirmed"
+                    batch.error = None
+                    batch.confirmed_at = time.monotonic()
+                    PAYOUT_CONFIRM.observe(batch.confirmed_at - batch.sent_at)
+                else:
+                    still.append(batch)  # processed, not yet confirmed
+            waiting = still
+            if not waiting or time.monotonic() >= deadline:
+                break
+            time.sleep(CONFIRM_POLL_SECONDS)
+        for batch in waiting:
+            batch.status = "unknown"
+            batch.error = f"not confirmed before timeout and may still land; not resent ({batch.error or 'not seen'})"
+
+    def run(self, plan: PayoutPlan, transfers: Optional[List[Transfer]] = None) -> PayoutResult:
+        started = time.monotonic()
+        batches = split_batches(transfers if transfers is not None else plan_transfers(plan), self.batch_size)
+        with tracing.span("payout.run", **{"payout.batches": len(batches), "payout.lamports": plan.totalLamports}), \
+                ThreadPoolExecutor(max_workers=self.max_inflight, thread_name_prefix="payout") as pool:
+            for _ in range(self.max_attempts):
+                todo = [b for b in batches if b.status in ("pending", "failed")]
+                if not todo:
+                    break
+                for fut in [tracing.submit(pool, self._send, b) for b in todo]:
+                    fut.result()
+                self._confirm(todo)
+        result = PayoutResult(plan, batches, time.monotonic() - started)
+        PAYOUT_RUN.observe(result.elapsed)
+        for batch in batches:
+            PAYOUT_BATCHES.inc(status=batch.status)
+        PAYOUT_LAMPORTS.inc(result.paid_lamports)
+        return result
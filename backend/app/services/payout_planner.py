@@ -0,0 +1,197 @@
+# payout_planner.py
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..models import PayoutPlan
+
+# ----------------------------
+# Config
+# ----------------------------
+# How the prize is split among the winning team:
+#   equal     same share for everyone
+#   pro_rata  proportional to token balance
+#   capped    pro rata, but nobody gets more than PAYOUT_CAP_BPS of the prize
+#   tiered    weight per balance tier (PAYOUT_TIERS)
+PAYOUT_SPLIT = os.getenv("PAYOUT_SPLIT", "equal").strip().lower()
+PAYOUT_CAP_BPS = int(os.getenv("PAYOUT_CAP_BPS", "1000"))
+# "min_balance:weight,..." in raw token units; holders below the first tier get nothing
+PAYOUT_TIERS = os.getenv("PAYOUT_TIERS", "1:1,1000000000:2,10000000000:3,100000000000:4")
+
+SPLITS = ("equal", "pro_rata", "capped", "tiered")
+U64 = np.uint64
+
+
+def parse_tiers(spec: str) -> Tuple[np.ndarray, np.ndarray]:
+    """"min:weight,..." -> (ascending minimum balances, weights), both u64."""
+    tiers = sorted(
+        (int(lo), int(w)) for lo, w in (part.split(":") for part in spec.replace(" ", "").split(",") if part)
+    )
+    if not tiers:
+        raise ValueError("PAYOUT_TIERS is empty")
+    return np.array([t[0] for t in tiers], dtype=U64), np.array([t[1] for t in tiers], dtype=U64)
+
+
+def exact_sum(values: np.ndarray) -> int:
+    """Sum of a u64 array as a Python int, without wrapping past 2**64."""
+    values = np.asarray(values, dtype=U64)
+    hi = int((values >> U64(32)).sum(dtype=U64))
+    lo = int((values & U64(0xFFFFFFFF)).sum(dtype=U64))
+    return (hi << 32) + lo
+
+
+# ----------------------------
+# Weights
+# ----------------------------
+def tier_weights(balances: np.ndarray, tiers: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    mins, weights = tiers
+    idx = np.searchsorted(mins, balances, side="right")  # 0 = below the first tier
+    return np.concatenate([np.zeros(1, dtype=U64), weights])[idx]
+
+
+def capped_weights(balances: np.ndarray, cap_bps: int) -> np.ndarray:
+    """
+    Balances clipped at the largest level `c` for which no clipped balance
+    is more than cap_bps of the clipped total, i.e.
+    c * 10000 <= cap_bps * sum(min(b, c)). Whatever is clipped off the top
+    holders goes to everyone else pro rata. With fewer than 10000 / cap_bps
+    holders the cap cannot hold and everyone gets an equal weight.
+    """
+    n = len(balances)
+    if n == 0 or cap_bps * n < 10000:
+        return np.ones(n, dtype=U64)
+    s = np.sort(balances)
+    prefix = np.concatenate([np.zeros(1, dtype=U64), np.cumsum(s, dtype=U64)])
+
+    def fits(c: int) -> bool:
+        j = int(np.searchsorted(s, U64(c), side="left"))  # holders below c keep their balance
+        return (int(prefix[j]) + (n - j) * c) * cap_bps >= c * 10000
+
+    hi = int(s[-1])
+    if fits(hi):
+        return balances.copy()  # the cap does not bind
+    lo = 1  # fits(1) holds since cap_bps * n >= 10000
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if fits(mid):
+            lo = mid
+        else:
+            hi = mid
+    return np.minimum(balances, U64(lo))
+
+
+def payout_weights(
+    balances: Optional[np.ndarray],
+    n: int,
+    split: str = PAYOUT_SPLIT,
+    cap_bps: int = PAYOUT_CAP_BPS,
+    tiers: str = PAYOUT_TIERS,
+) -> np.ndarray:
+    if split not in SPLITS:
+        raise ValueError(f"unknown PAYOUT_SPLIT {split!r}; expected one of {', '.join(SPLITS)}")
+    if split != "equal" and balances is None:
+        print(f"No token balances in this snapshot; paying an equal split instead of {split}")
+        split = "equal"
+    if split == "equal":
+        return np.ones(n, dtype=U64)
+    balances = np.asarray(balances, dtype=U64)
+    if split == "pro_rata":
+        weights = balances
+    elif split == "capped":
+        weights = capped_weights(balances, cap_bps)
+    else:
+        weights = tier_weights(balances, parse_tiers(tiers))
+    if not weights.any():
+        return np.ones(n, dtype=U64)  # nobody qualifies: fall back to equal
+    return weights
+
+
+# ----------------------------
+# Allocation
+# ----------------------------
+def floor_shares(weights: np.ndarray, total: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (floor(total * w / W), total * w mod W) per weight, W = sum(weights),
+    in exact integer arithmetic.
+
+    total * w overflows u64 for real prizes and balances, so unless
+    total * W fits outright, the quotient is estimated in float64 (off by
+    at most a few units while total < 2**52) and corrected with the
+    remainder, which is computed exactly in wrapping u64 arithmetic and
+    fits i64 while W < 2**61. Outside those bounds it falls back to Python
+    integers (and returns the remainders as an object array).
+    """
+    weights = np.asarray(weights, dtype=U64)
+    big_w = exact_sum(weights)
+    if total * big_w < 2 ** 64:
+        product = weights * U64(total)
+        return product // U64(big_w), product % U64(big_w)
+    if total < 2 ** 52 and big_w < 2 ** 61:
+        q = np.floor(weights.astype(np.float64) * (total / big_w)).astype(np.int64)
+        np.clip(q, 0, total, out=q)
+        with np.errstate(over="ignore"):
+            r = (weights * U64(total) - q.astype(U64) * U64(big_w)).view(np.int64)
+        step = np.int64(big_w)
+        while True:
+            low, high = r < 0, r >= step
+            if not (low.any() or high.any()):
+                break
+            q -= low
+            r += low * step
+            q += high
+            r -= high * step
+        return q.astype(U64), r.astype(U64)
+    product = weights.astype(object) * total
+    # remainders can reach W, which may not fit u64: leave them as Python ints
+    return np.array((product // big_w).tolist(), dtype=U64), product % big_w
+
+
+def largest_remainder(weights: np.ndarray, total: int) -> np.ndarray:
+    """
+    Split `total` lamports in proportion to `weights`: everyone gets the
+    floor of their exact share, and the lamports left over go one each to
+    the largest remainders (ties to the earlier recipient). The result
+    sums to exactly `total`.
+    """
+    n = len(weights)
+    if n == 0 or total <= 0:
+        return np.zeros(n, dtype=U64)
+    amounts, remainders = floor_shares(weights, total)
+    left = total - exact_sum(amounts)
+    if left:
+        kth = np.partition(remainders, n - left)[n - left]  # the left-th largest remainder
+        above = np.flatnonzero(remainders > kth)
+        ties = np.flatnonzero(remainders == kth)[:left - len(above)]
+        amounts[above] += U64(1)
+        amounts[ties] += U64(1)
+    return amounts
+
+
+def plan_payout(
+    round_number: int,
+    team: str,
+    recipients: Sequence[str],
+    balances: Optional[np.ndarray],
+    prize_lamports: int,
+    split: str = PAYOUT_SPLIT,
+    cap_bps: int = PAYOUT_CAP_BPS,
+    tiers: str = PAYOUT_TIERS,
+) -> PayoutPlan:
+    """
+    PayoutPlan with per-recipient amounts summing to exactly
+    `prize_lamports`. `balances` are the recipients' raw token balances
+    (None when the snapshot did not have them); recipients whose share
+    rounds to zero are left out.
+    """
+    weights = payout_weights(balances, len(recipients), split, cap_bps, tiers)
+    amounts = largest_remainder(weights, int(prize_lamports))
+    keep = amounts > 0
+    paid: List[str] = np.asarray(recipients, dtype=object)[keep].tolist() if len(recipients) else []
+    return PayoutPlan(
+        round=round_number,
+        team=team,
+        recipients=paid,
+        totalLamports=exact_sum(amounts),
+        amounts=amounts[keep].tolist(),
+    )
@@ -0,0 +1,151 @@
+# tx_builder.py
+import os
+import time
+import threading
+import collections
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from solders.hash import Hash
+from solders.pubkey import Pubkey
+from solders.message import MessageV0
+from solders.instruction import Instruction
+from solders.system_program import TransferParams, transfer
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+
+from ..rpc_client import rpc
+
+# ----------------------------
+# Config
+# ----------------------------
+# A blockhash is accepted for ~150 blocks (60-90s); refresh well inside that
+BLOCKHASH_REFRESH_SECONDS = float(os.getenv("BLOCKHASH_REFRESH_SECONDS", "5"))
+# Never sign with a cached blockhash older than this
+BLOCKHASH_MAX_AGE = float(os.getenv("BLOCKHASH_MAX_AGE", "30"))
+# Recent blockhashes whose lastValidBlockHeight is remembered
+BLOCKHASH_HISTORY = 64
+
+# A system transfer costs 150 CU; the limit pads that for the budget ixs
+TRANSFER_COMPUTE_UNITS = 150
+BASE_COMPUTE_UNITS = 1000
+
+LAMPORTS_PER_SOL = 1_000_000_000
+
+Transfer = Tuple[str, int]  # (recipient address, lamports)
+
+
+# ----------------------------
+# Blockhash cache
+# ----------------------------
+def fetch_latest_blockhash(rpc_url: Optional[str] = None) -> Tuple[Hash, int]:
+    """(blockhash, lastValidBlockHeight) at confirmed commitment; hedged without `rpc_url`."""
+    value = rpc.call("getLatestBlockhash", [{"commitment": "confirmed"}], url=rpc_url, timeout=10, hedge=True)["value"]
+    return Hash.from_string(value["blockhash"]), int(value["lastValidBlockHeight"])
+
+
+class BlockhashCache:
+    """
+    Latest blockhash for one RPC endpoint, refreshed by a daemon thread so
+    building a transaction never waits on getLatestBlockhash. get() falls
+    back to a synchronous fetch when the cached value is missing or too old
+    (e.g. the refresher has been failing).
+    """
+
+    def __init__(self, rpc_url: Optional[str], refresh: float = BLOCKHASH_REFRESH_SECONDS, max_age: float = BLOCKHASH_MAX_AGE):
+        self.rpc_url = rpc_url
+        self.refresh_interval = refresh
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._value: Optional[Tuple[Hash, int]] = None
+        self._fetched_at = 0.0
+        self._heights: "collections.OrderedDict[Hash, int]" = collections.OrderedDict()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def refresh(self) -> Hash:
+        blockhash, last_valid = fetch_latest_blockhash(self.rpc_url)
+        with self._lock:
+            self._value = (blockhash, last_valid)
+            self._fetched_at = time.monotonic()
+            self._heights[blockhash] = last_valid
+            while len(self._heights) > BLOCKHASH_HISTORY:
+                self._heights.popitem(last=False)
+        return blockhash
+
+    def get(self) -> Hash:
+        with self._lock:
+            value, age = self._value, time.monotonic() - self._fetched_at
+        if value is not None and age <= self.max_age:
+            return value[0]
+        return self.refresh()
+
+    @property
+    def last_valid_block_height(self) -> Optional[int]:
+        with self._lock:
+            return self._value[1] if self._value else None
+
+    def last_valid_height(self, blockhash: Hash) -> Optional[int]:
+        """lastValidBlockHeight of a blockhash this cache handed out, if still remembered."""
+        with self._lock:
+            return self._heights.get(blockhash)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Blockhash refresh failed: {e}")
+            self._stop.wait(self.refresh_interval)
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="blockhash-cache", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_caches: Dict[Optional[str], BlockhashCache] = {}
+_caches_lock = threading.Lock()
+
+
+def blockhash_cache(rpc_url: Optional[str] = None) -> BlockhashCache:
+    """The shared, running BlockhashCache for `rpc_url` (None: the endpoint pool)."""
+    with _caches_lock:
+        cache = _caches.get(rpc_url)
+        if cache is None:
+            cache = _caches[rpc_url] = BlockhashCache(rpc_url)
+        cache.start()
+        return cache
+
+
+# ----------------------------
+# Builders
+# ----------------------------
+def priority_fee_instructions(priority_fee_sol: float, compute_units: int) -> List[Instruction]:
+    """
+    Compute-budget ixs paying roughly `priority_fee_sol` on top of the base
+    fee (the same unit PumpPortal's priorityFee uses). Empty when no fee.
+    """
+    lamports = int(round(priority_fee_sol * LAMPORTS_PER_SOL))
+    if lamports <= 0:
+        return []
+    micro_lamports_per_cu = max(1, lamports * 1_000_000 // compute_units)
+    return [set_compute_unit_limit(compute_units), set_compute_unit_price(micro_lamports_per_cu)]
+
+
+def build_transfer_message(
+    payer: Pubkey,
+    transfers: Sequence[Transfer],
+    blockhash: Hash,
+    priority_fee_sol: float = 0.0,
+) -> MessageV0:
+    """Unsigned v0 message with one system transfer per (recipient, lamports)."""
+    compute_units = BASE_COMPUTE_UNITS + TRANSFER_COMPUTE_UNITS * len(transfers)
+    ixs = priority_fee_instructions(priority_fee_sol, compute_units)
+    ixs += [
+        transfer(TransferParams(from_pubkey=payer, to_pubkey=Pubkey.from_string(recipient), lamports=int(lamports)))
+        for recipient, lamports in transfers
+    ]
+    return MessageV0.try_compile(payer, ixs, [], blockhash)
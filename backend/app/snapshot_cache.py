@@ -0,0 +1,159 @@
+# snapshot_cache.py
+import os
+import time
+import struct
+import pathlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from solders.pubkey import Pubkey
+
+# ----------------------------
+# Config
+# ----------------------------
+SNAPSHOT_CACHE_DIR = pathlib.Path(os.getenv("SNAPSHOT_CACHE_DIR", "snapshot_cache"))
+# Reuse a snapshot while the chain has moved at most this many slots...
+# Snapshots are taken once per round (BREAK_SECONDS=30 apart at the
+# earliest), so the window has to span a round to ever hit: 150 slots at
+# ~400ms is ~60s, two default breaks, matching SNAPSHOT_CACHE_MAX_AGE.
+# Lower both if holders joining within the last minute must make the round.
+SNAPSHOT_CACHE_MAX_SLOTS = int(os.getenv("SNAPSHOT_CACHE_MAX_SLOTS", "150"))
+# ...and it is no older than this many seconds
+SNAPSHOT_CACHE_MAX_AGE = float(os.getenv("SNAPSHOT_CACHE_MAX_AGE", "60"))
+
+# File layout: magic | slot u64 | taken_at f64 | count u32 | count * 32-byte owner keys
+# [| count * amount u64, PKSNAP2 only]
+MAGIC = b"PKSNAP1\0"
+MAGIC_AMOUNTS = b"PKSNAP2\0"
+HEADER = struct.Struct("<8sQdI")
+
+
+class CachedSnapshot:
+    def __init__(self, mint: str, slot: int, taken_at: float, owners: List[str], amounts: Optional[bytes] = None):
+        self.mint = mint
+        self.slot = slot
+        self.taken_at = taken_at
+        self.owners = owners
+        self.amounts = amounts  # u64 LE per owner, as in SnapshotResult
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.taken_at
+
+
+def encode_snapshot(snap: CachedSnapshot) -> bytes:
+    keys = b"".join(bytes(Pubkey.from_string(o)) for o in snap.owners)
+    if snap.amounts is None:
+        return HEADER.pack(MAGIC, snap.slot, snap.taken_at, len(snap.owners)) + keys
+    return HEADER.pack(MAGIC_AMOUNTS, snap.slot, snap.taken_at, len(snap.owners)) + keys + snap.amounts
+
+
+def decode_snapshot(mint: str, raw: bytes) -> CachedSnapshot:
+    magic, slot, taken_at, count = HEADER.unpack_from(raw)
+    row = {MAGIC: 32, MAGIC_AMOUNTS: 40}.get(magic)
+    if row is None or len(raw) != HEADER.size + row * count:
+        raise ValueError("corrupt snapshot file")
+    body = memoryview(raw)[HEADER.size:]
+    owners = [str(Pubkey.from_bytes(bytes(body[i:i + 32]))) for i in range(0, 32 * count, 32)]
+    amounts = bytes(body[32 * count:]) if magic == MAGIC_AMOUNTS else None
+    return CachedSnapshot(mint, slot, taken_at, owners, amounts)
+
+
+class SnapshotCache:
+    """
+    Last good holder snapshot per mint, keyed by (mint, slot) and mirrored
+    to disk so a restarted server can reuse it immediately.
+    """
+
+    def __init__(
+        self,
+        directory: pathlib.Path = SNAPSHOT_CACHE_DIR,
+        max_slots: int = SNAPSHOT_CACHE_MAX_SLOTS,
+        max_age: float = SNAPSHOT_CACHE_MAX_AGE,
+    ):
+        self.directory = directory
+        self.max_slots = max_slots
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries: Dict[str, CachedSnapshot] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_served = 0
+
+    def _path(self, mint: str) -> pathlib.Path:
+        return self.directory / f"{mint}.snap"
+
+    def _load(self, mint: str) -> Optional[CachedSnapshot]:
+        entry = self._entries.get(mint)
+        if entry is None:
+            path = self._path(mint)
+            if path.exists():
+                try:
+                    entry = decode_snapshot(mint, path.read_bytes())
+                    self._entries[mint] = entry
+                except Exception as e:
+                    print(f"Ignoring unreadable snapshot cache {path}: {e}")
+        return entry
+
+    def get(self, mint: str, slot: Optional[int]) -> Optional[Tuple[int, List[str], Optional[bytes]]]:
+        """
+        (slot, owners, amounts) of the cached snapshot if it is fresh enough for the
+        chain's current `slot`, else None. An unknown slot is always a miss.
+        """
+        with self._lock:
+            entry = self._load(mint)
+            fresh = (
+                entry is not None
+                and slot is not None
+                and 0 <= slot - entry.slot <= self.max_slots
+                and entry.age <= self.max_age
+            )
+            if fresh:
+                self.hits += 1
+                return entry.slot, entry.owners, entry.amounts
+            self.misses += 1
+            return None
+
+    def last_good(self, mint: str) -> Optional[Tuple[int, List[str], Optional[bytes]]]:
+        """Latest snapshot regardless of staleness, for use when RPC is down."""
+        with self._lock:
+            entry = self._load(mint)
+            if entry is None:
+                return None
+            self.stale_served += 1
+            return entry.slot, entry.owners, entry.amounts
+
+    def put(self, mint: str, slot: int, owners: List[str], amounts: Optional[bytes] = None) -> None:
+        entry = CachedSnapshot(mint, slot, time.time(), list(owners), amounts)
+        with self._lock:
+            self._entries[mint] = entry
+        try:
+            raw = encode_snapshot(entry)
+        except Exception:
+            return  # not real pubkeys (e.g. a demo pool); keep it in memory only
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(mint)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_bytes(raw)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"Failed to persist snapshot cache: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = {
+                mint: {"slot": e.slot, "holders": len(e.owners), "ageSeconds": round(e.age, 3)}
+                for mint, e in self._entries.items()
+            }
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "staleServed": self.stale_served,
+                "maxSlots": self.max_slots,
+                "maxAgeSeconds": self.max_age,
+                "entries": entries,
+            }
+
+
+snapshot_cache = SnapshotCache()
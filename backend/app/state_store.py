@@ -1,13 +1,30 @@
 # state_store.py
 import os
 import json
+import hashlib
+import binascii
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 import pathlib
 import random
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Callable, Dict, List, Optional
-
-import requests
-
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from solders.pubkey import Pubkey
+
+from . import helius
+from .tracing import span
+from .metrics import SNAPSHOT_ACCOUNTS, SNAPSHOT_FETCH, SNAPSHOT_HOLDERS, SNAPSHOT_PARSE
+from .rpc_client import rpc
+from .snapshot_cache import snapshot_cache
+from .storage import backend
+from .holder_table import AMOUNT_DTYPE, HolderTable, address_to_key
+from .holder_search import search_index
 from .models import (
     Holder,
     TeamAssignment,
@@ -19,7 +36,9 @@ from .models import (
 # ----------------------------
 # Config / constants
 # ----------------------------
-STATE_PATH = pathlib.Path("state_store.json")
+# Persistence (JSON file or SQLite) is chosen by STATE_BACKEND; see storage.py
+# Winners reported to follower workers, queued for the round-loop leader
+WINNER_INBOX_PATH = pathlib.Path("state_store.inbox.jsonl")
 
 TEAMS = ["red", "purple", "blue", "yellow"]
 
@@ -40,6 +59,29 @@ DEFAULT_RPC = (
 # SPL Token Program (v1) – used for holder snapshots
 TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
 
+# With a Helius key, snapshots page through getTokenAccounts in parallel
+# (falling back to getProgramAccounts if that fails)
+HELIUS_PAGED_SNAPSHOTS = os.getenv("HELIUS_PAGED_SNAPSHOTS", "1") == "1"
+# Wall-clock budget for a whole snapshot (paged fetch plus any
+# getProgramAccounts fallback); must fit inside PRE_SNAPSHOT_LEEWAY
+SNAPSHOT_DEADLINE = float(os.getenv("SNAPSHOT_DEADLINE", "4.5"))
+
+# Snapshot decoding: "sliced" asks for base64 with a dataSlice covering only
+# owner + amount; "jsonParsed" is the original full-account path.
+SNAPSHOT_MODE = os.getenv("SNAPSHOT_MODE", "sliced").strip()
+
+# SPL token account layout: mint[0:32] owner[32:64] amount[64:72] (u64 LE)
+TOKEN_ACCOUNT_SIZE = 165
+OWNER_OFFSET = 32
+AMOUNT_OFFSET = 64
+SLICE_LEN = AMOUNT_OFFSET + 8 - OWNER_OFFSET
+SLICE_DTYPE = np.dtype([("owner", "V32"), ("amount", "<u8")])
+
+
+# Write-behind persistence: changes are coalesced and flushed at most once per
+# STATE_FLUSH_INTERVAL seconds by a background thread.
+STATE_FLUSH_INTERVAL = float(os.getenv("STATE_FLUSH_INTERVAL", "0.5"))
+
 
 # ----------------------------
 # Time / file helpers
@@ -48,16 +90,9 @@ def now_utc():
     return datetime.now(timezone.utc)
 
 
-def load_state() -> Dict:
-    """Load persisted state, or bootstrap a default one."""
-    if STATE_PATH.exists():
-        try:
-            return json.loads(STATE_PATH.read_text())
-        except Exception:
-            pass
-
+def _default_state() -> Dict:
     # default bootstrap state (round in BREAK for 30s)
-    default = {
+    return {
         "state": {
             "roundNumber": 1,
             "phase": "BREAK",
@@ -69,7 +104,6 @@ def load_state() -> Dict:
             "total": 0,
             "tokenAddress": TOKEN_MINT,
             "lastUpdatedISO": now_utc().isoformat(),
-            "items": [],
         },
         "history": [],
         # bookkeeping for creator fees/payouts
@@ -77,30 +111,222 @@ def load_state() -> Dict:
         "treasuryLamports": 0,        # your 30% + remainders
     }
 
-    # Persist the initial bootstrap so subsequent reads return a consistent
-    # `breakEndsAt` timestamp instead of bootstrapping a fresh now+30s on every
-    # call (which made the frontend clock appear stuck at ~29s).
-    try:
-        save_state(default)
-    except Exception:
-        # If saving fails (permissions, read-only FS), we still return the
-        # in-memory default so server can operate; frontend may continue to
-        # see a changing clock in that environment.
-        pass
 
-    return default
+# ----------------------------
+# In-memory authoritative state
+# ----------------------------
+# The round loop and the endpoints share one state dict. Mutations happen
+# under STATE_LOCK; disk is only touched by the write-behind flusher.
+STATE_LOCK = threading.RLock()
+_STATE: Optional[Dict] = None
+_DIRTY = threading.Event()
+_FLUSHER: Optional[threading.Thread] = None
+
+# Bumped whenever holders / history change; response caches key off these.
+_VERSIONS: Dict[str, int] = {"holders": 0, "history": 0}
+
+# Holders live in a columnar table outside the JSON document; data["holders"]
+# only carries total / tokenAddress / lastUpdatedISO.
+_HOLDER_TABLE: HolderTable = HolderTable.empty()
+_FLUSHED_HOLDERS_VERSION = 0
+
+# Set on workers that are not the round-loop leader: they never write the
+# state files and pick up the leader's writes with sync_from_disk().
+_READ_ONLY = False
+_SYNCED_TOKEN = None
+
+
+def data_version(name: str) -> int:
+    return _VERSIONS[name]
+
+
+def bump_version(name: str) -> None:
+    with STATE_LOCK:
+        _VERSIONS[name] += 1
+
+
+def load_state() -> Dict:
+    """
+    Return the shared in-memory state. On first use it is recovered from the
+    storage backend, or bootstrapped with a default one.
+    """
+    global _STATE
+    with STATE_LOCK:
+        if _STATE is None:
+            data = backend.load()
+            if data is None:
+                # Persist the initial bootstrap so subsequent reads (and
+                # restarts) see a consistent `breakEndsAt` instead of a fresh
+                # now+30s every time.
+                data = _default_state()
+                _mark_dirty()
+            else:
+                _recover_holders(data)
+            _STATE = data
+        return _STATE
+
+
+def _recover_holders(data: Dict) -> None:
+    """Load the holder table for a recovered state (or convert legacy items)."""
+    global _HOLDER_TABLE
+    meta = data.setdefault("holders", {"total": 0, "tokenAddress": TOKEN_MINT, "lastUpdatedISO": now_utc().isoformat()})
+    items = meta.pop("items", None)
+    if items is not None:
+        # Older files kept holders inline; move them into the table once.
+        _HOLDER_TABLE = HolderTable.from_items(items)
+        _VERSIONS["holders"] += 1
+        _mark_dirty()
+    else:
+        _HOLDER_TABLE = backend.load_holders() or _HOLDER_TABLE
+    meta["total"] = len(_HOLDER_TABLE)
+
+
+def holder_table() -> HolderTable:
+    """The current holder table (immutable; replaced wholesale by set_holders)."""
+    return _HOLDER_TABLE
 
 
 def save_state(data: Dict) -> None:
-    STATE_PATH.write_text(json.dumps(data, indent=2))
+    """Publish `data` as the current state and schedule a write-behind flush."""
+    global _STATE
+    with STATE_LOCK:
+        _STATE = data
+        _mark_dirty()
 
 
 def with_state(mutator: Callable[[Dict], None]) -> Dict:
-    """Load -> mutate -> save. Returns final state dict."""
+    """Load -> mutate -> save under the state lock. Returns final state dict."""
+    with STATE_LOCK:
+        data = load_state()
+        mutator(data)
+        save_state(data)
+        return data
+
+
+def flush_state() -> bool:
+    """Write the current state to the backend now if it has unflushed changes."""
+    global _FLUSHED_HOLDERS_VERSION
+    with STATE_LOCK:
+        if _STATE is None or not _DIRTY.is_set():
+            return False
+        _DIRTY.clear()
+        # Serialize under the lock so the write is a consistent point-in-time copy.
+        payload = backend.serialize(_STATE)
+        # The holder table is immutable, so it can be written outside the lock
+        table, holders_version = None, _VERSIONS["holders"]
+        if holders_version != _FLUSHED_HOLDERS_VERSION:
+            table = _HOLDER_TABLE
+    try:
+        with span("state.flush", **{"state.backend": type(backend).__name__, "state.holders": table is not None}):
+            backend.write(payload, table)
+        if table is not None:
+            _FLUSHED_HOLDERS_VERSION = holders_version
+    except Exception as e:
+        # If saving fails (permissions, read-only FS) the server keeps running
+        # from memory; retry on the next change.
+        print(f"Failed to persist state: {e}")
+        return False
+    return True
+
+
+def _mark_dirty() -> None:
+    global _FLUSHER
+    if _READ_ONLY:
+        return
+    _DIRTY.set()
+    if _FLUSHER is None or not _FLUSHER.is_alive():
+        _FLUSHER = threading.Thread(target=_flush_loop, name="state-flusher", daemon=True)
+        _FLUSHER.start()
+
+
+def _flush_loop() -> None:
+    while True:
+        _DIRTY.wait()
+        # Coalesce bursts of changes into a single write.
+        time.sleep(STATE_FLUSH_INTERVAL)
+        flush_state()
+
+
+# ----------------------------
+# Multi-worker sharing
+# ----------------------------
+def set_read_only(read_only: bool) -> None:
+    """Followers pass True; the elected leader passes False before mutating."""
+    global _READ_ONLY
+    with STATE_LOCK:
+        _READ_ONLY = read_only
+
+
+def sync_from_disk() -> List[str]:
+    """
+    Adopt the state last flushed by the leader, if the backend changed since
+    the previous call. Cheap when nothing changed (a stat call, or one
+    PRAGMA for SQLite).
+
+    Updates the shared dict in place so existing references stay valid, and
+    bumps the holders / history versions so response caches revalidate.
+    Returns the parts that changed: any of "state", "holders", "history".
+    """
+    global _HOLDER_TABLE, _SYNCED_TOKEN
+    token = backend.change_token()
+    if token == _SYNCED_TOKEN:
+        return []
+    fresh = backend.load()
+    if fresh is None:
+        return []
     data = load_state()
-    mutator(data)
-    save_state(data)
-    return data
+    # The leader persists a new holder table before the meta that refers to it
+    table = None
+    if fresh.get("holders") != data.get("holders"):
+        table = backend.load_holders()
+
+    changed: List[str] = []
+    with STATE_LOCK:
+        if fresh.get("state") != data.get("state"):
+            changed.append("state")
+        if fresh.get("history") != data.get("history"):
+            changed.append("history")
+            _VERSIONS["history"] += 1
+        if table is not None:
+            _HOLDER_TABLE = table
+            _VERSIONS["holders"] += 1
+        if table is not None or fresh.get("holders") != data.get("holders"):
+            changed.append("holders")
+            fresh.setdefault("holders", {})["total"] = len(_HOLDER_TABLE)
+        data.clear()
+        data.update(fresh)
+        _SYNCED_TOKEN = token
+    if table is not None:
+        threading.Thread(target=search_index, args=(table,), name="holder-search-index", daemon=True).start()
+    return changed
+
+
+def enqueue_winner(round_number: int, team: str, voter: str = "") -> None:
+    """Queue a winner report for the leader (called on follower workers)."""
+    line = json.dumps({"round": int(round_number), "team": team, "voter": voter}) + "\n"
+    with open(WINNER_INBOX_PATH, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        f.write(line)
+
+
+def drain_winner_inbox() -> List[Dict]:
+    """Take every queued winner report, oldest first (called on the leader)."""
+    if not WINNER_INBOX_PATH.exists() or not WINNER_INBOX_PATH.stat().st_size:
+        return []
+    with open(WINNER_INBOX_PATH, "r+") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        lines = f.read().splitlines()
+        f.seek(0)
+        f.truncate()
+    out = []
+    for line in lines:
+        try:
+            out.append(json.loads(line))
+        except ValueError:
+            pass
+    return out
 
 
 # ----------------------------
@@ -111,6 +337,7 @@ def set_break(state: Dict, seconds: int):
     state["phase"] = "BREAK"
     state["breakEndsAt"] = (now_utc() + timedelta(seconds=seconds)).isoformat()
     # clear any live-only fields (safe if absent)
+    state.pop("runningSince", None)
     # state.pop("survivorCount", None)
 
 
@@ -124,6 +351,8 @@ def start_running(state: Dict):
     state["roundNumber"] = int(state.get("roundNumber", 0)) + 1
     state["breakEndsAt"] = None
     state["winner"] = None
+    # The server-side arena clock (every worker steps the battle from here)
+    state["runningSince"] = now_utc().isoformat()
 
 
 def record_winner(data: Dict, team: str):
@@ -131,23 +360,64 @@ def record_winner(data: Dict, team: str):
     st = data["state"]
     st["winner"] = team
     st["phase"] = "ENDED"
-    data["history"].insert(0, {
+    entry = {
         "round": int(st.get("roundNumber", 0)),
         "team": team,
         "prizeLamports": int(st.get("prizePoolLamports", 0)),
-    })
+    }
+    data["history"].insert(0, entry)
+    if backend.history_window is not None:
+        # The backend keeps every row; memory only needs the newest ones
+        del data["history"][backend.history_window:]
+    if not _READ_ONLY:
+        # A small insert for SQLite; the JSON backend rewrites the document on flush
+        backend.append_history(entry)
+    bump_version("history")
+
+
+def history_page(before: Optional[int] = None, limit: Optional[int] = None) -> Tuple[List[Dict], bool]:
+    """
+    History newest first, only rounds older than `before` if given.
+    Returns (rows, more rows exist). Served from memory when the window
+    there covers the page, otherwise from the backend.
+    """
+    data = load_state()
+    with STATE_LOCK:
+        rows = list(data["history"])
+    if before is not None:
+        rows = [h for h in rows if int(h["round"]) < before]
+    window = backend.history_window
+    if window is None or (limit is not None and len(rows) > limit) or len(data["history"]) < window:
+        page = rows if limit is None else rows[:limit]
+        return page, len(page) < len(rows)
+    return backend.history_page(before, limit)
 
 
 # ----------------------------
 # Holders & prize helpers
 # ----------------------------
-def set_holders(data: Dict, items: List[Holder], token_mint: str):
-    data["holders"] = {
-        "total": len(items),
-        "tokenAddress": token_mint,
-        "lastUpdatedISO": now_utc().isoformat(),
-        "items": [h.dict() for h in items],
-    }
+def set_holders(
+    data: Dict,
+    items: Union[HolderTable, List[Holder]],
+    token_mint: str,
+    round_number: Optional[int] = None,
+):
+    """Swap in a new holder table; `round_number` is the round it was drawn for."""
+    global _HOLDER_TABLE
+    table = items if isinstance(items, HolderTable) else HolderTable.from_items(h.dict() for h in items)
+    with STATE_LOCK:
+        _HOLDER_TABLE = table
+        data["holders"] = {
+            "total": len(table),
+            "tokenAddress": token_mint,
+            "lastUpdatedISO": now_utc().isoformat(),
+        }
+        if round_number is not None:
+            data["holders"]["round"] = int(round_number)
+        bump_version("holders")
+    # (Re)build the address search index once per snapshot, off the caller's
+    # thread; searches that arrive first wait for it.
+    threading.Thread(target=search_index, args=(table,), name="holder-search-index", daemon=True).start()
 
 
 def add_to_prize_pool(state: Dict, lamports: int):
@@ -196,10 +466,186 @@ def assign_teams(addresses: List[str], seed: int) -> List[Holder]:
     return out
 
 
+def assign_team_table(addresses: List[str], seed: int, amounts: Optional[np.ndarray] = None) -> HolderTable:
+    """
+    Same assignment as assign_teams(), built straight into a HolderTable:
+    the seeded permutation only depends on the length, so it is applied to
+    row indices and the keys (and `amounts`, one balance per address) are
+    reordered in one NumPy gather. Addresses that are not valid pubkeys are
+    dropped.
+    """
+    all_keys = list(map(address_to_key, addresses))
+    keys = [k for k in all_keys if k is not None]
+    if not keys:
+        return HolderTable.empty()
+    if amounts is not None:
+        amounts = np.asarray(amounts, dtype=AMOUNT_DTYPE)
+        if len(keys) != len(all_keys):
+            amounts = amounts[[i for i, k in enumerate(all_keys) if k is not None]]
+    order = seeded_shuffle(list(range(len(keys))), seed)
+    packed = np.frombuffer(b"".join(keys), dtype="V32")[order]
+    teams = (np.arange(len(keys)) % len(TEAMS)).astype(np.uint8)
+    return HolderTable(packed.tobytes(), teams, amounts[order] if amounts is not None else None)
+
+
+# Demo pool used when no snapshot is available: stable, valid pubkeys that
+# nobody holds the keys to, so a table containing them must never be paid.
+DEMO_HOLDERS = [
+    str(Pubkey.from_bytes(hashlib.sha256(f"Hldr{i:03d}".encode()).digest()))
+    for i in range(1, 81)
+]
+
+
+def is_demo_table(table: HolderTable) -> bool:
+    """True if `table` was drawn from DEMO_HOLDERS (also after a reload from disk)."""
+    return any(table.row_of(addr) is not None for addr in DEMO_HOLDERS)
+
+
 # ----------------------------
 # Snapshot holders (via Helius or fallback RPC)
 # ----------------------------
-def snapshot_holders(token_mint: Optional[str] = None, rpc_url: Optional[str] = None) -> SnapshotResult:
+def parse_json_parsed_accounts(result: List[Dict]) -> List[str]:
+    """Unique owners with a balance from `encoding: jsonParsed` accounts."""
+    return parse_json_parsed_balances(result)[0]
+
+
+def parse_json_parsed_balances(result: List[Dict]) -> Tuple[List[str], np.ndarray]:
+    """
+    Unique owners with a balance from `encoding: jsonParsed` accounts, in
+    first-seen order, and each owner's total raw amount (u64).
+    """
+    totals: Dict[str, int] = {}
+
+    for acc in result:
+        parsed = acc.get("account", {}).get("data", {}).get("parsed", {})
+        info = parsed.get("info", {})
+        owner = info.get("owner")
+        token_amount = info.get("tokenAmount", {})
+        # Prefer uiAmount, fallback to string "amount"
+        ui_amt = token_amount.get("uiAmount")
+        raw_amt = token_amount.get("amount")
+        try:
+            amount = int(raw_amt)
+        except Exception:
+            amount = 0
+        has_balance = amount > 0 or (isinstance(ui_amt, (int, float)) and ui_amt > 0)
+
+        if owner and has_balance:
+            totals[owner] = totals.get(owner, 0) + amount
+
+    return list(totals), np.fromiter(totals.values(), dtype=AMOUNT_DTYPE, count=len(totals))
+
+
+def decode_sliced_accounts(result: List[Dict], pubkeys: Optional[List[str]] = None) -> np.ndarray:
+    """
+    Decode base64 owner+amount slices into one SLICE_DTYPE record array.
+    Entries whose slice is not SLICE_LEN bytes are skipped. If `pubkeys` is
+    given, the token account address of every kept record is appended to it.
+    """
+    a2b = binascii.a2b_base64
+    chunks = []
+    for acc in result:
+        try:
+            raw = a2b(acc["account"]["data"][0])
+        except Exception:
+            continue
+        if len(raw) == SLICE_LEN:
+            chunks.append(raw)
+            if pubkeys is not None:
+                pubkeys.append(acc.get("pubkey", ""))
+    return np.frombuffer(b"".join(chunks), dtype=SLICE_DTYPE)
+
+
+def unique_owner_keys(records: np.ndarray) -> np.ndarray:
+    """32-byte owner keys with a balance, deduped in first-seen order."""
+    owners = records["owner"][records["amount"] > 0]
+    if not len(owners):
+        return owners
+    _, first = np.unique(owners, return_index=True)
+    return owners[np.sort(first)]
+
+
+def unique_owner_balances(records: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    unique_owner_keys() plus each owner's balance summed over all of their
+    token accounts (exact u64 arithmetic).
+    """
+    held = records[records["amount"] > 0]
+    if not len(held):
+        return held["owner"], held["amount"].astype(AMOUNT_DTYPE)
+    _, first, inverse = np.unique(held["owner"], return_index=True, return_inverse=True)
+    totals = np.zeros(len(first), dtype=AMOUNT_DTYPE)
+    np.add.at(totals, inverse.ravel(), held["amount"])
+    order = np.argsort(first)
+    return held["owner"][first[order]], totals[order]
+
+
+def owner_keys_to_addresses(keys: np.ndarray) -> List[str]:
+    buf = keys.tobytes()
+    return [str(Pubkey.from_bytes(buf[i:i + 32])) for i in range(0, len(buf), 32)]
+
+
+def parse_sliced_accounts(result: List[Dict]) -> List[str]:
+    """Unique owners with a balance from base64 owner+amount slices."""
+    return owner_keys_to_addresses(unique_owner_keys(decode_sliced_accounts(result)))
+
+
+def parse_sliced_balances(result: List[Dict]) -> Tuple[List[str], np.ndarray]:
+    """parse_sliced_accounts() and each owner's total raw amount (u64)."""
+    keys, amounts = unique_owner_balances(decode_sliced_accounts(result))
+    return owner_keys_to_addresses(keys), amounts
+
+
+def _program_accounts_body(token_mint: str, mode: str, with_context: bool = False) -> Dict:
+    config: Dict = {
+        "encoding": "jsonParsed",
+        "filters": [
+            {"dataSize": TOKEN_ACCOUNT_SIZE},
+            {"memcmp": {"offset": 0, "bytes": token_mint}},
+        ],
+    }
+    if mode == "sliced":
+        config["encoding"] = "base64"
+        config["dataSlice"] = {"offset": OWNER_OFFSET, "length": SLICE_LEN}
+    if with_context:
+        config["withContext"] = True
+
+    return {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "getProgramAccounts",
+        "params": [TOKEN_PROGRAM_ID, config],
+    }
+
+
+def fetch_token_accounts(
+    token_mint: Optional[str] = None,
+    rpc_url: Optional[str] = None,
+) -> Tuple[int, List[Tuple[str, str, int]]]:
+    """
+    Every token account of `token_mint` as (account, owner, amount), plus the
+    slot the snapshot was taken at. Unlike snapshot_holders() this raises on
+    RPC failure instead of returning an empty list.
+    """
+    tm = (token_mint or TOKEN_MINT).strip()
+    url = (rpc_url or DEFAULT_RPC).strip()
+
+    body = _program_accounts_body(tm, "sliced", with_context=True)
+    result = rpc.call(body["method"], body["params"], url=url, timeout=60) or {}
+    slot = int((result.get("context") or {}).get("slot", 0))
+    pubkeys: List[str] = []
+    records = decode_sliced_accounts(result.get("value") or [], pubkeys=pubkeys)
+    owners = owner_keys_to_addresses(records["owner"])
+    amounts = records["amount"].tolist()
+    return slot, list(zip(pubkeys, owners, amounts))
+
+
+def snapshot_holders(
+    token_mint: Optional[str] = None,
+    rpc_url: Optional[str] = None,
+    mode: Optional[str] = None,
+    deadline: Optional[float] = None,
+) -> SnapshotResult:
     """
     Fetch all SPL token accounts for the given `token_mint` and return unique
     owner addresses that hold > 0 tokens.
@@ -208,77 +654,134 @@ def snapshot_holders(token_mint: Optional[str] = None, rpc_url: Optional[str] =
       - dataSize=165 filter (SPL Token Account)
       - memcmp at offset 0 equal to token mint (account.mint)
 
+    In "sliced" mode (default) only bytes 32..72 (owner + amount) of each
+    account are requested as base64 and decoded in bulk; "jsonParsed" asks
+    for fully parsed accounts.
+
+    When HELIUS_API_KEY is set, Helius' paginated getTokenAccounts is tried
+    first (see helius.fetch_token_account_owners).
+
+    Everything shares one `deadline` (SNAPSHOT_DEADLINE) seconds budget: a
+    result the round can no longer use is not worth fetching, and a late
+    fetch keeps the snapshot worker busy into the next round. If the paged
+    fetch runs out of time there is no fallback; otherwise the fallback
+    gets what is left of the budget.
+
     Works on Helius endpoints and standard RPC.
     """
     tm = (token_mint or TOKEN_MINT).strip()
-    url = (rpc_url or DEFAULT_RPC).strip()
+    url = rpc_url.strip() if rpc_url else None
+    mode = (mode or SNAPSHOT_MODE).strip()
+    deadline = SNAPSHOT_DEADLINE if deadline is None else deadline
+    started = time.monotonic()
 
-    body = {
-        "jsonrpc": "2.0",
-        "id": 1,
-        "method": "getProgramAccounts",
-        "params": [
-            TOKEN_PROGRAM_ID,
-            {
-                "encoding": "jsonParsed",
-                "filters": [
-                    {"dataSize": 165},
-                    {"memcmp": {"offset": 0, "bytes": tm}},
-                ],
-            },
-        ],
-    }
+    if HELIUS_API_KEY and HELIUS_PAGED_SNAPSHOTS:
+        try:
+            amounts: List[int] = []
+            with span("snapshot.fetch", **{"snapshot.source": "helius"}), SNAPSHOT_FETCH.time(source="helius"):
+                owners = helius.fetch_token_account_owners(
+                    url or DEFAULT_RPC, tm, deadline=deadline, amounts=amounts
+                )
+            return SnapshotResult(tokenAddress=tm, holders=owners, amounts=np.array(amounts, dtype=AMOUNT_DTYPE).tobytes())
+        except TimeoutError as e:
+            print(f"Paged Helius snapshot ran out of time, not falling back: {e}")
+            return SnapshotResult(tokenAddress=tm, holders=[])
+        except Exception as e:
+            print(f"Paged Helius snapshot failed, falling back to getProgramAccounts: {e}")
+
+    remaining = deadline - (time.monotonic() - started)
+    if remaining <= 0:
+        return SnapshotResult(tokenAddress=tm, holders=[])
+    body = _program_accounts_body(tm, mode)
 
     try:
-        resp = requests.post(url, json=body, timeout=60)
-        resp.raise_for_status()
-        data = resp.json()
+        # without an explicit url this is hedged across the RPC endpoint pool;
+        # no retries, so the call cannot outlive the budget
+        with span("snapshot.fetch", **{"snapshot.source": "rpc"}), SNAPSHOT_FETCH.time(source="rpc"):
+            result = rpc.call(body["method"], body["params"], url=url, timeout=remaining, retries=0, hedge=True) or []
     except Exception:
         # On error, return empty snapshot so caller can decide how to proceed
         return SnapshotResult(tokenAddress=tm, holders=[])
 
-    result = data.get("result", [])
-    owners: List[str] = []
-    seen = set()
-
-    for acc in result:
-        parsed = acc.get("account", {}).get("data", {}).get("parsed", {})
-        info = parsed.get("info", {})
-        owner = info.get("owner")
-        token_amount = info.get("tokenAmount", {})
-        # Prefer uiAmount, fallback to string "amount"
-        ui_amt = token_amount.get("uiAmount")
-        raw_amt = token_amount.get("amount")
-        has_balance = False
-        if isinstance(ui_amt, (int, float)) and ui_amt > 0:
-            has_balance = True
+    SNAPSHOT_ACCOUNTS.set(len(result))
+    with span("snapshot.parse", **{"snapshot.mode": mode, "snapshot.accounts": len(result)}) as sp, \
+            SNAPSHOT_PARSE.time(mode=mode):
+        if mode == "sliced":
+            owners, amounts = parse_sliced_balances(result)
         else:
-            try:
-                has_balance = int(raw_amt) > 0
-            except Exception:
-                has_balance = False
+            owners, amounts = parse_json_parsed_balances(result)
+        sp.set("snapshot.holders", len(owners))
+
+    return SnapshotResult(tokenAddress=tm, holders=owners, amounts=amounts.tobytes())
+
+
+def get_slot(rpc_url: Optional[str] = None) -> Optional[int]:
+    """Current confirmed slot, or None if the RPC is unreachable."""
+    try:
+        # no retries: a miss here only means the snapshot cache is skipped
+        return int(rpc.call("getSlot", [{"commitment": "confirmed"}], url=rpc_url, timeout=5, retries=0, hedge=True))
+    except Exception:
+        return None
+
 
-        if owner and has_balance and owner not in seen:
-            seen.add(owner)
-            owners.append(owner)
+def snapshot_holders_cached(token_mint: Optional[str] = None, rpc_url: Optional[str] = None) -> SnapshotResult:
+    """
+    snapshot_holders() behind the (mint, slot) snapshot cache: a snapshot
+    taken within SNAPSHOT_CACHE_MAX_SLOTS / SNAPSHOT_CACHE_MAX_AGE of the
+    current slot is reused, and the last good one is served if RPC fails.
+    """
+    tm = (token_mint or TOKEN_MINT).strip()
+    slot = get_slot(rpc_url)
 
-    return SnapshotResult(tokenAddress=tm, holders=owners)
+    hit = snapshot_cache.get(tm, slot)
+    if hit is not None:
+        return SnapshotResult(tokenAddress=tm, holders=hit[1], amounts=hit[2])
+
+    snap = snapshot_holders(tm, rpc_url=rpc_url)
+    if snap.holders:
+        if slot is not None:
+            snapshot_cache.put(tm, slot, snap.holders, snap.amounts)
+        return snap
+
+    stale = snapshot_cache.last_good(tm)
+    if stale is not None:
+        print(f"Snapshot failed; reusing cached snapshot from slot {stale[0]}")
+        return SnapshotResult(tokenAddress=tm, holders=stale[1], amounts=stale[2])
+    return snap
 
 
 def fetch_and_assign_teams(
     token_mint: Optional[str],
     seed: int,
     rpc_url: Optional[str] = None,
-) -> List[Holder]:
+    addresses: Optional[List[str]] = None,
+    amounts: Optional[Sequence[int]] = None,
+) -> HolderTable:
     """
     Fetch a real snapshot of holders (via Helius if configured) and deterministically
-    assign them into 4 teams using the given seed.
+    assign them into 4 teams using the given seed. Pass `addresses` (e.g. from
+    the live holder index, with their `amounts`) to skip the RPC snapshot;
+    they are sorted first, so the teams only depend on the holder set and
+    the seed, not on the order the index happened to see them in.
     """
-    snap = snapshot_holders(token_mint or TOKEN_MINT, rpc_url=rpc_url or DEFAULT_RPC)
-    addresses = snap.holders
-
+    if addresses is None:
+        snap = snapshot_holders_cached(token_mint or TOKEN_MINT, rpc_url=rpc_url)
+        addresses = snap.holders
+        amounts = np.frombuffer(snap.amounts, dtype=AMOUNT_DTYPE) if snap.amounts is not None else None
+    elif addresses:
+        order = sorted(range(len(addresses)), key=addresses.__getitem__)
+        addresses = [addresses[i] for i in order]
+        if amounts is not None:
+            amounts = np.asarray(amounts, dtype=AMOUNT_DTYPE)[order]
+
+    SNAPSHOT_HOLDERS.set(len(addresses or ()))
     # If snapshot fails or returns empty, keep a small demo pool instead of failing the round.
     if not addresses:
-        addresses = [f"Hldr{i:03d}...xyz" for i in range(1, 81)]
-
-    return assign_teams(addresses, seed)
\ No newline at end of file
+        addresses, amounts = DEMO_HOLDERS, None
+
+    with span("snapshot.assign_teams", **{"snapshot.holders": len(addresses)}):
+        table = assign_team_table(addresses, seed, amounts)
+        # The lookup index is cheap; build it here in the snapshot worker so
+        # set_holders() can swap the table in without extra work.
+        table.build_index()
+    return table
\ No newline at end of file
@@ -0,0 +1,362 @@
+# storage.py
+import os
+import json
+import sqlite3
+import pathlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .holder_table import AMOUNT_DTYPE, HolderTable
+
+# ----------------------------
+# Config
+# ----------------------------
+# "json" (default): one document + holder sidecar; "sqlite": WAL database
+STATE_BACKEND = os.getenv("STATE_BACKEND", "json").strip().lower()
+
+STATE_PATH = pathlib.Path(os.getenv("STATE_PATH", "state_store.json"))
+# Current holder table, stored next to the JSON state in binary form
+HOLDERS_PATH = pathlib.Path(os.getenv("HOLDERS_PATH", "state_store.holders.bin"))
+STATE_DB_PATH = pathlib.Path(os.getenv("STATE_DB_PATH", "state_store.db"))
+
+# Newest history rows kept in memory by backends that can page the rest
+HISTORY_IN_MEMORY = int(os.getenv("HISTORY_IN_MEMORY", "100"))
+
+
+def _atomic_write(path: pathlib.Path, payload: bytes) -> None:
+    """Atomically replace `path` (temp file in the same dir + rename)."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class StateBackend:
+    """
+    Persistence behind state_store's in-memory state document:
+
+      {"state": {...}, "holders": {meta}, "history": [newest first], ...}
+
+    plus the current HolderTable. state_store owns the live copy; a backend
+    only loads it at startup / on follower sync and writes it back from the
+    write-behind flusher.
+    """
+
+    name = "base"
+    # Newest history rows kept in the in-memory document (None: all of them)
+    history_window: Optional[int] = None
+
+    def load(self) -> Optional[Dict]:
+        """The persisted document, or None if nothing was saved yet."""
+        raise NotImplementedError
+
+    def load_holders(self) -> Optional[HolderTable]:
+        raise NotImplementedError
+
+    def serialize(self, data: Dict) -> Any:
+        """Point-in-time copy of `data`; called under STATE_LOCK, so keep it cheap."""
+        raise NotImplementedError
+
+    def write(self, payload: Any, table: Optional[HolderTable]) -> None:
+        """Persist a serialize() result, plus `table` when holders changed."""
+        raise NotImplementedError
+
+    def append_history(self, entry: Dict) -> None:
+        """Called by record_winner; backends that write the whole document ignore it."""
+
+    def history_page(self, before: Optional[int], limit: Optional[int]) -> Tuple[List[Dict], bool]:
+        """(rows newest first with round < before, more rows exist) beyond the in-memory window."""
+        raise NotImplementedError
+
+    def all_history(self) -> List[Dict]:
+        raise NotImplementedError
+
+    def change_token(self) -> Any:
+        """Cheap value that changes whenever another process writes."""
+        raise NotImplementedError
+
+    def replace_all(self, data: Dict, table: Optional[HolderTable]) -> None:
+        """Overwrite everything with `data` (full history) and `table`; used by migrations."""
+        raise NotImplementedError
+
+
+class JsonBackend(StateBackend):
+    """The whole document as compact JSON, holder table in a binary sidecar."""
+
+    name = "json"
+
+    def __init__(self, path: pathlib.Path = STATE_PATH, holders_path: pathlib.Path = HOLDERS_PATH):
+        self.path = path
+        self.holders_path = holders_path
+
+    def load(self) -> Optional[Dict]:
+        if self.path.exists():
+            try:
+                return json.loads(self.path.read_text())
+            except Exception:
+                pass
+        return None
+
+    def load_holders(self) -> Optional[HolderTable]:
+        if not self.holders_path.exists():
+            return None
+        try:
+            return HolderTable.from_bytes(self.holders_path.read_bytes())
+        except Exception as e:
+            print(f"Ignoring unreadable holder table {self.holders_path}: {e}")
+            return None
+
+    def serialize(self, data: Dict) -> str:
+        return json.dumps(data, separators=(",", ":"))
+
+    def write(self, payload: str, table: Optional[HolderTable]) -> None:
+        # Sidecar first: a reader that sees the new JSON also finds its table
+        if table is not None:
+            _atomic_write(self.holders_path, table.to_bytes())
+        _atomic_write(self.path, payload.encode())
+
+    def all_history(self) -> List[Dict]:
+        return (self.load() or {}).get("history", [])
+
+    def change_token(self) -> int:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    def replace_all(self, data: Dict, table: Optional[HolderTable]) -> None:
+        self.write(self.serialize(data), table)
+
+
+# Round-state fields with their own columns; anything else goes to `extra`
+_STATE_COLUMNS = {
+    "roundNumber": "round_number",
+    "phase": "phase",
+    "breakEndsAt": "break_ends_at",
+    "prizePoolLamports": "prize_pool_lamports",
+    "winner": "winner",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS round_state (
+    id                  INTEGER PRIMARY KEY CHECK (id = 1),
+    round_number        INTEGER NOT NULL,
+    phase               TEXT NOT NULL,
+    break_ends_at       TEXT,
+    prize_pool_lamports INTEGER NOT NULL DEFAULT 0,
+    winner              TEXT,
+    extra               TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS history (
+    round          INTEGER PRIMARY KEY,
+    team           TEXT NOT NULL,
+    prize_lamports INTEGER NOT NULL DEFAULT 0,
+    extra          TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS holder_sets (
+    round        INTEGER PRIMARY KEY,
+    token_mint   TEXT,
+    updated_iso  TEXT,
+    count        INTEGER NOT NULL,
+    keys         BLOB NOT NULL,
+    teams        BLOB NOT NULL,
+    amounts      BLOB
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class SqliteBackend(StateBackend):
+    """
+    SQLite in WAL mode: readers in other workers never block the writer.
+
+      round_state   one row; a flush is a single small UPDATE
+      history       one row per round (PRIMARY KEY round), inserted by
+                    record_winner; pages are range scans on the key
+      holder_sets   one row per round: the team assignment as blobs
+                    (32-byte keys, team bytes, u64 balances if known),
+                    kept for every round
+      meta          holders meta and the remaining top-level fields (JSON)
+    """
+
+    name = "sqlite"
+    history_window = HISTORY_IN_MEMORY
+
+    def __init__(self, path: pathlib.Path = STATE_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: commits are durable across process crashes, fsync at checkpoints
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(holder_sets)")}
+        if "amounts" not in columns:  # databases created before balances were kept
+            self._conn.execute("ALTER TABLE holder_sets ADD COLUMN amounts BLOB")
+
+    # ---- reads ----
+    def load(self) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT round_number, phase, break_ends_at, prize_pool_lamports, winner, extra FROM round_state WHERE id = 1"
+            ).fetchone()
+            if row is None:
+                return None
+            meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        state = dict(zip(_STATE_COLUMNS, row[:5]))
+        state.update(json.loads(row[5] or "{}"))
+        data = json.loads(meta.get("document", "{}"))
+        data["state"] = state
+        data["holders"] = json.loads(meta.get("holders", "{}"))
+        data["history"], _ = self.history_page(None, self.history_window)
+        return data
+
+    @staticmethod
+    def _holder_table(row) -> HolderTable:
+        amounts = np.frombuffer(row[2], dtype=AMOUNT_DTYPE) if row[2] is not None else None
+        return HolderTable(bytes(row[0]), np.frombuffer(row[1], dtype=np.uint8), amounts)
+
+    def load_holders(self) -> Optional[HolderTable]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT keys, teams, amounts FROM holder_sets ORDER BY round DESC LIMIT 1"
+            ).fetchone()
+        return None if row is None else self._holder_table(row)
+
+    def holders_for_round(self, round_number: int) -> Optional[HolderTable]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT keys, teams, amounts FROM holder_sets WHERE round = ?", (int(round_number),)
+            ).fetchone()
+        return None if row is None else self._holder_table(row)
+
+    @staticmethod
+    def _history_row(row) -> Dict:
+        entry = {"round": row[0], "team": row[1], "prizeLamports": row[2]}
+        entry.update(json.loads(row[3] or "{}"))
+        return entry
+
+    def history_page(self, before: Optional[int], limit: Optional[int]) -> Tuple[List[Dict], bool]:
+        sql = "SELECT round, team, prize_lamports, extra FROM history"
+        args: List[Any] = []
+        if before is not None:
+            sql += " WHERE round < ?"
+            args.append(int(before))
+        sql += " ORDER BY round DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit) + 1)
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        more = limit is not None and len(rows) > limit
+        return [self._history_row(r) for r in rows[:limit]], more
+
+    def all_history(self) -> List[Dict]:
+        return self.history_page(None, None)[0]
+
+    def change_token(self) -> int:
+        # Changes whenever another connection commits
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    # ---- writes ----
+    def serialize(self, data: Dict) -> Dict:
+        state = data["state"]
+        rest = {k: v for k, v in data.items() if k not in ("state", "holders", "history")}
+        return {
+            "state": [state.get(k) for k in _STATE_COLUMNS]
+                     + [json.dumps({k: v for k, v in state.items() if k not in _STATE_COLUMNS})],
+            "holders": dict(data.get("holders") or {}),
+            "document": json.dumps(rest),
+        }
+
+    def _write_state(self, payload: Dict, table: Optional[HolderTable]) -> None:
+        c = self._conn
+        c.execute(
+            "INSERT INTO round_state (id, round_number, phase, break_ends_at, prize_pool_lamports, winner, extra)"
+            " VALUES (1, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT(id) DO UPDATE SET round_number = excluded.round_number, phase = excluded.phase,"
+            " break_ends_at = excluded.break_ends_at, prize_pool_lamports = excluded.prize_pool_lamports,"
+            " winner = excluded.winner, extra = excluded.extra",
+            payload["state"],
+        )
+        holders = payload["holders"]
+        c.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            [("holders", json.dumps(holders)), ("document", payload["document"])],
+        )
+        if table is not None:
+            c.execute(
+                "INSERT OR REPLACE INTO holder_sets (round, token_mint, updated_iso, count, keys, teams, amounts)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    int(holders.get("round") or 0),
+                    holders.get("tokenAddress"),
+                    holders.get("lastUpdatedISO"),
+                    len(table),
+                    table.keys,
+                    table.teams.tobytes(),
+                    table.amounts.tobytes() if table.amounts is not None else None,
+                ),
+            )
+
+    def write(self, payload: Dict, table: Optional[HolderTable]) -> None:
+        with self._lock:
+            c = self._conn
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                self._write_state(payload, table)
+                c.execute("COMMIT")
+            except Exception:
+                c.execute("ROLLBACK")
+                raise
+
+    def _insert_history(self, entries: List[Dict]) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO history (round, team, prize_lamports, extra) VALUES (?, ?, ?, ?)",
+            [
+                (
+                    int(e["round"]),
+                    e["team"],
+                    int(e.get("prizeLamports", 0)),
+                    json.dumps({k: v for k, v in e.items() if k not in ("round", "team", "prizeLamports")}),
+                )
+                for e in entries
+            ],
+        )
+
+    def append_history(self, entry: Dict) -> None:
+        with self._lock:
+            self._insert_history([entry])
+
+    def replace_all(self, data: Dict, table: Optional[HolderTable]) -> None:
+        with self._lock:
+            c = self._conn
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                c.execute("DELETE FROM history")
+                self._insert_history(data.get("history", []))
+                self._write_state(self.serialize(data), table)
+                c.execute("COMMIT")
+            except Exception:
+                c.execute("ROLLBACK")
+                raise
+
+
+def make_backend(name: str = STATE_BACKEND) -> StateBackend:
+    if name == "sqlite":
+        return SqliteBackend()
+    if name != "json":
+        print(f"Unknown STATE_BACKEND {name!r}; using json")
+    return JsonBackend()
+
+
+backend = make_backend()
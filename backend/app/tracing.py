@@ -0,0 +1,217 @@
+# tracing.py
+import os
+import json
+import time
+import queue
+import atexit
+import random
+import hashlib
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Iterator, List, Optional
+
+# ----------------------------
+# Config
+# ----------------------------
+TRACING = os.getenv("TRACING", "0") == "1"
+TRACE_PATH = os.getenv("TRACE_PATH", "traces.jsonl")
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(20 * 1024 * 1024)))
+TRACE_BACKUPS = int(os.getenv("TRACE_BACKUPS", "3"))
+# Finished spans waiting for the writer thread; beyond this they are dropped
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "10000"))
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "pikmin-battles")
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+SPAN_KIND_INTERNAL = 1
+
+
+def round_trace_id(round_number: int) -> str:
+    """Every span of a round shares one trace, whichever worker or stage emitted it."""
+    return hashlib.blake2b(f"{SERVICE_NAME}/round/{round_number}".encode(), digest_size=16).hexdigest()
+
+
+def _attr(key: str, value: Any) -> Dict:
+    if isinstance(value, bool):
+        v = {"boolValue": value}
+    elif isinstance(value, int):
+        v = {"intValue": str(value)}  # OTLP/JSON encodes int64 as a string
+    elif isinstance(value, float):
+        v = {"doubleValue": value}
+    else:
+        v = {"stringValue": str(value)}
+    return {"key": key, "value": v}
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "events", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.events: List[Dict] = []
+        self.status = (STATUS_OK, "")
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, e: BaseException) -> None:
+        self.status = (STATUS_ERROR, str(e))
+        self.events.append({
+            "name": "exception",
+            "timeUnixNano": str(time.time_ns()),
+            "attributes": [_attr("exception.type", type(e).__name__), _attr("exception.message", str(e))],
+        })
+
+    def to_otlp(self) -> Dict:
+        out = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attr(k, v) for k, v in self.attributes.items()],
+            "status": {"code": self.status[0], **({"message": self.status[1]} if self.status[1] else {})},
+        }
+        if self.parent_id:
+            out["parentSpanId"] = self.parent_id
+        if self.events:
+            out["events"] = self.events
+        return out
+
+
+class Tracer:
+    """
+    Minimal span tracing for the round pipeline.
+
+    Each finished span is appended to TRACE_PATH as one OTLP/JSON
+    ExportTraceServiceRequest per line, the format the OpenTelemetry
+    Collector's file exporter writes and its `otlpjsonfile` receiver reads,
+    so the files can be replayed into Jaeger/Tempo as-is. The file rotates
+    at TRACE_MAX_BYTES, keeping TRACE_BACKUPS old files. Off unless
+    TRACING=1.
+
+    Ending a span only queues it: encoding and file I/O happen on a writer
+    thread, so spans closed on the event loop never wait on the disk. If
+    the writer falls TRACE_QUEUE_SIZE spans behind, new spans are dropped
+    (and counted) rather than blocking.
+
+    The current span lives in a contextvar: children nest under it across
+    awaits, and across threads when the work is submitted with
+    `tracing.submit` (the round orchestrator does this). Spans given a
+    `round` share that round's trace id and every descendant is tagged
+    with `round.number`.
+    """
+
+    def __init__(self, path: str = TRACE_PATH, enabled: bool = TRACING):
+        self.enabled = enabled and bool(path)
+        self.path = path
+        self._current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("span", default=None)
+        self._log: Optional[logging.Logger] = None
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=TRACE_QUEUE_SIZE)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self.dropped = 0
+        self._resource = {
+            "attributes": [_attr("service.name", SERVICE_NAME), _attr("process.pid", os.getpid())],
+        }
+
+    def _logger(self) -> logging.Logger:
+        # Opened on first use so importing the app never creates the file
+        if self._log is None:
+            log = logging.getLogger(f"pikmin.traces.{id(self)}")
+            log.propagate = False
+            log.setLevel(logging.INFO)
+            handler = RotatingFileHandler(self.path, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            log.addHandler(handler)
+            self._log = log
+        return self._log
+
+    def current(self) -> Optional[Span]:
+        return self._current.get()
+
+    @contextmanager
+    def span(self, name: str, round: Optional[int] = None, **attributes) -> Iterator[Span]:
+        parent = self._current.get()
+        if round is not None:
+            attributes["round.number"] = int(round)
+            trace_id = round_trace_id(int(round))
+        elif parent is not None:
+            trace_id = parent.trace_id
+            if "round.number" in parent.attributes:
+                attributes["round.number"] = parent.attributes["round.number"]
+        else:
+            trace_id = "%032x" % random.getrandbits(128)
+        span = Span(name, trace_id, parent.span_id if parent is not None else None, attributes)
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            self._current.reset(token)
+            span.end_ns = time.time_ns()
+            self.export(span)
+
+    def export(self, span: Span) -> None:
+        if not self.enabled:
+            return
+        if self._writer is None:
+            self._start_writer()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start_writer(self) -> None:
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+
+    def _write_loop(self) -> None:
+        while True:
+            span = self._queue.get()
+            try:
+                self._write(span)
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Wait until every queued span is on disk."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def _write(self, span: Span) -> None:
+        line = json.dumps({
+            "resourceSpans": [{
+                "resource": self._resource,
+                "scopeSpans": [{"scope": {"name": "pikmin.round"}, "spans": [span.to_otlp()]}],
+            }]
+        }, separators=(",", ":"))
+        try:
+            self._logger().info(line)
+        except Exception as e:
+            print(f"Failed to write span {span.name}: {e}")
+
+
+tracer = Tracer()
+span = tracer.span
+
+
+def submit(executor, fn, *args, **kwargs):
+    """executor.submit() that carries the caller's contextvars (and so its current span) into the worker."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -0,0 +1,78 @@
+# winner_gate.py
+import os
+import threading
+from typing import Dict, Optional, Set
+
+# ----------------------------
+# Config
+# ----------------------------
+# Distinct reporters that must name the same team before it wins; 1 = first valid report wins
+WINNER_QUORUM = max(1, int(os.getenv("WINNER_QUORUM", "1")))
+
+
+class WinnerGate:
+    """
+    Coalesces winner reports. Every viewer's browser reports the winner of
+    the round it watched, so one round produces a burst of identical POSTs.
+
+    Votes for the current round are counted in memory, once per voter
+    (client address). A team is ready to win when `quorum` distinct voters
+    named it; the state transition itself is a compare-and-set on
+    (roundNumber, phase) done by the caller under STATE_LOCK, so only one
+    report can end the round. After that the gate remembers the winner and
+    answers repeats without touching the state.
+
+    Behind a reverse proxy run uvicorn with --proxy-headers, or every viewer
+    counts as the same voter.
+    """
+
+    def __init__(self, quorum: int = WINNER_QUORUM):
+        self.quorum = quorum
+        self._lock = threading.Lock()
+        self._round = -1
+        self._votes: Dict[str, Set[str]] = {}
+        self._decided: Optional[str] = None
+
+    def _at(self, round_number: int) -> bool:
+        """Move to `round_number` if it is newer; False if it is older. Caller holds the lock."""
+        if round_number > self._round:
+            self._round = round_number
+            self._votes = {}
+            self._decided = None
+        return round_number == self._round
+
+    def decided(self, round_number: int) -> Optional[str]:
+        with self._lock:
+            return self._decided if round_number == self._round else None
+
+    def vote(self, round_number: int, team: str, voter: str) -> int:
+        """
+        Count `voter` for `team`; returns the team's votes including this
+        one, or 0 if the voter was already counted (or the round is stale).
+        """
+        with self._lock:
+            if not self._at(round_number):
+                return 0
+            voters = self._votes.setdefault(team, set())
+            if voter in voters:
+                return 0
+            voters.add(voter)
+            return len(voters)
+
+    def settle(self, round_number: int, team: str) -> None:
+        """Record that `team` won `round_number`."""
+        with self._lock:
+            if self._at(round_number):
+                self._decided = team
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                "quorum": self.quorum,
+                "round": self._round,
+                "votes": {team: len(v) for team, v in self._votes.items()},
+                "decided": self._decided,
+            }
+
+
+winner_gate = WinnerGate()
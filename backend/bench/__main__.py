@@ -0,0 +1,65 @@
+# __main__.py
+"""
+The whole benchmark suite, into one JSON report.
+
+  micro       shuffle / team assignment / snapshot parsing / state save at
+              each --sizes, plus the arena engine (bench.micro)
+  scripts     the focused benchmarks: holder table, responses, snapshot
+              decode, round archive, payout plan
+  load        --tabs polling tabs against a spawned server backed by the
+              fake RPC (bench.load)
+
+Run from backend/:
+    python -m bench --out bench-report.json
+    python -m bench --quick --compare bench-report.json     # after a change
+"""
+import argparse
+
+from . import bench_holder_table, bench_payout_plan, bench_responses, bench_round_archive, bench_snapshot_decode, load, micro
+from .report import Report, compare, load as load_report
+
+SUITES = ("micro", "scripts", "load")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--quick", action="store_true", help="1k and 100k holders, a 15s load run")
+    parser.add_argument("--out", default="bench-report.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="diff the new report against this one")
+    load.add_arguments(parser)
+    parser.set_defaults(spawn=True)
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.sizes = [s for s in args.sizes if s <= 100_000]
+        args.seconds = min(args.seconds, 15)
+    largest = max(args.sizes)
+
+    report = Report()
+    if "micro" in args.only:
+        print("== micro ==")
+        micro.run(report, args.sizes)
+    if "scripts" in args.only:
+        print("== holder table ==")
+        bench_holder_table.main(args.sizes, report)
+        print("== responses ==")
+        bench_responses.main(min(largest, 100_000), report)
+        print("== snapshot decode ==")
+        bench_snapshot_decode.main(min(largest, 100_000), report)
+        print("== round archive ==")
+        bench_round_archive.main(min(largest, 100_000), 20, report)
+        print("== payout plan ==")
+        bench_payout_plan.main(largest, report)
+    if "load" in args.only:
+        print("== load ==")
+        load.run(report, args)
+
+    report.write(args.out)
+    if args.compare:
+        return 1 if compare(load_report(args.compare), report.as_dict()) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
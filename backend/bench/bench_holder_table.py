@@ -0,0 +1,56 @@
+# bench_holder_table.py
+"""
+Memory and build time of the holder set at several sizes.
+
+  models: assign_teams() -> List[Holder] -> [h.dict()] (the old set_holders path)
+  table:  assign_team_table() -> HolderTable (+ lookup index)
+
+Run from backend/:  python -m bench.bench_holder_table [n ...]
+"""
+import sys
+import time
+import tracemalloc
+from typing import Optional
+
+from solders.pubkey import Pubkey
+
+from app.state_store import assign_team_table, assign_teams
+
+from .report import Report
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, elapsed, current, peak
+
+
+def main(sizes, report: Optional[Report] = None):
+    for n in sizes:
+        addresses = [str(Pubkey.new_unique()) for _ in range(n)]
+
+        def models():
+            return [h.dict() for h in assign_teams(addresses, seed=1337)]
+
+        def table():
+            t = assign_team_table(addresses, seed=1337)
+            t.build_index()
+            return t
+
+        print(f"holders={n}")
+        for label, fn in (("models", models), ("table", table)):
+            out, elapsed, current, peak = measure(fn)
+            print(f"  {label:7s} build {elapsed:7.3f} s   retained {current / 1e6:8.1f} MB   peak {peak / 1e6:8.1f} MB")
+            if report is not None:
+                report.add(f"holder_table.{label}_build[{n}]", elapsed * 1000, "ms")
+                report.add(f"holder_table.{label}_retained[{n}]", current / 1e6, "MB")
+            del out
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [1_000, 100_000, 1_000_000]
+    main(sizes)
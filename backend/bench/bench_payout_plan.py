@@ -0,0 +1,49 @@
+# bench_payout_plan.py
+"""
+Time payout planning for one winning team of n holders, per PAYOUT_SPLIT.
+
+  alloc  weights + exact largest-remainder split (NumPy only)
+  plan   the whole plan_payout(): alloc plus building the PayoutPlan
+
+Balances are Pareto-distributed raw token amounts, like a real mint; the
+prize is 1000 SOL so the products overflow u64 and the exact path is used.
+Run from backend/:  python -m bench.bench_payout_plan [holders]
+"""
+import sys
+import time
+from typing import Optional
+
+import numpy as np
+
+from app.services.payout_planner import SPLITS, largest_remainder, payout_weights, plan_payout
+
+from .report import Report
+
+PRIZE_LAMPORTS = 1_000 * 10**9
+
+
+def make_balances(n: int) -> np.ndarray:
+    rng = np.random.default_rng(7)
+    return (rng.pareto(1.2, size=n) * 1e9).astype(np.uint64) + np.uint64(1)
+
+
+def main(n: int, report: Optional[Report] = None) -> None:
+    balances = make_balances(n)
+    recipients = [f"holder{i}" for i in range(n)]
+    print(f"holders={n} prize={PRIZE_LAMPORTS} lamports")
+    for split in SPLITS:
+        start = time.perf_counter()
+        amounts = largest_remainder(payout_weights(balances, n, split), PRIZE_LAMPORTS)
+        alloc = time.perf_counter() - start
+        start = time.perf_counter()
+        plan = plan_payout(1, "red", recipients, balances, PRIZE_LAMPORTS, split=split)
+        elapsed = time.perf_counter() - start
+        assert int(amounts.sum(dtype=np.uint64)) == PRIZE_LAMPORTS == plan.totalLamports, split
+        print(f"  {split:9s} alloc {alloc * 1000:7.1f} ms  plan {elapsed * 1000:7.1f} ms  paid={len(plan.recipients)}")
+        if report is not None:
+            report.add(f"payout_plan.{split}.alloc[{n}]", alloc * 1000, "ms")
+            report.add(f"payout_plan.{split}[{n}]", elapsed * 1000, "ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
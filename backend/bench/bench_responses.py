@@ -0,0 +1,94 @@
+# bench_responses.py
+"""
+Before/after for GET /holders, as HTTP requests through the ASGI apps
+(httpx ASGITransport: routing, middleware and the full response body, but
+no sockets).
+
+  before: the original endpoint, `response_model=HoldersResponse` returning
+          the state dict, so every request validates and serializes it
+  after:  the real app, serving pre-serialized, pre-compressed bodies from
+          the response cache
+
+Each is run with `Accept-Encoding: identity` and `gzip` (and `br` for the
+app that can send it), one request at a time.
+
+Run from backend/:  python -m bench.bench_responses [holders]
+"""
+import sys
+import time
+import asyncio
+from typing import Optional
+
+import httpx
+from fastapi import FastAPI
+from solders.pubkey import Pubkey
+
+from app import main as server
+from app.models import HoldersResponse
+from app.state_store import assign_team_table, load_state, set_holders, set_read_only
+
+from .report import Report
+
+TOKEN = "So11111111111111111111111111111111111111112"
+
+
+def make_table(n: int):
+    return assign_team_table([str(Pubkey.new_unique()) for _ in range(n)], seed=1337)
+
+
+def before_app(holders: dict) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/holders", response_model=HoldersResponse)
+    def get_holders():
+        return holders
+
+    return app
+
+
+async def fetch(client: httpx.AsyncClient, headers: dict) -> int:
+    """One GET /holders; the body is read raw (as sent), so the client
+    never spends time decompressing it."""
+    async with client.stream("GET", "/holders", headers=headers) as resp:
+        assert resp.status_code == 200, resp.status_code
+        size = 0
+        async for chunk in resp.aiter_raw():
+            size += len(chunk)
+    return size
+
+
+async def rate(app, encoding: str, min_seconds: float = 1.0):
+    """(requests per second, body bytes) for GET /holders with `encoding`."""
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Accept-Encoding": encoding}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        size = await fetch(client, headers)  # warm-up
+        n, start = 0, time.perf_counter()
+        while True:
+            await fetch(client, headers)
+            n += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_seconds:
+                return n / elapsed, size
+
+
+def main(n: int, report: Optional[Report] = None) -> None:
+    table = make_table(n)
+    # Serve from memory only: never write the state files from a benchmark
+    set_read_only(True)
+    data = load_state()
+    set_holders(data, table, token_mint=TOKEN, round_number=1)
+    holders = {**data["holders"], "items": table.items()}
+
+    print(f"holders={n}")
+    runs = [("before", before_app(holders), enc) for enc in ("identity", "gzip")]
+    runs += [("after", server.app, enc) for enc in ("identity", "gzip", "br")]
+    for label, app, enc in runs:
+        per_second, size = asyncio.run(rate(app, enc))
+        print(f"  {label:6s} {enc:8s}  {per_second:10.1f} req/s  {size / 1024:9.1f} KiB")
+        if report is not None:
+            report.add(f"responses.holders_{label}_{enc}[{n}]", per_second, "req/s", better="higher")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,88 @@
+# bench_round_archive.py
+"""
+Size and lookup latency of the per-round holder archive.
+
+  size:    archive bytes per holder vs the 33-byte raw columns, and vs
+           zlib over the raw block (for reference)
+  lookup:  RoundArchive.lookup() on a mapped archive with many rounds,
+           vs decoding a whole round block to answer one lookup
+
+Run from backend/:  python -m bench.bench_round_archive [holders_per_round] [rounds]
+"""
+import os
+import sys
+import time
+import zlib
+import random
+import tempfile
+import pathlib
+from typing import Optional
+
+import numpy as np
+
+from app.holder_table import HolderTable, key_to_address
+from app.round_archive import RoundArchive, encode_block
+
+from .report import Report
+
+
+def random_table(n: int, rng: np.random.Generator) -> HolderTable:
+    keys = rng.integers(0, 256, size=32 * n, dtype=np.uint8).tobytes()
+    return HolderTable(keys, rng.integers(0, 4, size=n, dtype=np.uint8))
+
+
+def main(n: int, rounds: int, report: Optional[Report] = None):
+    rng = np.random.default_rng(1337)
+    tables = [random_table(n, rng) for _ in range(rounds)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = RoundArchive(pathlib.Path(tmp) / "rounds.archive")
+        start = time.perf_counter()
+        for r, t in enumerate(tables, start=1):
+            archive.append(r, t)
+        write_s = time.perf_counter() - start
+
+        size = os.path.getsize(archive.path)
+        raw = sum(33 * len(t) for t in tables)
+        zlib_size = sum(len(zlib.compress(t.keys + t.teams.tobytes(), 6)) for t in tables[:2]) * rounds / min(2, rounds)
+        print(f"{rounds} rounds x {n} holders")
+        print(f"  archive  {size / 1e6:8.2f} MB  {size / (n * rounds):6.2f} B/holder   (append {write_s / rounds * 1000:.1f} ms/round)")
+        print(f"  raw      {raw / 1e6:8.2f} MB  {33:6.2f} B/holder")
+        print(f"  zlib     {zlib_size / 1e6:8.2f} MB  {zlib_size / (n * rounds):6.2f} B/holder")
+
+        probes = []
+        for _ in range(2000):
+            r = random.randrange(rounds)
+            probes.append((r + 1, key_to_address(tables[r].key(random.randrange(n)))))
+
+        archive = RoundArchive(archive.path)  # cold reader: index + mmap only
+        lat = []
+        for r, addr in probes:
+            t0 = time.perf_counter()
+            team = archive.lookup(r, addr)
+            lat.append(time.perf_counter() - t0)
+            assert team is not None
+        lat.sort()
+        print(f"  lookup (mmap)        p50 {lat[len(lat) // 2] * 1e6:8.1f} us   p99 {lat[int(len(lat) * 0.99)] * 1e6:8.1f} us")
+        if report is not None:
+            report.add(f"round_archive.bytes_per_holder[{n}]", size / (n * rounds), "B")
+            report.add(f"round_archive.append[{n}]", write_s / rounds * 1000, "ms")
+            report.add(f"round_archive.lookup_p50[{n}]", lat[len(lat) // 2] * 1e6, "us")
+            report.add(f"round_archive.lookup_p99[{n}]", lat[int(len(lat) * 0.99)] * 1e6, "us")
+
+        def decode_block_lookup(r: int, addr: str) -> None:
+            block = encode_block(r, tables[r - 1])  # stand-in for reading + decoding one whole block
+            HolderTable(block[16:16 + 32 * n], np.zeros(n, dtype=np.uint8)).row_of(addr)
+
+        lat = []
+        for r, addr in probes[:20]:
+            t0 = time.perf_counter()
+            decode_block_lookup(r, addr)
+            lat.append(time.perf_counter() - t0)
+        lat.sort()
+        print(f"  lookup (full block)  p50 {lat[len(lat) // 2] * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(args[0] if args else 100_000, args[1] if len(args) > 1 else 20)
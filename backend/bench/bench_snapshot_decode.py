@@ -0,0 +1,101 @@
+# bench_snapshot_decode.py
+"""
+Compare snapshot decoding paths on a synthetic getProgramAccounts payload.
+
+  jsonParsed: full parsed accounts, walked dict by dict
+  sliced:     base64 owner+amount dataSlice, decoded in bulk with NumPy
+
+Both timings include json.loads of the raw response body.
+Run from backend/:  python -m bench.bench_snapshot_decode [accounts]
+"""
+import sys
+import json
+import time
+import base64
+import random
+from typing import Optional
+
+from solders.pubkey import Pubkey
+
+from app.state_store import parse_json_parsed_accounts, parse_sliced_accounts
+
+from .report import Report
+
+MINT = "So11111111111111111111111111111111111111112"
+
+
+def make_payloads(n: int, owners: int):
+    rnd = random.Random(7)
+    owner_keys = [bytes(rnd.getrandbits(8) for _ in range(32)) for _ in range(owners)]
+    owner_strs = [str(Pubkey.from_bytes(k)) for k in owner_keys]
+    parsed, sliced = [], []
+    for i in range(n):
+        o = i % owners
+        amount = rnd.randrange(0, 10**9) if i % 10 else 0
+        pubkey = str(Pubkey.new_unique())
+        parsed.append({
+            "pubkey": pubkey,
+            "account": {
+                "data": {
+                    "parsed": {
+                        "info": {
+                            "isNative": False,
+                            "mint": MINT,
+                            "owner": owner_strs[o],
+                            "state": "initialized",
+                            "tokenAmount": {
+                                "amount": str(amount),
+                                "decimals": 6,
+                                "uiAmount": amount / 1e6,
+                                "uiAmountString": str(amount / 1e6),
+                            },
+                        },
+                        "type": "account",
+                    },
+                    "program": "spl-token",
+                    "space": 165,
+                },
+                "executable": False,
+                "lamports": 2039280,
+                "owner": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+                "rentEpoch": 18446744073709551615,
+                "space": 165,
+            },
+        })
+        raw = owner_keys[o] + amount.to_bytes(8, "little")
+        sliced.append({
+            "pubkey": pubkey,
+            "account": {
+                "data": [base64.b64encode(raw).decode(), "base64"],
+                "executable": False,
+                "lamports": 2039280,
+                "owner": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+                "rentEpoch": 18446744073709551615,
+                "space": 165,
+            },
+        })
+    wrap = lambda result: json.dumps({"jsonrpc": "2.0", "id": 1, "result": result})
+    return wrap(parsed), wrap(sliced)
+
+
+def timed(label: str, body: str, parse, report: Optional[Report] = None, n: int = 0) -> list:
+    start = time.perf_counter()
+    owners = parse(json.loads(body)["result"])
+    elapsed = time.perf_counter() - start
+    print(f"  {label:10s} {len(body) / 1e6:8.1f} MB  {elapsed:7.2f} s  owners={len(owners)}")
+    if report is not None:
+        report.add(f"snapshot_decode.{label}[{n}]", elapsed * 1000, "ms")
+        report.add(f"snapshot_decode.{label}_payload[{n}]", len(body) / 1e6, "MB")
+    return owners
+
+
+def main(n: int, report: Optional[Report] = None) -> None:
+    parsed_body, sliced_body = make_payloads(n, owners=max(1, n // 2))
+    print(f"accounts={n}")
+    a = timed("jsonParsed", parsed_body, parse_json_parsed_accounts, report, n)
+    b = timed("sliced", sliced_body, parse_sliced_accounts, report, n)
+    assert a == b, "decoders disagree"
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
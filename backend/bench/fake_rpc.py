@@ -0,0 +1,329 @@
+# fake_rpc.py
+"""
+Local stand-in for a Solana RPC node and PumpPortal's trade-local API, so
+snapshots, payouts and load tests run without touching mainnet.
+
+  JSON-RPC (POST /, single or batch):
+    getProgramAccounts    --accounts token accounts of any mint (base64
+                          dataSlice or jsonParsed, optional withContext)
+    getTokenAccounts      Helius' paged owner/amount listing of the same
+                          accounts (zero balances left out)
+    getSlot, getBlockHeight, getLatestBlockhash, getBalance
+    sendTransaction       accepts anything, returns the tx's first signature
+    getSignatureStatuses  "confirmed" for every signature sent here
+  PumpPortal (POST /api/trade-local):
+    collectCreatorFee / distributePrize -> an unsigned v0 transaction
+
+Every request waits --latency ms (+/- --jitter) and fails with HTTP 429 at
+--error-rate. Tests can also slow down (FakeChain.delays) or fail
+(FakeChain.failing) single methods. Point the backend at it with
+
+    SOLANA_RPC_URL=http://127.0.0.1:8899 PUMPPORTAL_URL=http://127.0.0.1:8899/api/trade-local
+
+Run from backend/:  python -m bench.fake_rpc [--port 8899] [--accounts 100000] [--latency 30]
+"""
+import sys
+import json
+import time
+import base64
+import random
+import argparse
+import binascii
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs
+
+import numpy as np
+from solders.hash import Hash
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+from app.services.tx_builder import build_transfer_message
+from app.state_store import SLICE_DTYPE, SLICE_LEN, TOKEN_PROGRAM_ID
+
+SLOTS_PER_SECOND = 2.5
+
+
+def owner_keys(owners: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, size=(owners, 32), dtype=np.uint8).view("V32").ravel()
+
+
+def slice_records(accounts: int, owners: int, seed: int = 7) -> np.ndarray:
+    """owner+amount records for `accounts` token accounts; every 10th is empty."""
+    rng = np.random.default_rng(seed)
+    records = np.zeros(accounts, dtype=SLICE_DTYPE)
+    records["owner"] = owner_keys(max(1, owners), seed)[np.arange(accounts) % max(1, owners)]
+    amounts = rng.integers(1, 10**9, size=accounts, dtype=np.uint64)
+    amounts[::10] = 0
+    records["amount"] = amounts
+    return records
+
+
+def sliced_accounts(accounts: int, owners: int, seed: int = 7) -> List[Dict]:
+    """A getProgramAccounts result in base64 dataSlice form."""
+    raw = slice_records(accounts, owners, seed).tobytes()
+    b2a = binascii.b2a_base64
+    return [
+        {
+            "pubkey": str(Pubkey.new_unique()),
+            "account": {
+                "data": [b2a(raw[i:i + SLICE_LEN], newline=False).decode(), "base64"],
+                "executable": False,
+                "lamports": 2039280,
+                "owner": TOKEN_PROGRAM_ID,
+                "rentEpoch": 18446744073709551615,
+                "space": 165,
+            },
+        }
+        for i in range(0, len(raw), SLICE_LEN)
+    ]
+
+
+def token_accounts(accounts: int, owners: int, mint: str, seed: int = 7) -> List[Dict]:
+    """The same accounts as Helius getTokenAccounts items, without the empty ones."""
+    return [
+        {
+            "address": str(Pubkey.new_unique()),
+            "mint": mint,
+            "owner": str(Pubkey.from_bytes(bytes(rec["owner"]))),
+            "amount": int(rec["amount"]),
+            "delegated_amount": 0,
+            "frozen": False,
+        }
+        for rec in slice_records(accounts, owners, seed)
+        if rec["amount"]
+    ]
+
+
+def parsed_accounts(accounts: int, owners: int, mint: str, seed: int = 7) -> List[Dict]:
+    """The same accounts as jsonParsed."""
+    out = []
+    for rec in slice_records(accounts, owners, seed):
+        amount = int(rec["amount"])
+        out.append({
+            "pubkey": str(Pubkey.new_unique()),
+            "account": {
+                "data": {
+                    "parsed": {
+                        "info": {
+                            "isNative": False,
+                            "mint": mint,
+                            "owner": str(Pubkey.from_bytes(bytes(rec["owner"]))),
+                            "state": "initialized",
+                            "tokenAmount": {
+                                "amount": str(amount),
+                                "decimals": 6,
+                                "uiAmount": amount / 1e6,
+                                "uiAmountString": str(amount / 1e6),
+                            },
+                        },
+                        "type": "account",
+                    },
+                    "program": "spl-token",
+                    "space": 165,
+                },
+                "executable": False,
+                "lamports": 2039280,
+                "owner": TOKEN_PROGRAM_ID,
+                "rentEpoch": 18446744073709551615,
+                "space": 165,
+            },
+        })
+    return out
+
+
+class FakeChain:
+    """The little state the fake node needs: slot clock, sent signatures, payloads."""
+
+    def __init__(self, accounts: int, owners: int):
+        self.accounts = accounts
+        self.owners = owners
+        self.started = time.time()
+        self.sent: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # Encoded getProgramAccounts results, by (encoding, mint)
+        self._payloads: Dict[Tuple[str, str], str] = {}
+        self._token_accounts: Dict[str, List[Dict]] = {}
+        self.calls: Dict[str, int] = {}
+        # Test hooks: extra seconds before answering, and methods that answer with an error
+        self.delays: Dict[str, float] = {}
+        self.failing: Set[str] = set()
+
+    def slot(self) -> int:
+        return 300_000_000 + int((time.time() - self.started) * SLOTS_PER_SECOND)
+
+    def program_accounts(self, encoding: str, mint: str) -> str:
+        key = (encoding, mint)
+        with self._lock:
+            if key not in self._payloads:
+                if encoding == "base64":
+                    result = sliced_accounts(self.accounts, self.owners)
+                else:
+                    result = parsed_accounts(self.accounts, self.owners, mint)
+                self._payloads[key] = json.dumps(result, separators=(",", ":"))
+            return self._payloads[key]
+
+    def token_accounts_page(self, mint: str, page: int, limit: int) -> str:
+        with self._lock:
+            if mint not in self._token_accounts:
+                self._token_accounts[mint] = token_accounts(self.accounts, self.owners, mint)
+            items = self._token_accounts[mint]
+        start = (max(1, page) - 1) * limit
+        return json.dumps({
+            "total": len(items[start:start + limit]),
+            "limit": limit,
+            "page": page,
+            "token_accounts": items[start:start + limit],
+        })
+
+    def call(self, method: str, params) -> Tuple[Optional[str], Optional[Dict]]:
+        """(pre-encoded JSON result, error) for one JSON-RPC call."""
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        if self.delays.get(method):
+            time.sleep(self.delays[method])
+        if method in self.failing:
+            return None, {"code": -32000, "message": f"{method} failed (injected)"}
+        ctx = {"slot": self.slot()}
+        if method == "getTokenAccounts":
+            return self.token_accounts_page(params["mint"], int(params.get("page", 1)), int(params.get("limit", 1000))), None
+        if method == "getProgramAccounts":
+            config = params[1] if len(params) > 1 else {}
+            mint = next((f["memcmp"]["bytes"] for f in config.get("filters", []) if "memcmp" in f), "")
+            body = self.program_accounts(config.get("encoding", "base64"), mint)
+            if config.get("withContext"):
+                body = f'{{"context":{json.dumps(ctx)},"value":{body}}}'
+            return body, None
+        if method in ("getSlot", "getBlockHeight"):
+            return str(ctx["slot"]), None
+        if method == "getLatestBlockhash":
+            return json.dumps({"context": ctx, "value": {"blockhash": str(Hash.new_unique()), "lastValidBlockHeight": ctx["slot"] + 150}}), None
+        if method == "getBalance":
+            return json.dumps({"context": ctx, "value": 5_000_000_000}), None
+        if method == "sendTransaction":
+            try:
+                tx = VersionedTransaction.from_bytes(base64.b64decode(params[0]))
+                sig = str(tx.signatures[0])
+            except Exception as e:
+                return None, {"code": -32602, "message": f"invalid transaction: {e}"}
+            with self._lock:
+                self.sent[sig] = time.time()
+            return json.dumps(sig), None
+        if method == "getSignatureStatuses":
+            with self._lock:
+                known = [s in self.sent for s in params[0]]
+            value = [
+                {"slot": ctx["slot"], "confirmations": 1, "err": None, "confirmationStatus": "confirmed"} if k else None
+                for k in known
+            ]
+            return json.dumps({"context": ctx, "value": value}), None
+        return None, {"code": -32601, "message": f"Method not found: {method}"}
+
+
+def unsigned_tx(form: Dict[str, List[str]]) -> bytes:
+    """What trade-local answers: an unsigned v0 transaction for the wallet."""
+    payer = Pubkey.from_string(form["publicKey"][0])
+    if form.get("action", [""])[0] == "distributePrize":
+        transfers = list(zip(form.get("recipients", []), map(int, form.get("amounts", []))))
+    else:
+        transfers = [(str(payer), 0)]  # collectCreatorFee: any well-formed tx will do
+    msg = build_transfer_message(payer, transfers, Hash.new_unique())
+    return bytes(VersionedTransaction.populate(msg, [Signature.default()]))
+
+
+def make_handler(chain: FakeChain, latency: float, jitter: float, error_rate: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status: int, body: bytes, content_type: str = "application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            raw = self.rfile.read(int(self.headers.get("Content-Length", "0") or 0))
+            delay = max(0.0, latency + random.uniform(-jitter, jitter))
+            if delay:
+                time.sleep(delay)
+            if error_rate and random.random() < error_rate:
+                return self._reply(429, b'{"error":"rate limited"}')
+
+            if self.path.startswith("/api/trade-local"):
+                try:
+                    return self._reply(200, unsigned_tx(parse_qs(raw.decode())), "application/octet-stream")
+                except Exception as e:
+                    return self._reply(400, str(e).encode(), "text/plain")
+
+            try:
+                req = json.loads(raw)
+            except ValueError:
+                return self._reply(400, b'{"error":"bad json"}')
+            batch = isinstance(req, list)
+            out = []
+            for r in (req if batch else [req]):
+                result, error = chain.call(r.get("method", ""), r.get("params") or [])
+                rid = json.dumps(r.get("id"))
+                if error is not None:
+                    out.append(f'{{"jsonrpc":"2.0","id":{rid},"error":{json.dumps(error)}}}')
+                else:
+                    out.append(f'{{"jsonrpc":"2.0","id":{rid},"result":{result}}}')
+            body = ("[" + ",".join(out) + "]") if batch else out[0]
+            self._reply(200, body.encode())
+
+    return Handler
+
+
+class FakeRpcServer:
+    """The fake node on a background thread (for benchmarks that start their own)."""
+
+    def __init__(self, port: int = 0, accounts: int = 10_000, owners: Optional[int] = None,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0):
+        self.chain = FakeChain(accounts, owners or max(1, accounts // 2))
+        handler = make_handler(self.chain, latency_ms / 1000, jitter_ms / 1000, error_rate)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-rpc", daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def start(self) -> "FakeRpcServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--accounts", type=int, default=100_000, help="token accounts returned by getProgramAccounts")
+    parser.add_argument("--owners", type=int, default=None, help="distinct owners among them (default accounts/2)")
+    parser.add_argument("--latency", type=float, default=30.0, help="added latency per request, ms")
+    parser.add_argument("--jitter", type=float, default=10.0, help="+/- latency jitter, ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    args = parser.parse_args(argv)
+
+    server = FakeRpcServer(args.port, args.accounts, args.owners, args.latency, args.jitter, args.error_rate)
+    print(f"Fake RPC / PumpPortal on {server.url} ({args.accounts} accounts, {args.latency}±{args.jitter} ms)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"calls: {server.chain.calls}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
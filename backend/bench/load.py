@@ -0,0 +1,314 @@
+# load.py
+"""
+HTTP load generator: N browser tabs running the home page's polling loop
+from frontend/app.js against the API.
+
+Every tab keeps three keep-alive connections (the three parallel fetches of
+renderHome) and once per --interval:
+
+  GET /state.json
+  GET /holders?limit=20    If-None-Match (fetch cache "no-cache")
+  GET /history?limit=50    If-None-Match
+
+Tabs open at random points of the first interval. When a tab has seen a
+round RUNNING for a few seconds its battle "ends" and it POSTs /winner,
+like the browser's ArenaSim does (the first report wins the round).
+
+Against a running server:
+    python -m bench.load --url http://127.0.0.1:8000 --tabs 200 --seconds 30
+Or start the API (uvicorn) plus the fake RPC itself:
+    python -m bench.load --spawn --workers 2 --holders 100000 --tabs 200
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import json
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .report import Report
+
+HOME_HOLDERS_LIMIT = 20
+HOME_HISTORY_LIMIT = 50
+TEAMS = ["red", "purple", "blue", "yellow"]
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection (stdlib only, so thousands are cheap)."""
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, headers: Dict[str, str], body: bytes = b"") -> Tuple[int, Dict[str, str], bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        if body:
+            lines.append(f"Content-Length: {len(body)}")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        try:
+            status_line = await self.reader.readline()
+            if not status_line:
+                raise ConnectionError("connection closed")
+            status = int(status_line.split()[1])
+            resp_headers: Dict[str, str] = {}
+            while True:
+                line = await self.reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = line.decode("latin-1").partition(":")
+                resp_headers[k.strip().lower()] = v.strip()
+            if "content-length" in resp_headers:
+                data = await self.reader.readexactly(int(resp_headers["content-length"]))
+            elif resp_headers.get("transfer-encoding") == "chunked":
+                parts = []
+                while True:
+                    size = int((await self.reader.readline()).strip(), 16)
+                    chunk = await self.reader.readexactly(size + 2)
+                    if size == 0:
+                        break
+                    parts.append(chunk[:-2])
+                data = b"".join(parts)
+            else:
+                data = b""
+            if resp_headers.get("connection") == "close":
+                self.close()
+            return status, resp_headers, data
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Stats:
+    def __init__(self):
+        self.latency: Dict[str, List[float]] = {}
+        self.status: Dict[str, Dict[int, int]] = {}
+        self.errors: Dict[str, int] = {}
+        self.bytes = 0
+        self.winners_posted = 0
+
+    def record(self, route: str, seconds: float, status: int, size: int) -> None:
+        self.latency.setdefault(route, []).append(seconds)
+        counts = self.status.setdefault(route, {})
+        counts[status] = counts.get(status, 0) + 1
+        self.bytes += size
+
+    def error(self, route: str) -> None:
+        self.errors[route] = self.errors.get(route, 0) + 1
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class Tab:
+    """One home page: three connections, ETags remembered like the browser's HTTP cache."""
+
+    def __init__(self, host: str, port: int, stats: Stats, battle_seconds: Tuple[float, float]):
+        self.conns = [Connection(host, port) for _ in range(3)]
+        self.stats = stats
+        self.etags: Dict[str, str] = {}
+        self.battle_seconds = battle_seconds
+        self.running_since: Dict[int, float] = {}
+        self.reported: set = set()
+
+    async def fetch(self, conn: Connection, route: str, path: str, revalidate: bool) -> Optional[bytes]:
+        headers = {"Accept": "application/json", "Accept-Encoding": "gzip, br"}
+        if revalidate and path in self.etags:
+            headers["If-None-Match"] = self.etags[path]
+        start = time.perf_counter()
+        try:
+            status, resp_headers, body = await conn.request("GET", path, headers)
+        except Exception:
+            self.stats.error(route)
+            return None
+        self.stats.record(route, time.perf_counter() - start, status, len(body))
+        if revalidate and "etag" in resp_headers:
+            self.etags[path] = resp_headers["etag"]
+        return body if status == 200 else None
+
+    async def maybe_report_winner(self, state: Dict) -> None:
+        if state.get("phase") != "RUNNING":
+            return
+        rnd = int(state.get("roundNumber", 0))
+        seen = self.running_since.setdefault(rnd, time.monotonic() + random.uniform(*self.battle_seconds))
+        if rnd in self.reported or time.monotonic() < seen:
+            return
+        self.reported.add(rnd)
+        body = json.dumps({"round": rnd, "team": random.choice(TEAMS)}).encode()
+        start = time.perf_counter()
+        try:
+            status, _, data = await self.conns[0].request("POST", "/winner", {"Content-Type": "application/json"}, body)
+        except Exception:
+            self.stats.error("POST /winner")
+            return
+        self.stats.record("POST /winner", time.perf_counter() - start, status, len(data))
+        self.stats.winners_posted += 1
+
+    async def tick(self) -> None:
+        state_body, _, _ = await asyncio.gather(
+            self.fetch(self.conns[0], "/state.json", "/state.json", revalidate=False),
+            self.fetch(self.conns[1], "/holders", f"/holders?limit={HOME_HOLDERS_LIMIT}", revalidate=True),
+            self.fetch(self.conns[2], "/history", f"/history?limit={HOME_HISTORY_LIMIT}", revalidate=True),
+        )
+        if state_body:
+            try:
+                await self.maybe_report_winner(json.loads(state_body))
+            except ValueError:
+                pass
+
+    async def run(self, until: float, interval: float) -> None:
+        await asyncio.sleep(random.uniform(0, interval))
+        next_tick = time.monotonic()
+        while time.monotonic() < until:
+            await self.tick()
+            next_tick += interval
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+        for c in self.conns:
+            c.close()
+
+
+async def generate(url: str, tabs: int, seconds: float, interval: float, battle_seconds: Tuple[float, float]) -> Tuple[Stats, float]:
+    parts = urlsplit(url)
+    stats = Stats()
+    start = time.monotonic()
+    until = start + seconds
+    await asyncio.gather(*(
+        Tab(parts.hostname, parts.port or 80, stats, battle_seconds).run(until, interval) for _ in range(tabs)
+    ))
+    return stats, time.monotonic() - start
+
+
+def summarize(stats: Stats, elapsed: float, report: Optional[Report] = None, prefix: str = "load") -> None:
+    total = sum(len(v) for v in stats.latency.values())
+    print(f"{total} requests in {elapsed:.1f}s: {total / elapsed:.1f} req/s, {stats.bytes / elapsed / 1e3:.1f} kB/s, "
+          f"errors {sum(stats.errors.values())}, winners posted {stats.winners_posted}")
+    if report is not None:
+        report.add(f"{prefix}.throughput", total / elapsed, "req/s", better="higher")
+        report.add(f"{prefix}.errors", sum(stats.errors.values()), "count")
+    for route in sorted(stats.latency):
+        lat = sorted(stats.latency[route])
+        p50, p95, p99 = (percentile(lat, q) * 1000 for q in (0.5, 0.95, 0.99))
+        not_modified = stats.status[route].get(304, 0) / len(lat)
+        print(f"  {route:14s} n={len(lat):7d}  p50 {p50:7.2f} ms  p95 {p95:7.2f} ms  p99 {p99:7.2f} ms  "
+              f"max {lat[-1] * 1000:7.2f} ms  304s {not_modified:5.1%}  status {dict(sorted(stats.status[route].items()))}")
+        if report is not None:
+            for q, v in (("p50", p50), ("p95", p95), ("p99", p99)):
+                report.add(f"{prefix}.{route}.{q}", v, "ms")
+
+
+class SpawnedServer:
+    """uvicorn app.main:app plus the fake RPC, in a scratch directory."""
+
+    def __init__(self, port: int, workers: int, holders: int, rpc_latency_ms: float, break_seconds: int):
+        from .fake_rpc import FakeRpcServer
+
+        self.port = port
+        self.rpc = FakeRpcServer(accounts=2 * holders, owners=holders, latency_ms=rpc_latency_ms).start()
+        self.tmp = tempfile.TemporaryDirectory()
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = {
+            **os.environ,
+            "PYTHONPATH": backend_dir,
+            "SOLANA_RPC_URL": self.rpc.url,
+            "PUMPPORTAL_URL": f"{self.rpc.url}/api/trade-local",
+            "HELIUS_API_KEY": "",
+            "BREAK_SECONDS": str(break_seconds),
+            "HOLDER_INDEX_MODE": "off",
+        }
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+             "--workers", str(workers), "--log-level", "warning"],
+            cwd=self.tmp.name, env=env,
+        )
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def wait_ready(self, timeout: float = 30) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                conn = Connection("127.0.0.1", self.port)
+                status, _, _ = await conn.request("GET", "/healthz", {})
+                conn.close()
+                if status == 200:
+                    return
+            except Exception:
+                pass
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"server exited with {self.proc.returncode}")
+            await asyncio.sleep(0.2)
+        raise RuntimeError("server did not come up")
+
+    def stop(self) -> None:
+        self.proc.terminate()
+        try:
+            self.proc.wait(10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        self.rpc.stop()
+        self.tmp.cleanup()
+
+
+def run(report: Report, args: argparse.Namespace) -> None:
+    server = None
+    url = args.url
+    if args.spawn:
+        server = SpawnedServer(args.port, args.workers, args.holders, args.rpc_latency, args.break_seconds)
+        url = server.url
+    try:
+        if server is not None:
+            asyncio.run(server.wait_ready())
+        print(f"{args.tabs} tabs polling {url} every {args.interval}s for {args.seconds}s")
+        stats, elapsed = asyncio.run(generate(url, args.tabs, args.seconds, args.interval, (3.0, 15.0)))
+        summarize(stats, elapsed, report, prefix=f"load[{args.tabs}tabs]")
+    finally:
+        if server is not None:
+            server.stop()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--tabs", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--interval", type=float, default=1.0, help="poll interval of a tab (app.js ticks every 1s)")
+    parser.add_argument("--spawn", action="store_true", help="start uvicorn + the fake RPC instead of using --url")
+    parser.add_argument("--port", type=int, default=8765, help="port of the spawned server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers of the spawned server")
+    parser.add_argument("--holders", type=int, default=10_000, help="holders the fake RPC returns to the spawned server")
+    parser.add_argument("--rpc-latency", type=float, default=30.0, help="fake RPC latency, ms")
+    parser.add_argument("--break-seconds", type=int, default=10, help="BREAK_SECONDS of the spawned server")
+
+
+def main(argv=None) -> Report:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument("--out", help="write a JSON report here")
+    args = parser.parse_args(argv)
+
+    report = Report()
+    run(report, args)
+    if args.out:
+        report.write(args.out)
+    return report
+
+
+if __name__ == "__main__":
+    main()
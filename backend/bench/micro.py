@@ -0,0 +1,119 @@
+# micro.py
+"""
+Microbenchmarks of the round's CPU-bound steps at several holder counts.
+
+  shuffle:    seeded_shuffle() over the addresses
+  assign:     assign_teams() (pydantic models) and assign_team_table()
+  parse:      getProgramAccounts body -> unique owners, json.loads included
+              (sliced / jsonParsed)
+  save:       one state flush with a fresh holder table (JSON and SQLite backends)
+  arena:      simulated seconds of ArenaSim per wall second
+
+Run from backend/:  python -m bench.micro [--sizes 1000 100000 1000000] [--out micro.json]
+"""
+import json
+import time
+import pathlib
+import argparse
+import tempfile
+from typing import Callable, List
+
+from app.arena import DT, ArenaSim
+from app.holder_table import HolderTable
+from app.state_store import (
+    assign_team_table,
+    assign_teams,
+    owner_keys_to_addresses,
+    parse_json_parsed_accounts,
+    parse_sliced_accounts,
+    seeded_shuffle,
+)
+from app.storage import JsonBackend, SqliteBackend
+
+from .fake_rpc import owner_keys, parsed_accounts, sliced_accounts
+from .report import Report
+
+MINT = "So11111111111111111111111111111111111111112"
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    """Fastest of `repeat` runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def state_document(n: int, table: HolderTable) -> dict:
+    return {
+        "state": {"roundNumber": 42, "phase": "BREAK", "breakEndsAt": "2025-01-01T00:00:30+00:00",
+                  "prizePoolLamports": 1_000_000_000, "winner": None},
+        "holders": {"total": len(table), "tokenAddress": MINT, "lastUpdatedISO": "2025-01-01T00:00:00+00:00", "round": 42},
+        "history": [{"round": r, "team": "red", "prizeLamports": 1_000_000} for r in range(41, 0, -1)],
+        "pendingCreatorLamports": 0,
+        "treasuryLamports": 0,
+    }
+
+
+def run(report: Report, sizes: List[int], parsed_max: int = 100_000) -> None:
+    for n in sizes:
+        repeat = 5 if n <= 10_000 else (3 if n <= 100_000 else 1)
+        addresses = owner_keys_to_addresses(owner_keys(n))
+        print(f"holders={n}")
+
+        def record(name: str, seconds: float) -> None:
+            report.add(f"micro.{name}[{n}]", seconds * 1000, "ms")
+            print(f"  {name:22s} {seconds * 1000:10.2f} ms")
+
+        record("seeded_shuffle", best_of(lambda: seeded_shuffle(addresses, 1337), repeat))
+        record("assign_teams", best_of(lambda: assign_teams(addresses, 1337), repeat))
+        record("assign_team_table", best_of(lambda: assign_team_table(addresses, 1337).build_index(), repeat))
+
+        # Twice as many accounts as owners, like a real mint with dust accounts
+        body = json.dumps(sliced_accounts(2 * n, n))
+        record("parse_sliced", best_of(lambda: parse_sliced_accounts(json.loads(body)), repeat))
+        if n <= parsed_max:
+            body = json.dumps(parsed_accounts(2 * n, n, MINT))
+            record("parse_json_parsed", best_of(lambda: parse_json_parsed_accounts(json.loads(body)), repeat))
+        del body
+
+        table = assign_team_table(addresses, 1337)
+        data = state_document(n, table)
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = pathlib.Path(tmp)
+            json_backend = JsonBackend(tmp / "state.json", tmp / "state.holders.bin")
+            record("save_state_json", best_of(lambda: json_backend.write(json_backend.serialize(data), table), repeat))
+            record("save_state_json_small", best_of(lambda: json_backend.write(json_backend.serialize(data), None), repeat))
+            sqlite_backend = SqliteBackend(tmp / "state.db")
+            record("save_state_sqlite", best_of(lambda: sqlite_backend.write(sqlite_backend.serialize(data), table), repeat))
+            record("save_state_sqlite_small", best_of(lambda: sqlite_backend.write(sqlite_backend.serialize(data), None), repeat))
+            del sqlite_backend  # close the connection before the directory goes
+
+    for per_team in (1, 250, 1000):
+        sim = ArenaSim(1, per_team=per_team)
+        start = time.perf_counter()
+        sim.advance(600)
+        rate = sim.tick * DT / (time.perf_counter() - start)
+        report.add(f"micro.arena_realtime_factor[{4 * per_team}]", rate, "x", better="higher")
+        print(f"  arena {4 * per_team:5d} entities   {rate:8.1f}x real time")
+
+
+def main(argv=None) -> Report:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--parsed-max", type=int, default=100_000,
+                        help="skip jsonParsed above this many holders (the payload alone takes GBs)")
+    parser.add_argument("--out", help="write a JSON report here")
+    args = parser.parse_args(argv)
+
+    report = Report()
+    run(report, args.sizes, args.parsed_max)
+    if args.out:
+        report.write(args.out)
+    return report
+
+
+if __name__ == "__main__":
+    main()
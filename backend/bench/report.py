@@ -0,0 +1,97 @@
+# report.py
+"""
+Benchmark results as a JSON report that can be compared between versions.
+
+    python -m bench.report baseline.json current.json   # side-by-side diff
+
+Every result is a named metric with a unit and a direction ("lower" or
+"higher" is better), so the comparison knows a regression when it sees one.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+from typing import Dict, Optional
+
+import numpy as np
+
+# A change smaller than this is reported as noise
+NOISE = float(os.getenv("BENCH_NOISE", "0.05"))
+
+
+def git_revision() -> Optional[str]:
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, cwd=here
+        )
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, timeout=5, cwd=here
+        )
+        rev = out.stdout.strip()
+        return (rev + "-dirty" if dirty.stdout.strip() else rev) or None
+    except Exception:
+        return None
+
+
+class Report:
+    def __init__(self):
+        self.meta: Dict = {
+            "revision": git_revision(),
+            "createdAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        }
+        self.results: Dict[str, Dict] = {}
+
+    def add(self, name: str, value: float, unit: str, better: str = "lower", **extra) -> None:
+        self.results[name] = {"value": round(float(value), 6), "unit": unit, "better": better, **extra}
+
+    def as_dict(self) -> Dict:
+        return {"meta": self.meta, "results": self.results}
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=2)
+        print(f"Wrote {len(self.results)} results to {path}")
+
+
+def load(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(old: Dict, new: Dict) -> int:
+    """Print both reports side by side; returns the number of regressions."""
+    print(f"old: {old['meta'].get('revision')} ({old['meta'].get('createdAt')})")
+    print(f"new: {new['meta'].get('revision')} ({new['meta'].get('createdAt')})")
+    regressions = 0
+    names = list(dict.fromkeys(list(old["results"]) + list(new["results"])))
+    width = max((len(n) for n in names), default=10)
+    for name in names:
+        a, b = old["results"].get(name), new["results"].get(name)
+        if a is None or b is None:
+            only = "new" if a is None else "old"
+            r = b or a
+            print(f"  {name:{width}s}  {r['value']:>12.4g} {r['unit']:6s}  (only in {only})")
+            continue
+        if not a["value"]:
+            change = 0.0
+        else:
+            change = (b["value"] - a["value"]) / abs(a["value"])
+        worse = change > NOISE if b.get("better", "lower") == "lower" else change < -NOISE
+        better = change < -NOISE if b.get("better", "lower") == "lower" else change > NOISE
+        verdict = "REGRESSION" if worse else ("improved" if better else "")
+        regressions += worse
+        print(f"  {name:{width}s}  {a['value']:>12.4g} -> {b['value']:>12.4g} {b['unit']:6s} {change:+7.1%}  {verdict}")
+    return regressions
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        raise SystemExit("usage: python -m bench.report OLD.json NEW.json")
+    sys.exit(1 if compare(load(sys.argv[1]), load(sys.argv[2])) else 0)
@@ -0,0 +1,25 @@
+# conftest.py
+"""
+Shared test setup. Every path the app writes to is pointed at a temporary
+directory before `app` is first imported, so tests never touch the real
+state files.
+
+Run from backend/:  python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="pikmin-tests-")
+for name, value in {
+    "STATE_PATH": "state_store.json",
+    "HOLDERS_PATH": "state_store.holders.bin",
+    "STATE_DB_PATH": "state_store.db",
+    "SNAPSHOT_CACHE_DIR": "snapshot_cache",
+    "ROUND_ARCHIVE_PATH": "rounds.archive",
+    "TRACE_PATH": "traces.jsonl",
+}.items():
+    os.environ.setdefault(name, os.path.join(_TMP, value))
+os.environ.setdefault("TRACING", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,62 @@
+# test_distribute_prize.py
+import pytest
+from solders.keypair import Keypair
+
+from app.holder_table import HolderTable
+from app.services import distribute_prize
+from app.services.payout_engine import PayoutEngine, PayoutResult
+from app.services.tx_builder import BlockhashCache
+from app.state_store import DEMO_HOLDERS, assign_team_table, fetch_and_assign_teams, is_demo_table
+
+PAYER = Keypair()
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Records every plan the engine would pay instead of sending anything."""
+    seen = []
+
+    def run(self, plan):
+        seen.append(plan)
+        return PayoutResult(plan=plan, batches=[], elapsed=0.0)
+
+    monkeypatch.setattr(PayoutEngine, "run", run)
+    # Not started: nothing is built, so no blockhash is ever fetched
+    monkeypatch.setattr(distribute_prize, "blockhash_cache", BlockhashCache)
+    return seen
+
+
+def pay(monkeypatch, table, team="red"):
+    monkeypatch.setattr(distribute_prize, "holder_table", lambda: table)
+    return distribute_prize.distribute_prize_to_team(
+        round_number=1,
+        winning_team=team,
+        prize_lamports=10**9,
+        wallet_address=str(PAYER.pubkey()),
+        wallet_private_key=str(PAYER),
+        rpc_url="http://127.0.0.1:9",
+    )
+
+
+def test_failed_snapshot_falls_back_to_the_demo_pool():
+    table = fetch_and_assign_teams("mint", seed=1337, addresses=[])
+    assert len(table) == len(DEMO_HOLDERS)
+    assert is_demo_table(table)
+    # The mark is the addresses themselves, so it survives a reload from disk
+    assert is_demo_table(HolderTable.from_bytes(table.to_bytes()))
+
+
+def test_demo_pool_is_never_paid(monkeypatch, runs):
+    table = fetch_and_assign_teams("mint", seed=1337, addresses=[])
+    with pytest.raises(ValueError, match="demo pool"):
+        pay(monkeypatch, table)
+    assert runs == []
+
+
+def test_real_holders_are_paid(monkeypatch, runs):
+    addresses = [str(Keypair().pubkey()) for _ in range(40)]
+    table = assign_team_table(addresses, seed=1337)
+    assert not is_demo_table(table)
+    pay(monkeypatch, table)
+    assert len(runs) == 1
+    assert set(runs[0].recipients) <= set(addresses)
@@ -0,0 +1,95 @@
+# test_helius.py
+import time
+
+import pytest
+
+from app import helius, state_store
+from bench.fake_rpc import FakeRpcServer, token_accounts
+
+MINT = "So11111111111111111111111111111111111111112"
+
+
+@pytest.fixture
+def node():
+    server = FakeRpcServer(accounts=2_500, owners=900).start()
+    yield server
+    server.stop()
+
+
+def expected_balances(accounts: int, owners: int):
+    """owner -> total balance, in first-seen order (what the snapshot promises)."""
+    totals = {}
+    for item in token_accounts(accounts, owners, MINT):
+        totals[item["owner"]] = totals.get(item["owner"], 0) + item["amount"]
+    return totals
+
+
+@pytest.mark.parametrize("limit, concurrency", [(1_000, 8), (100, 3), (2_250, 2), (250, 1)])
+def test_pages_are_deduped_in_page_order(node, limit, concurrency):
+    amounts = []
+    owners = helius.fetch_token_account_owners(node.url, MINT, concurrency=concurrency, limit=limit, amounts=amounts)
+    want = expected_balances(2_500, 900)
+    assert owners == list(want)
+    assert amounts == list(want.values())
+    assert len(set(owners)) == len(owners) == 810  # owners 0, 10, 20, ... only hold empty accounts
+    # 2250 non-empty accounts: every page up to the first short one, plus at most `concurrency` past it
+    pages = 2_250 // limit + 1
+    assert pages <= node.chain.calls["getTokenAccounts"] <= pages + concurrency
+
+
+def test_progress_is_reported(node):
+    seen = []
+    helius.fetch_token_account_owners(node.url, MINT, limit=500, on_progress=lambda p: seen.append(p.as_dict()))
+    assert seen[-1]["done"] and seen[-1]["accounts"] == 2_250 and seen[-1]["owners"] == 810
+    assert helius.last_progress.done
+
+
+def test_deadline_raises_without_waiting_for_pages(node):
+    node.chain.delays["getTokenAccounts"] = 2.0
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        helius.fetch_token_account_owners(node.url, MINT, deadline=0.2)
+    assert time.monotonic() - started < 1.0
+
+
+def test_failed_page_raises(node):
+    node.chain.failing.add("getTokenAccounts")
+    with pytest.raises(RuntimeError, match="getTokenAccounts page"):
+        helius.fetch_token_account_owners(node.url, MINT)
+
+
+@pytest.fixture
+def paged(monkeypatch):
+    monkeypatch.setattr(state_store, "HELIUS_API_KEY", "test-key")
+    monkeypatch.setattr(state_store, "HELIUS_PAGED_SNAPSHOTS", True)
+
+
+def test_snapshot_uses_paged_fetch(node, paged):
+    snap = state_store.snapshot_holders(MINT, rpc_url=node.url, deadline=5)
+    assert snap.holders == list(expected_balances(2_500, 900))
+    assert "getProgramAccounts" not in node.chain.calls
+
+
+def test_snapshot_falls_back_when_a_page_fails(node, paged):
+    node.chain.failing.add("getTokenAccounts")
+    snap = state_store.snapshot_holders(MINT, rpc_url=node.url, deadline=5)
+    assert node.chain.calls["getProgramAccounts"] == 1
+    assert sorted(snap.holders) == sorted(expected_balances(2_500, 900))
+
+
+def test_snapshot_skips_fallback_after_deadline(node, paged):
+    node.chain.delays["getTokenAccounts"] = 2.0
+    started = time.monotonic()
+    snap = state_store.snapshot_holders(MINT, rpc_url=node.url, deadline=0.3)
+    assert time.monotonic() - started < 1.0
+    assert snap.holders == []
+    assert "getProgramAccounts" not in node.chain.calls
+
+
+def test_snapshot_fallback_gets_only_the_rest_of_the_budget(node, paged):
+    node.chain.failing.add("getTokenAccounts")
+    node.chain.delays["getProgramAccounts"] = 2.0
+    started = time.monotonic()
+    snap = state_store.snapshot_holders(MINT, rpc_url=node.url, deadline=0.5)
+    assert time.monotonic() - started < 1.2
+    assert snap.holders == []
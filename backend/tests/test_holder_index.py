@@ -0,0 +1,209 @@
+# test_holder_index.py
+import json
+import time
+import base64
+import asyncio
+
+import pytest
+from solders.pubkey import Pubkey
+from websockets.asyncio.server import serve
+
+from app.holder_index import HolderIndex, HolderIndexSync, decode_account_notification
+from app.state_store import AMOUNT_OFFSET, OWNER_OFFSET, TOKEN_ACCOUNT_SIZE, fetch_and_assign_teams, fetch_token_accounts
+from bench.fake_rpc import FakeRpcServer
+
+MINT = "So11111111111111111111111111111111111111112"
+A, B, C = (str(Pubkey.new_unique()) for _ in range(3))  # token accounts
+ALICE, BOB = (str(Pubkey.new_unique()) for _ in range(2))  # owners
+
+
+def notification(account: str, owner: str, amount: int, slot: int) -> str:
+    data = bytearray(TOKEN_ACCOUNT_SIZE)
+    data[0:32] = bytes(Pubkey.from_string(MINT))
+    data[OWNER_OFFSET:OWNER_OFFSET + 32] = bytes(Pubkey.from_string(owner))
+    data[AMOUNT_OFFSET:AMOUNT_OFFSET + 8] = amount.to_bytes(8, "little")
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "method": "programNotification",
+        "params": {
+            "subscription": 1,
+            "result": {
+                "context": {"slot": slot},
+                "value": {"pubkey": account, "account": {"data": [base64.b64encode(bytes(data)).decode(), "base64"]}},
+            },
+        },
+    })
+
+
+# ----------------------------
+# HolderIndex
+# ----------------------------
+def test_seed_sums_owners_and_drops_empty_accounts():
+    index = HolderIndex(MINT)
+    index.seed([(A, ALICE, 5), (B, ALICE, 7), (C, BOB, 0)], slot=10)
+    assert index.balances() == {ALICE: 12}
+    assert index.slot == 10 and index.ready
+
+
+def test_apply_moves_balances_and_removes_emptied_owners():
+    index = HolderIndex(MINT)
+    index.seed([(A, ALICE, 5), (B, ALICE, 7)], slot=10)
+    index.apply(A, BOB, 5, slot=11)  # account A changes hands
+    assert index.balances() == {ALICE: 7, BOB: 5}
+    index.apply(B, ALICE, 0, slot=12)  # closed
+    assert index.balances() == {BOB: 5}
+    index.apply(C, BOB, 1, slot=13)
+    assert index.balances() == {BOB: 6}
+    assert index.deltas_applied == 3
+
+
+def test_apply_ignores_deltas_older_than_the_index():
+    index = HolderIndex(MINT)
+    index.seed([(A, ALICE, 5)], slot=10)
+    index.apply(A, ALICE, 0, slot=9)
+    assert index.balances() == {ALICE: 5} and index.deltas_applied == 0
+    index.apply(A, ALICE, 6)  # slot unknown: always applied
+    assert index.balances() == {ALICE: 6}
+
+
+def test_diff_matches_a_fresh_seed():
+    index = HolderIndex(MINT)
+    index.seed([(A, ALICE, 5), (B, ALICE, 7), (C, BOB, 1)], slot=10)
+    fresh = [(A, ALICE, 5), (B, BOB, 7), (C, BOB, 0)]
+    assert index.diff(fresh, slot=20) == 2  # B moved, C emptied; A untouched
+    seeded = HolderIndex(MINT)
+    seeded.seed(fresh, slot=20)
+    assert index.balances() == seeded.balances() == {ALICE: 5, BOB: 7}
+    assert index.slot == 20
+
+
+def test_teams_do_not_depend_on_delta_order():
+    owners = [str(Pubkey.new_unique()) for _ in range(50)]
+    accounts = [str(Pubkey.new_unique()) for _ in owners]
+    tables = []
+    for order in (owners, owners[::-1]):
+        # same final holder set, deltas seen in a different order
+        index = HolderIndex(MINT)
+        index.seed([], slot=1)
+        for owner in order:
+            index.apply(accounts[owners.index(owner)], owner, owners.index(owner) + 1, slot=2)
+        balances = index.balances()
+        tables.append(fetch_and_assign_teams(MINT, seed=1337, addresses=list(balances), amounts=list(balances.values())))
+    assert tables[0].to_bytes() == tables[1].to_bytes()
+
+
+def test_decode_notification():
+    assert decode_account_notification(json.loads(notification(A, ALICE, 42, 7))) == (A, ALICE, 42, 7)
+    closed = json.loads(notification(A, ALICE, 42, 8))
+    closed["params"]["result"]["value"]["account"]["data"] = ["", "base64"]
+    assert decode_account_notification(closed) == (A, "", 0, 8)
+    assert decode_account_notification({"jsonrpc": "2.0", "result": 1, "id": 1}) is None
+
+
+# ----------------------------
+# HolderIndexSync against a local WebSocket stand-in
+# ----------------------------
+class FakePubSub:
+    """programSubscribe endpoint: records subscriptions and hands out the open sockets."""
+
+    def __init__(self):
+        self.subscriptions = []
+        self.sockets = []
+        self.on_subscribe = None  # async fn(ws) run right after answering the subscribe
+
+    async def handler(self, ws):
+        self.subscriptions.append(json.loads(await ws.recv()))
+        await ws.send(json.dumps({"jsonrpc": "2.0", "result": len(self.subscriptions), "id": 1}))
+        if self.on_subscribe:
+            await self.on_subscribe(ws)
+        self.sockets.append(ws)
+        await ws.wait_closed()
+
+
+async def eventually(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        await asyncio.sleep(0.02)
+
+
+@pytest.fixture
+def node():
+    server = FakeRpcServer(accounts=200, owners=50).start()
+    yield server
+    server.stop()
+
+
+def follow(node, scenario):
+    """Run HolderIndexSync in subscribe mode against FakePubSub + the fake RPC, then `scenario`."""
+    async def main():
+        pubsub = FakePubSub()
+        index = HolderIndex(MINT)
+        async with serve(pubsub.handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            sync = HolderIndexSync(index, mode="subscribe", rpc_url=node.url, ws_url=f"ws://127.0.0.1:{port}")
+            task = asyncio.create_task(sync.run())
+            try:
+                await scenario(pubsub, index, sync)
+            finally:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+    asyncio.run(main())
+
+
+def snapshot_balances(node):
+    index = HolderIndex(MINT)
+    index.seed(fetch_token_accounts(MINT, node.url)[1])
+    return index.balances()
+
+
+def test_follow_seeds_then_applies_deltas(node):
+    async def scenario(pubsub, index, sync):
+        await eventually(lambda: index.seeded and pubsub.sockets)
+        assert index.balances() == snapshot_balances(node)
+        assert sync.connected
+        sub = pubsub.subscriptions[0]
+        assert sub["method"] == "programSubscribe"
+        assert {"memcmp": {"offset": 0, "bytes": MINT}} in sub["params"][1]["filters"]
+
+        await pubsub.sockets[0].send(notification(A, ALICE, 9, node.chain.slot() + 10))
+        await eventually(lambda: index.balances().get(ALICE) == 9)
+
+    follow(node, scenario)
+
+
+def test_deltas_during_seeding_are_replayed(node):
+    node.chain.delays["getProgramAccounts"] = 0.5
+
+    async def send_early(ws):
+        # arrives while the seed snapshot is still in flight
+        await ws.send(notification(A, ALICE, 3, node.chain.slot() + 100))
+
+    async def scenario(pubsub, index, sync):
+        pubsub.on_subscribe = send_early
+        await eventually(lambda: index.seeded and index.deltas_applied == 1)
+        assert index.balances().get(ALICE) == 3
+        assert len(index) == len(snapshot_balances(node)) + 1
+
+    follow(node, scenario)
+
+
+def test_resubscribes_and_resyncs_after_disconnect(node):
+    async def scenario(pubsub, index, sync):
+        await eventually(lambda: index.seeded and pubsub.sockets)
+        await pubsub.sockets[0].send(notification(A, ALICE, 9, node.chain.slot() + 10))
+        await eventually(lambda: ALICE in index.balances())
+
+        await pubsub.sockets[0].close()
+        await eventually(lambda: not sync.connected)
+        await eventually(lambda: len(pubsub.sockets) == 2)  # reconnected after the 1s backoff
+        assert len(pubsub.subscriptions) == 2
+        # the reconnect resync diffs against the chain, which never saw account A
+        await eventually(lambda: ALICE not in index.balances())
+        assert index.balances() == snapshot_balances(node)
+
+        await pubsub.sockets[1].send(notification(B, BOB, 4, node.chain.slot() + 10))
+        await eventually(lambda: index.balances().get(BOB) == 4)
+
+    follow(node, scenario)
@@ -0,0 +1,65 @@
+# test_holder_search.py
+import threading
+import time
+
+from solders.keypair import Keypair
+
+from app import holder_search
+from app.holder_search import HolderSearchIndex, search_holders, search_index
+from app.state_store import assign_team_table
+
+
+def make_table(n=200, seed=1, index=True):
+    """Like set_holders(), which starts the index build with the new table."""
+    table = assign_team_table([str(Keypair().pubkey()) for _ in range(n)], seed)
+    if index:
+        search_index(table)
+    return table
+
+
+def test_prefix_and_substring_matches():
+    table = make_table()
+    address = table.address(7)
+    total, items, _ = search_holders(table, address[:6].lower())
+    assert total >= 1 and items[0]["address"] == address
+    total, items, _ = search_holders(table, address[10:20])
+    assert address in [it["address"] for it in items]
+
+
+def test_control_characters_match_nothing():
+    table = make_table()
+    assert search_holders(table, "\x00")[0] == 0
+    assert search_holders(table, "\x00\x00\x00\x00")[0] == 0
+    address = table.address(3)
+    # stripped, not treated as part of the needle
+    assert address in [it["address"] for it in search_holders(table, "\x00" + address[:8])[1]]
+
+
+def test_previous_index_is_served_while_the_next_one_builds(monkeypatch):
+    old = make_table(seed=1)
+    new = make_table(seed=2, index=False)
+
+    release = threading.Event()
+    original = HolderSearchIndex.__init__
+
+    def slow_build(self, table):
+        release.wait(10)
+        original(self, table)
+
+    monkeypatch.setattr(HolderSearchIndex, "__init__", slow_build)
+    builder = threading.Thread(target=search_index, args=(new,))
+    builder.start()
+    try:
+        start = time.perf_counter()
+        address = old.address(5)
+        total, items, _ = search_holders(new, address)
+        assert time.perf_counter() - start < 1.0
+        assert total == 1 and items[0]["address"] == address
+        # other tables are not held up by the build either
+        assert search_index(old) is holder_search._indexes[old]
+    finally:
+        release.set()
+        builder.join()
+
+    address = new.address(5)
+    assert search_holders(new, address)[1][0]["address"] == address
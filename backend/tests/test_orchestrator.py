@@ -0,0 +1,105 @@
+# test_orchestrator.py
+import time
+import asyncio
+import statistics
+
+import httpx
+import pytest
+
+from app import main as server, state_store
+from app.main import app
+from app.orchestrator import RoundOrchestrator, StepBusy, StepTimeout
+from bench.fake_rpc import FakeRpcServer
+
+MINT = "So11111111111111111111111111111111111111112"
+RPC_DELAY = 1.5
+
+
+@pytest.fixture
+def slow_node():
+    server = FakeRpcServer(accounts=2_000).start()
+    server.chain.delays["getProgramAccounts"] = RPC_DELAY
+    yield server
+    server.stop()
+
+
+async def state_latencies(client: httpx.AsyncClient, n: int):
+    out = []
+    for _ in range(n):
+        started = time.perf_counter()
+        resp = await client.get("/state.json")
+        out.append(time.perf_counter() - started)
+        assert resp.status_code == 200
+    return out
+
+
+def test_state_latency_stays_flat_during_a_slow_snapshot(slow_node, monkeypatch):
+    monkeypatch.setattr(state_store, "HELIUS_API_KEY", "")
+
+    async def main():
+        orchestrator = RoundOrchestrator(max_workers=2)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            baseline = await state_latencies(client, 50)
+
+            step = asyncio.ensure_future(orchestrator.run(
+                "snapshot", state_store.snapshot_holders, MINT,
+                rpc_url=slow_node.url, deadline=RPC_DELAY + 5, timeout=RPC_DELAY + 5,
+            ))
+            await asyncio.sleep(0.05)  # let the step reach the fake RPC
+            during, pending = [], True
+            while pending:
+                during += await state_latencies(client, 10)
+                pending = not step.done()
+            snap = await step
+        orchestrator.shutdown()
+        return baseline, during, snap
+
+    baseline, during, snap = asyncio.run(main())
+    assert len(snap.holders) > 0  # the slow call did complete
+    assert len(during) >= 50  # and /state.json kept answering while it was pending
+    # A blocked event loop would show up as one request taking ~RPC_DELAY
+    assert max(during) < 0.25
+    assert statistics.median(during) < max(0.02, 5 * statistics.median(baseline))
+
+
+def test_step_timeout_releases_the_caller_and_refuses_a_second_run():
+    async def main():
+        orchestrator = RoundOrchestrator(max_workers=2)
+        started = time.perf_counter()
+        with pytest.raises(StepTimeout):
+            await orchestrator.run("payout", time.sleep, 0.5, timeout=0.05)
+        assert time.perf_counter() - started < 0.3
+        with pytest.raises(StepBusy):
+            await orchestrator.run("payout", time.sleep, 0, timeout=1)
+        await asyncio.sleep(0.6)
+        assert await orchestrator.run("payout", lambda: "done", timeout=1) == "done"
+        orchestrator.shutdown()
+
+    asyncio.run(main())
+
+
+def test_leader_housekeeping_keeps_the_event_loop_free(monkeypatch):
+    applied = []
+
+    def slow_inbox():
+        time.sleep(RPC_DELAY / 3)  # a contended inbox lock or a slow disk
+        return [{"round": 1, "team": "red", "voter": "v"}]
+
+    monkeypatch.setattr(server, "STATE_SYNC_INTERVAL", 0.01)
+    monkeypatch.setattr(server, "drain_winner_inbox", slow_inbox)
+    monkeypatch.setattr(server, "apply_winner", lambda *args: applied.append(args))
+
+    async def main():
+        task = asyncio.ensure_future(server.leader_housekeeping())
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            during = []
+            while len(applied) < 2:
+                during += await state_latencies(client, 10)
+        task.cancel()
+        return during
+
+    during = asyncio.run(main())
+    assert applied[0] == (1, "red", "v")
+    assert max(during) < 0.25
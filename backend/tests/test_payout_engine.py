@@ -0,0 +1,158 @@
+# test_payout_engine.py
+import threading
+
+import pytest
+from solders.hash import Hash
+from solders.keypair import Keypair
+
+from app.models import PayoutPlan
+from app.services import payout_engine
+from app.services.payout_engine import PayoutEngine
+from app.services.tx_builder import build_transfer_message
+
+PAYER = Keypair()
+RECIPIENTS = [str(Keypair().pubkey()) for _ in range(6)]
+
+
+class FakeChain:
+    """
+    Just enough of a node for the engine: block height is set by the test,
+    `accept` decides whether a sent transaction lands, and `fail_send` makes
+    sendTransaction raise (after `accept` has been applied, like an HTTP
+    timeout from a node that took the transaction).
+    """
+
+    def __init__(self, accept=True, fail_send=False, lands_after=0):
+        self.accept = accept
+        self.fail_send = fail_send
+        self.lands_after = lands_after  # status polls before a landed tx shows up
+        self.height = 1_000
+        self.landed = {}  # signature -> polls seen
+        self.sends = 0
+        self.blockhashes = {}  # blockhash -> lastValidBlockHeight
+        self._lock = threading.Lock()
+
+    def build(self, transfers):
+        blockhash = Hash.new_unique()
+        self.blockhashes[blockhash] = self.height + 150
+        return build_transfer_message(PAYER.pubkey(), transfers, blockhash)
+
+    def send(self, rpc_url, tx):
+        with self._lock:
+            self.sends += 1
+            if self.accept:
+                self.landed[str(tx.signatures[0])] = 0
+        if self.fail_send:
+            raise TimeoutError("read timed out")
+        return str(tx.signatures[0])
+
+    def statuses(self, rpc_url, signatures):
+        out = []
+        for sig in signatures:
+            if sig in self.landed and self.landed[sig] >= self.lands_after:
+                out.append({"err": None, "confirmationStatus": "confirmed"})
+            else:
+                if sig in self.landed:
+                    self.landed[sig] += 1
+                out.append(None)
+        return out
+
+    def get_height(self, rpc_url):
+        self.height += 50  # the chain moves on between polls
+        return self.height
+
+    def engine(self, **kwargs):
+        return PayoutEngine(
+            build_tx=self.build,
+            keypair=PAYER,
+            rpc_url=None,
+            batch_size=2,
+            send_tx=self.send,
+            get_statuses=self.statuses,
+            get_height=self.get_height,
+            last_valid_height=self.blockhashes.get,
+            latest_height=lambda url: pytest.fail("height should come from last_valid_height"),
+            **kwargs,
+        )
+
+
+@pytest.fixture(autouse=True)
+def fast_polls(monkeypatch):
+    monkeypatch.setattr(payout_engine, "CONFIRM_POLL_SECONDS", 0)
+
+
+def plan(lamports=6_000):
+    return PayoutPlan(round=1, team="red", recipients=RECIPIENTS, totalLamports=lamports)
+
+
+def test_pays_every_batch_once():
+    chain = FakeChain()
+    result = chain.engine().run(plan())
+    assert [b.status for b in result.batches] == ["confirmed"] * 3
+    assert result.paid_lamports == 6_000
+    assert chain.sends == 3
+
+
+def test_send_error_after_acceptance_is_confirmed_not_resent():
+    chain = FakeChain(fail_send=True, lands_after=2)
+    result = chain.engine().run(plan())
+    assert [b.status for b in result.batches] == ["confirmed"] * 3
+    assert [b.attempts for b in result.batches] == [1, 1, 1]
+    assert chain.sends == 3
+    assert all(b.error is None for b in result.batches)
+
+
+def test_unlanded_batch_is_rebuilt_only_after_its_blockhash_expires():
+    chain = FakeChain(accept=False, fail_send=True)
+    engine = chain.engine(max_attempts=2)
+    heights_at_resend = []
+    build = engine.build_tx
+
+    def tracking_build(transfers):
+        heights_at_resend.append(chain.height)
+        return build(transfers)
+
+    engine.build_tx = tracking_build
+    result = engine.run(plan())
+    assert all(b.status == "failed" for b in result.batches)
+    assert all(b.attempts == 2 and len(b.signatures) == 2 for b in result.batches)
+    assert all("expired" in b.error for b in result.batches)
+    # second wave built only once the first wave's lastValidBlockHeight (1000 + 150) was passed
+    assert min(heights_at_resend[3:]) > 1_150
+
+
+def test_undecided_batch_is_unknown_and_never_resent():
+    chain = FakeChain(accept=False)
+    chain.get_height = lambda rpc_url: chain.height  # the chain stalls: never expires
+    result = chain.engine(confirm_timeout=0.05).run(plan())
+    assert [b.status for b in result.batches] == ["unknown"] * 3
+    assert chain.sends == 3
+    assert result.paid_lamports == 0
+
+
+def test_failure_before_signing_is_retried():
+    chain = FakeChain()
+    calls = {"n": 0}
+
+    def flaky_build(transfers):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise RuntimeError("PumpPortal error 500")
+        return chain.build(transfers)
+
+    engine = chain.engine()
+    engine.build_tx = flaky_build
+    result = engine.run(plan())
+    assert [b.status for b in result.batches] == ["confirmed"] * 3
+    assert sorted(b.attempts for b in result.batches) == [1, 1, 2]
+    assert chain.sends == 3
+
+
+def test_uses_latest_blockhash_height_without_a_lookup():
+    chain = FakeChain()
+    engine = chain.engine()
+    engine.last_valid_height = None
+    engine.latest_height = lambda url: 5_000
+    result = engine.run(plan())
+    assert {b.last_valid_block_height for b in result.batches} == {5_000}
+    assert result.paid_lamports == 6_000
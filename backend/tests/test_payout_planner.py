@@ -0,0 +1,140 @@
+# test_payout_planner.py
+import numpy as np
+import pytest
+
+from app.services.payout_planner import (
+    SPLITS,
+    U64,
+    capped_weights,
+    exact_sum,
+    floor_shares,
+    largest_remainder,
+    payout_weights,
+    plan_payout,
+    tier_weights,
+    parse_tiers,
+)
+
+PRIZE = 1_000 * 10**9  # big enough that total * W overflows u64
+
+
+def balances(n, seed=7):
+    rng = np.random.default_rng(seed)
+    return (rng.pareto(1.2, size=n) * 1e9).astype(U64) + U64(1)
+
+
+def reference(weights, total):
+    """Largest remainder in plain Python ints; ties to the earlier index."""
+    weights = [int(w) for w in weights]
+    big_w = sum(weights)
+    shares = [divmod(total * w, big_w) for w in weights]
+    amounts = [q for q, _ in shares]
+    left = total - sum(amounts)
+    for i in sorted(range(len(weights)), key=lambda i: (-shares[i][1], i))[:left]:
+        amounts[i] += 1
+    return amounts
+
+
+@pytest.mark.parametrize("split", SPLITS)
+def test_plan_sums_exactly_to_the_pool(split):
+    bal = balances(5_000)
+    recipients = [f"holder{i}" for i in range(len(bal))]
+    for prize in (1, 999, 10**9 + 7, PRIZE):
+        plan = plan_payout(1, "red", recipients, bal, prize, split=split)
+        assert plan.totalLamports == prize
+        assert sum(plan.amounts) == prize
+        assert len(plan.amounts) == len(plan.recipients)
+        assert all(a > 0 for a in plan.amounts)
+
+
+@pytest.mark.parametrize("split", SPLITS)
+def test_allocation_matches_exact_arithmetic(split):
+    bal = balances(2_000, seed=11)
+    weights = payout_weights(bal, len(bal), split)
+    assert largest_remainder(weights, PRIZE).tolist() == reference(weights, PRIZE)
+
+
+def test_ties_go_to_the_earlier_recipients():
+    assert largest_remainder(np.ones(3, dtype=U64), 5).tolist() == [2, 2, 1]
+    assert largest_remainder(np.ones(4, dtype=U64), 6).tolist() == [2, 2, 1, 1]
+    # remainders 1/6, 2/6, 2/6, 1/6 of a lamport: the two larger win first
+    weights = np.array([1, 2, 2, 1], dtype=U64)
+    assert largest_remainder(weights, 1).tolist() == [0, 1, 0, 0]
+    assert largest_remainder(weights, 2).tolist() == [0, 1, 1, 0]
+    # same input, same output
+    bal = balances(1_000)
+    w = payout_weights(bal, len(bal), "pro_rata")
+    assert np.array_equal(largest_remainder(w, PRIZE), largest_remainder(w.copy(), PRIZE))
+
+
+def test_zero_shares_are_dropped():
+    plan = plan_payout(1, "red", ["a", "b", "c"], None, 2, split="equal")
+    assert plan.recipients == ["a", "b"] and plan.amounts == [1, 1]
+    # a dust holder next to a whale rounds to nothing
+    bal = np.array([10**15, 1], dtype=U64)
+    plan = plan_payout(1, "red", ["whale", "dust"], bal, 1_000, split="pro_rata")
+    assert plan.recipients == ["whale"] and plan.amounts == [1_000]
+
+
+def test_capped_weights_hold_the_cap():
+    bal = np.array([10**12] + [10**6] * 19, dtype=U64)
+    weights = capped_weights(bal, 1000)
+    amounts = largest_remainder(weights, PRIZE)
+    assert exact_sum(amounts) == PRIZE
+    # nobody above 10% of the prize (plus the one lamport a remainder can add)
+    assert int(amounts.max()) <= PRIZE // 10 + 1
+    # the clipped balance is spread pro rata: the small holders stay equal
+    assert int(amounts[1:].max()) - int(amounts[1:].min()) <= 1
+    # a cap that does not bind leaves balances as they are
+    even = np.full(20, 5, dtype=U64)
+    assert np.array_equal(capped_weights(even, 1000), even)
+    # fewer than 10000 / cap_bps holders cannot all stay under it: equal split
+    assert capped_weights(bal[:5], 1000).tolist() == [1] * 5
+
+
+def test_tier_weights():
+    tiers = parse_tiers("100:2, 10:1,1000:3")
+    bal = np.array([0, 9, 10, 99, 100, 999, 1000, 10**18], dtype=U64)
+    assert tier_weights(bal, tiers).tolist() == [0, 0, 1, 1, 2, 2, 3, 3]
+    plan = plan_payout(1, "red", [f"h{i}" for i in range(len(bal))], bal, 1_100,
+                       split="tiered", tiers="10:1,100:2,1000:3")
+    # holders below the first tier get nothing; the rest 1:1:2:2:3:3 of 1100 lamports
+    assert plan.recipients == ["h2", "h3", "h4", "h5", "h6", "h7"]
+    assert plan.amounts == [92, 92, 183, 183, 275, 275]
+    # nobody qualifies: fall back to equal
+    assert payout_weights(np.array([1, 2], dtype=U64), 2, "tiered", tiers="10:1").tolist() == [1, 1]
+
+
+def check_floor_shares(weights, total):
+    q, r = floor_shares(weights, total)
+    big_w = sum(int(w) for w in weights)
+    expected = [divmod(total * int(w), big_w) for w in weights]
+    assert [int(x) for x in q] == [e[0] for e in expected]
+    assert [int(x) for x in r] == [e[1] for e in expected]
+    return q, r
+
+
+def test_floor_shares_u64_path():
+    q, r = check_floor_shares(np.array([1, 2, 3, 4], dtype=U64), 1_000_003)
+    assert r.dtype == U64
+
+
+def test_floor_shares_float_path_is_corrected():
+    # total * W overflows u64, but total < 2**52 and W < 2**61
+    weights = balances(10_000, seed=3) * U64(1_000)
+    total = 2**52 - 1
+    assert total * exact_sum(weights) >= 2**64 and exact_sum(weights) < 2**61
+    q, r = check_floor_shares(weights, total)
+    assert r.dtype == U64
+    assert largest_remainder(weights, total).tolist() == reference(weights, total)
+
+
+def test_floor_shares_python_int_path():
+    # W >= 2**61: the float estimate is no longer safe, so Python ints are used
+    weights = np.array([2**62, 2**62 - 1, 3, 2**61 + 5], dtype=U64)
+    q, r = check_floor_shares(weights, PRIZE)
+    assert r.dtype == object
+    assert largest_remainder(weights, PRIZE).tolist() == reference(weights, PRIZE)
+    # ... and so is a total beyond float64's exact integers
+    q, r = check_floor_shares(np.array([3_000, 5_000, 7_000], dtype=U64), 2**60 + 1)
+    assert r.dtype == object
@@ -0,0 +1,73 @@
+# test_response_cache.py
+import time
+import asyncio
+
+import httpx
+import pytest
+from solders.pubkey import Pubkey
+
+from app import main, response_cache
+from app.state_store import STATE_LOCK, assign_team_table, load_state, set_holders
+
+MINT = "So11111111111111111111111111111111111111112"
+
+
+@pytest.fixture(scope="module")
+def holders():
+    data = load_state()
+    table = assign_team_table([str(Pubkey.new_unique()) for _ in range(300)], seed=1)
+    set_holders(data, table, token_mint=MINT, round_number=1)
+    return table
+
+
+def get(path: str, **headers) -> httpx.Response:
+    async def go():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+    return asyncio.run(go())
+
+
+def test_each_encoding_has_its_own_etag(holders):
+    plain = get("/holders", **{"accept-encoding": "identity"})
+    gz = get("/holders", **{"accept-encoding": "gzip"})
+    assert plain.headers["etag"] != gz.headers["etag"]
+    assert gz.headers["etag"] == plain.headers["etag"][:-1] + '-gz"'
+    assert gz.headers["content-encoding"] == "gzip" and "content-encoding" not in plain.headers
+    assert gz.headers["vary"] == plain.headers["vary"] == "Accept-Encoding"
+    assert plain.json() == gz.json()  # httpx undoes the content-coding
+    if response_cache.brotli is not None:
+        br = get("/holders", **{"accept-encoding": "br, gzip"})
+        assert br.headers["etag"] == plain.headers["etag"][:-1] + '-br"'
+
+
+def test_conditional_requests_match_only_their_encoding(holders):
+    gz = get("/holders", **{"accept-encoding": "gzip"})
+    tag = gz.headers["etag"]
+    again = get("/holders", **{"accept-encoding": "gzip", "if-none-match": tag})
+    assert again.status_code == 304 and again.headers["etag"] == tag
+    # the gzip validator does not vouch for the identity body
+    other = get("/holders", **{"accept-encoding": "identity", "if-none-match": tag})
+    assert other.status_code == 200 and other.headers["etag"] != tag
+
+
+def test_small_bodies_stay_identity_and_still_revalidate(holders):
+    # too small to compress: served as identity even to a gzip client
+    small = get("/history?limit=1", **{"accept-encoding": "gzip"})
+    assert "content-encoding" not in small.headers and not small.headers["etag"].endswith('-gz"')
+    again = get("/history?limit=1", **{"accept-encoding": "gzip", "if-none-match": small.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_variants_are_built_when_the_data_changes(holders):
+    with STATE_LOCK:
+        main.publish_holders(load_state()["holders"])
+    view = main.holders_view()
+    deadline = time.monotonic() + 5
+    while True:
+        entries = [response_cache.response_cache._entries.get(("holders", (0, limit)))
+                   for limit in main.WARM_HOLDERS_LIMITS]
+        if all(e is not None and "gzip" in e._variants for e in entries) or time.monotonic() > deadline:
+            break
+        time.sleep(0.01)
+    assert all(e.etag == view[0] and "gzip" in e._variants for e in entries)
@@ -0,0 +1,30 @@
+# test_rpc_client.py
+import pytest
+
+from app.rpc_client import RpcClient, RpcError
+from bench.fake_rpc import FakeRpcServer
+
+
+@pytest.fixture
+def nodes():
+    servers = [FakeRpcServer(accounts=10).start() for _ in range(2)]
+    yield [s.chain for s in servers], RpcClient([s.url for s in servers])
+    for s in servers:
+        s.stop()
+
+
+def test_hedge_fails_over_past_an_error_object(nodes):
+    (first, second), client = nodes
+    first.failing.add("getSlot")
+    # the first endpoint answers fastest, but with an error: the second one's result wins
+    assert isinstance(client.call("getSlot", hedge=True), int)
+    assert first.calls["getSlot"] == 1 and second.calls["getSlot"] == 1
+
+
+def test_hedge_returns_the_error_once_every_leg_failed(nodes):
+    (first, second), client = nodes
+    first.failing.add("getSlot")
+    second.failing.add("getSlot")
+    with pytest.raises(RpcError, match="injected"):
+        client.call("getSlot", hedge=True)
+    assert first.calls["getSlot"] == 1 and second.calls["getSlot"] == 1
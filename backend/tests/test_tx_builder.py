@@ -0,0 +1,156 @@
+# test_tx_builder.py
+import struct
+import time
+
+import pytest
+from solders.compute_budget import ID as COMPUTE_BUDGET_ID
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.system_program import ID as SYSTEM_PROGRAM_ID
+from solders.transaction import VersionedTransaction
+
+from app.services import tx_builder
+from app.services.payout_engine import PAYOUT_BATCH_SIZE
+from app.services.tx_builder import (
+    BASE_COMPUTE_UNITS,
+    TRANSFER_COMPUTE_UNITS,
+    BlockhashCache,
+    build_transfer_message,
+    priority_fee_instructions,
+)
+
+PACKET_DATA_SIZE = 1232  # largest serialized transaction the network accepts
+PAYER = Keypair()
+
+
+def transfers(n: int):
+    return [(str(Keypair().pubkey()), 1_000 + i) for i in range(n)]
+
+
+def decoded(message):
+    """[(program id, data)] per compiled instruction."""
+    keys = message.account_keys
+    return [(keys[ix.program_id_index], bytes(ix.data)) for ix in message.instructions]
+
+
+# ----------------------------
+# Builders
+# ----------------------------
+def test_priority_fee_instructions():
+    assert priority_fee_instructions(0, 10_000) == []
+    limit, price = priority_fee_instructions(0.000001, 4_000)  # 1000 lamports over 4000 CU
+    assert limit.program_id == price.program_id == COMPUTE_BUDGET_ID
+    assert bytes(limit.data) == b"\x02" + struct.pack("<I", 4_000)
+    assert bytes(price.data) == b"\x03" + struct.pack("<Q", 1_000 * 1_000_000 // 4_000)
+    # a fee too small to spread still pays at least one micro-lamport per CU
+    assert bytes(priority_fee_instructions(1e-9, 10**7)[1].data) == b"\x03" + struct.pack("<Q", 1)
+
+
+@pytest.mark.parametrize("fee", [0.0, 0.0001])
+def test_transfer_message_instructions(fee):
+    batch = transfers(5)
+    blockhash = Hash.new_unique()
+    msg = build_transfer_message(PAYER.pubkey(), batch, blockhash, fee)
+    ixs = decoded(msg)
+    assert msg.recent_blockhash == blockhash
+    assert msg.account_keys[0] == PAYER.pubkey() and msg.is_signer(0)
+
+    budget = [data for program, data in ixs if program == COMPUTE_BUDGET_ID]
+    if fee:
+        units = BASE_COMPUTE_UNITS + TRANSFER_COMPUTE_UNITS * len(batch)
+        assert budget[0] == b"\x02" + struct.pack("<I", units)
+        price = struct.unpack("<Q", budget[1][1:])[0]
+        assert abs(price * units / 1e6 - fee * 1e9) < 1  # pays ~fee SOL in total
+    else:
+        assert budget == []
+
+    sent = []
+    for ix, (program, data) in zip(msg.instructions[len(budget):], ixs[len(budget):]):
+        assert program == SYSTEM_PROGRAM_ID
+        kind, lamports = struct.unpack("<IQ", data)
+        assert kind == 2  # SystemInstruction::Transfer
+        source, dest = (msg.account_keys[i] for i in bytes(ix.accounts))
+        assert source == PAYER.pubkey()
+        sent.append((str(dest), lamports))
+    assert sent == batch
+
+
+def test_full_batch_fits_in_one_packet():
+    msg = build_transfer_message(PAYER.pubkey(), transfers(PAYOUT_BATCH_SIZE), Hash.new_unique(), 0.001)
+    tx = VersionedTransaction(msg, [PAYER])
+    assert len(bytes(tx)) <= PACKET_DATA_SIZE
+    assert VersionedTransaction.from_bytes(bytes(tx)).verify_with_results() == [True]
+
+
+def test_oversized_batch_does_not_fit():
+    # guards the PAYOUT_BATCH_SIZE headroom: roughly 25 transfers is the ceiling
+    msg = build_transfer_message(PAYER.pubkey(), transfers(30), Hash.new_unique(), 0.001)
+    assert len(bytes(VersionedTransaction(msg, [PAYER]))) > PACKET_DATA_SIZE
+
+
+# ----------------------------
+# Blockhash cache
+# ----------------------------
+@pytest.fixture
+def fake_fetch(monkeypatch):
+    fetched = []
+
+    def fetch(rpc_url=None):
+        blockhash = Hash.new_unique()
+        fetched.append(blockhash)
+        return blockhash, 1_000 + len(fetched)
+
+    monkeypatch.setattr(tx_builder, "fetch_latest_blockhash", fetch)
+    return fetched
+
+
+def test_cache_reuses_a_fresh_blockhash_and_refetches_an_old_one(fake_fetch):
+    cache = BlockhashCache(None, refresh=60, max_age=0.1)
+    first = cache.get()
+    assert cache.get() == first and len(fake_fetch) == 1
+    assert cache.last_valid_block_height == 1_001
+    time.sleep(0.15)
+    second = cache.get()
+    assert second != first and len(fake_fetch) == 2
+    # heights of handed-out blockhashes stay available to the payout engine
+    assert cache.last_valid_height(first) == 1_001
+    assert cache.last_valid_height(second) == 1_002
+    assert cache.last_valid_height(Hash.new_unique()) is None
+
+
+def test_cache_forgets_old_heights(fake_fetch):
+    cache = BlockhashCache(None)
+    first = cache.refresh()
+    for _ in range(tx_builder.BLOCKHASH_HISTORY):
+        cache.refresh()
+    assert cache.last_valid_height(first) is None
+    assert cache.last_valid_height(fake_fetch[-1]) == 1_000 + len(fake_fetch)
+
+
+def test_refresher_thread_keeps_the_cache_current(fake_fetch):
+    cache = BlockhashCache(None, refresh=0.02, max_age=60)
+    cache.start()
+    try:
+        time.sleep(0.2)
+    finally:
+        cache.stop()
+        cache._thread.join(1)
+    assert len(fake_fetch) >= 3
+    assert cache.get() == fake_fetch[-1]  # served from the cache, no extra fetch
+    assert len(fake_fetch) == cache.last_valid_block_height - 1_000
+
+
+def test_refresh_failures_fall_back_to_a_synchronous_fetch(monkeypatch):
+    calls = []
+
+    def flaky(rpc_url=None):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("node down")
+        return Hash.new_unique(), 5
+
+    monkeypatch.setattr(tx_builder, "fetch_latest_blockhash", flaky)
+    cache = BlockhashCache(None, refresh=60, max_age=60)
+    with pytest.raises(RuntimeError):
+        cache.get()
+    assert cache.get() is not None and cache.last_valid_block_height == 5
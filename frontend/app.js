@@ -26,9 +26,11 @@ const TEAM_BG = {
 // ========== HELPERS ==========
 const LAMPORTS_PER_SOL = 1_000_000_000n;
 
-async function safeJSON(url) {
+// `cache: "no-cache"` revalidates with If-None-Match, so an unchanged
+// resource costs a 304 instead of the full body.
+async function safeJSON(url, cache = "no-store") {
   try {
-    const r = await fetch(url, { cache: "no-store" });
+    const r = await fetch(url, { cache });
     if (!r.ok) return null;
     return await r.json();
   } catch {
@@ -62,29 +64,56 @@ function renderEmpty(el) {
 async function loadState() {
   return await safeJSON(`${BACKEND_URL}/state.json`);
 }
-async function loadHolders() {
-  return await safeJSON(`${BACKEND_URL}/holders`);
+async function loadHolders(limit) {
+  const qs = limit ? `?limit=${limit}` : "";
+  return await safeJSON(`${BACKEND_URL}/holders${qs}`, "no-cache");
 }
-async function loadHistory() {
-  return await safeJSON(`${BACKEND_URL}/history`);
+async function loadHistory(limit) {
+  const qs = limit ? `?limit=${limit}` : "";
+  return await safeJSON(`${BACKEND_URL}/history${qs}`, "no-cache");
 }
 
 // ========== HOME PAGE ==========
-async function renderHome() {
+const HOME_HOLDERS_LIMIT = 20;
+const HOME_HISTORY_LIMIT = 50;
+
+function countdownSeconds(state) {
+  // pushed states carry a local deadline so the countdown ticks without polling
+  if (typeof state?._endsAtLocal === "number") {
+    return Math.max(0, Math.floor((state._endsAtLocal - Date.now()) / 1000));
+  }
+  return typeof state?.secondsLeft === "number"
+    ? state.secondsLeft
+    : secondsUntil(state?.breakEndsAt);
+}
+
+function renderCountdown(state) {
+  const battleCountdownEl = document.getElementById("battleCountdown");
+  if (!battleCountdownEl) return;
+  if (state?.phase === "RUNNING") {
+    battleCountdownEl.textContent = "LIVE";
+    battleCountdownEl.classList.add("text-green-400");
+  } else {
+    battleCountdownEl.textContent = `${countdownSeconds(state)}s`;
+    battleCountdownEl.classList.remove("text-green-400");
+  }
+}
+
+// `pushedState` comes from the event stream; otherwise /state.json is polled.
+async function renderHome(pushedState) {
   const prizePoolEl = document.getElementById("prizePool");
   if (!prizePoolEl) return; // not on home page
 
   const gameNumberEl = document.getElementById("gameNumber");
-  const battleCountdownEl = document.getElementById("battleCountdown");
   // const survivorCountEl = document.getElementById("survivorCount");
   const holdersListEl = document.getElementById("holdersList");
   const holdersCountEl = document.getElementById("holdersCount");
   const historyListEl = document.getElementById("historyList");
 
   const [state, holders, history] = await Promise.all([
-    loadState(),
-    loadHolders(),
-    loadHistory(),
+    pushedState || loadState(),
+    loadHolders(HOME_HOLDERS_LIMIT),
+    loadHistory(HOME_HISTORY_LIMIT),
   ]);
 
   // Prize pool
@@ -98,19 +127,7 @@ async function renderHome() {
   }
 
   // Countdown
-  if (battleCountdownEl) {
-    const phase = state?.phase;
-    if (phase === "RUNNING") {
-      battleCountdownEl.textContent = "LIVE";
-      battleCountdownEl.classList.add("text-green-400");
-    } else {
-      const secs = typeof state?.secondsLeft === "number"
-        ? state.secondsLeft
-        : secondsUntil(state?.breakEndsAt);
-      battleCountdownEl.textContent = `${secs}s`;
-      battleCountdownEl.classList.remove("text-green-400");
-    }
-  }
+  renderCountdown(state);
 
   // Survivors (fallback to total holders)
   // if (survivorCountEl) {
@@ -171,11 +188,8 @@ async function renderHome() {
     }
   }
 }
-renderHome();
-setInterval(renderHome, 1000);
-
-async function syncSimWithState() {
-  const state = await loadState();
+async function syncSimWithState(pushedState) {
+  const state = pushedState || await loadState();
   const phase = state?.phase;
 
   if (phase === "RUNNING") {
@@ -185,11 +199,53 @@ async function syncSimWithState() {
   }
 }
 
-// kick off and poll every second
+// ========== PUSH CHANNEL ==========
+// Phase transitions, holder snapshots and winners arrive over SSE; while it is
+// connected the page only ticks the countdown locally. Polling is the fallback.
+let lastState = null;
+let pushConnected = false;
+
+function connectEvents() {
+  if (!window.EventSource) return;
+  if (!document.getElementById("prizePool") && !document.getElementById("arena")) return;
+  const es = new EventSource(`${BACKEND_URL}/events`);
+  es.onopen = () => { pushConnected = true; };
+  es.onerror = () => { pushConnected = false; };
+  es.addEventListener("phase", (e) => {
+    const state = JSON.parse(e.data);
+    if (typeof state.secondsLeft === "number") {
+      state._endsAtLocal = Date.now() + state.secondsLeft * 1000;
+    }
+    lastState = state;
+    renderHome(state);
+    syncSimWithState(state);
+  });
+  // holders/history are revalidated with their ETags, so a refresh is cheap
+  es.addEventListener("holders", () => { if (lastState) renderHome(lastState); });
+  es.addEventListener("winner", () => { if (lastState) renderHome(lastState); });
+  // With SERVER_ARENA the backend runs the battle and streams it
+  es.addEventListener("arenaKey", (e) => ArenaSim.applyKeyframe(JSON.parse(e.data)));
+  es.addEventListener("arena", (e) => ArenaSim.applyDelta(JSON.parse(e.data)));
+}
+
+function tick() {
+  if (pushConnected) {
+    renderCountdown(lastState);
+  } else {
+    renderHome();
+    syncSimWithState();
+  }
+}
+
+// kick off, then tick every second
+renderHome();
 syncSimWithState();
-setInterval(syncSimWithState, 1000);
+connectEvents();
+setInterval(tick, 1000);
 
 // ========== HOLDERS PAGE ==========
+const HOLDERS_PAGE_LIMIT = 100;
+
 async function renderHoldersPage() {
   const tokenAddressEl = document.getElementById("tokenAddress");
   if (!tokenAddressEl) return; // not on holders page
@@ -200,7 +256,8 @@ async function renderHoldersPage() {
   const searchBtn = document.getElementById("searchBtn");
   const resultsEl = document.getElementById("searchResults");
 
-  const holders = await loadHolders();
+  // Only the first page is downloaded; searches run server-side.
+  const holders = await loadHolders(HOLDERS_PAGE_LIMIT);
 
   const total = holders?.total ?? holders?.items?.length ?? 0;
   if (totalParticipantsEl) totalParticipantsEl.textContent = String(total);
@@ -211,7 +268,7 @@ async function renderHoldersPage() {
       : "-";
   }
 
-  const all = holders?.items || [];
+  const firstPage = holders?.items || [];
   function renderList(list) {
     if (!list.length) return renderEmpty(resultsEl);
     resultsEl.innerHTML = "";
@@ -225,12 +282,15 @@ async function renderHoldersPage() {
       resultsEl.appendChild(row);
     });
   }
-  renderList(all);
-
-  function doSearch() {
-    const q = (searchInput?.value || "").trim().toLowerCase();
-    if (!q) return renderList(all);
-    renderList(all.filter((h) => h.address.toLowerCase().includes(q)));
+  renderList(firstPage);
+
+  async function doSearch() {
+    const q = (searchInput?.value || "").trim();
+    if (!q) return renderList(firstPage);
+    const res = await safeJSON(
+      `${BACKEND_URL}/holders/search?q=${encodeURIComponent(q)}&limit=${HOLDERS_PAGE_LIMIT}`
+    );
+    renderList(res?.items || []);
   }
   searchBtn?.addEventListener("click", doSearch);
   searchInput?.addEventListener("keydown", (e) => e.key === "Enter" && doSearch());
@@ -310,6 +370,9 @@ const ArenaSim = (() => {
   let winnerCb = null;
   let winnerSent = false;
 
+  // Server-driven mode: positions come from /events frames, no local physics
+  let remote = null;             // { round, width, height, baseR, teams, alive:[idx] }
+
   function onWinner(cb) { winnerCb = cb; }
 
   function ensureCanvas() {
@@ -635,7 +698,7 @@ const ArenaSim = (() => {
 
     acc += elapsed;
     while (acc >= dtMs) {
-      physicsStep(dtMs);
+      if (!remote) physicsStep(dtMs);
       acc -= dtMs;
     }
 
@@ -676,7 +739,70 @@ const ArenaSim = (() => {
   function snapshot() { return circles.map(c => ({ team: c.team, hp: c.hp })); }
   function onTick(cb) { tickCb = cb; }
 
-  return { start, stop, isActive: () => active, updateHP, snapshot, onTick, onWinner };
+  // -------- server frames ----------
+  function decodeB64(s) { return Uint8Array.from(atob(s), ch => ch.charCodeAt(0)); }
+
+  // uint16 x,y pairs (fractions of the arena) -> canvas pixels
+  function placeRemote(pos, idxs) {
+    const view = new DataView(decodeB64(pos).buffer);
+    if (view.byteLength !== idxs.length * 4) return false;
+    const rs = Math.min(canvas.width / remote.width, canvas.height / remote.height);
+    idxs.forEach((idx, k) => {
+      const c = remote.byIdx[idx];
+      c.x = view.getUint16(k * 4, true) / 65535 * canvas.width;
+      c.y = view.getUint16(k * 4 + 2, true) / 65535 * canvas.height;
+      c.r = hpRadius(remote.baseR, c.hp) * rs;
+    });
+    return true;
+  }
+
+  function remoteItem([id, kind, x, y]) {
+    const rs = Math.min(canvas.width / remote.width, canvas.height / remote.height);
+    const k = kind === 1 ? "flower" : "bulborb";
+    const f = k === "bulborb" ? ITEM_RAD_BULBORB_FACTOR : ITEM_RAD_FLOWER_FACTOR;
+    return {
+      id, kind: k,
+      x: x / remote.width * canvas.width, y: y / remote.height * canvas.height,
+      r: f * remote.baseR * rs, born: performance.now(),
+    };
+  }
+
+  function applyKeyframe(f) {
+    if (!active || !ensureCanvas()) return;
+    const team = decodeB64(f.team), hp = decodeB64(f.hp);
+    remote = { round: f.round, width: f.width, height: f.height, baseR: f.baseR, byIdx: [] };
+    for (let i = 0; i < team.length; i++) {
+      remote.byIdx.push({ id: `e${i}`, team: f.teams[team[i]], hp: hp[i], x: 0, y: 0, r: 0 });
+    }
+    placeRemote(f.pos, remote.byIdx.map((_, i) => i));
+    remote.alive = remote.byIdx.map((c, i) => i).filter(i => remote.byIdx[i].hp > 0);
+    circles = remote.alive.map(i => remote.byIdx[i]);
+    items = f.items.map(remoteItem);
+  }
+
+  function applyDelta(d) {
+    if (!active || !remote || d.round !== remote.round) return;
+    for (const [i, hp] of d.hp) remote.byIdx[i].hp = hp;
+    if (d.out.length) {
+      const out = new Set(d.out);
+      remote.alive = remote.alive.filter(i => !out.has(i));
+    }
+    // Out of step (a dropped frame): hold until the next keyframe
+    if (!placeRemote(d.pos, remote.alive)) return;
+    circles = remote.alive.map(i => remote.byIdx[i]);
+    if (d.itemsRemoved.length) {
+      const gone = new Set(d.itemsRemoved);
+      items = items.filter(it => !gone.has(it.id));
+    }
+    for (const row of d.itemsAdded) items.push(remoteItem(row));
+    if (d.winner && !winnerSent) {
+      // The server already recorded it; just announce
+      winnerSent = true;
+      showWinnerModal(d.winner);
+    }
+  }
+
+  return { start, stop, isActive: () => active, updateHP, snapshot, onTick, onWinner, applyKeyframe, applyDelta };
 })();
 
 // Register overlay updater *after* ArenaSim exists